@@ -0,0 +1,108 @@
+"""
+SLE AI Companion — OpenAI Batch API submission for bulk dataset builds
+
+Large overnight builds do not need answers within seconds, so instead of one
+synchronous call per batch the whole plan is written into a single JSONL
+batch-input file, uploaded and submitted once, polled until it finishes, and
+the results are demultiplexed back to their (type, lang, level, index range)
+by custom_id.
+
+custom_id format: "<type>|<LANG>|<LEVEL>|<start_idx>|<count>"
+"""
+import json
+import sys
+import time
+from pathlib import Path
+
+from prompts import prompt_cache_key
+from responses_api import read_usage, request_args
+
+TERMINAL_STATES = ("completed", "failed", "expired", "cancelled")
+
+
+def make_custom_id(item_type: str, lang: str, level: str, start_idx: int, count: int) -> str:
+    return f"{item_type}|{lang}|{level}|{start_idx}|{count}"
+
+
+def parse_custom_id(custom_id: str) -> tuple:
+    item_type, lang, level, start_idx, count = custom_id.split("|")
+    return item_type, lang, level, int(start_idx), int(count)
+
+
+def write_batch_input(path: Path, requests: list, model: str, temperature: float) -> int:
+    """Write [(custom_id, system_prompt, user_prompt), ...] as a batch-input JSONL file."""
+    path.parent.mkdir(parents=True, exist_ok=True)
+    with open(path, "w", encoding="utf-8") as f:
+        for custom_id, system_prompt, user_prompt in requests:
+            line = {
+                "custom_id": custom_id,
+                "method": "POST",
+                "url": "/v1/responses",
+                "body": request_args(model, temperature, system_prompt, user_prompt, False,
+                                     prompt_cache_key(*parse_custom_id(custom_id)[:3])),
+            }
+            f.write(json.dumps(line, ensure_ascii=False) + "\n")
+    return len(requests)
+
+
+def submit_batch(client, input_path: Path, metadata: dict = None) -> str:
+    """Upload the input file and create the batch; returns the batch id."""
+    with open(input_path, "rb") as f:
+        uploaded = client.files.create(file=f, purpose="batch")
+    batch = client.batches.create(
+        input_file_id=uploaded.id,
+        endpoint="/v1/responses",
+        completion_window="24h",
+        metadata=metadata,
+    )
+    return batch.id
+
+
+def wait_for_batch(client, batch_id: str, poll_interval: float = 30.0, timeout: float = 24 * 3600):
+    """Poll until the batch reaches a terminal state; returns the batch object."""
+    deadline = time.monotonic() + timeout
+    last_status = None
+    while True:
+        batch = client.batches.retrieve(batch_id)
+        counts = getattr(batch, "request_counts", None)
+        status = batch.status
+        if status != last_status or counts is not None:
+            done = f" ({counts.completed}/{counts.total} done, {counts.failed} failed)" if counts is not None else ""
+            print(f"  … batch {batch_id}: {status}{done}")
+            last_status = status
+        if status in TERMINAL_STATES:
+            return batch
+        if time.monotonic() > deadline:
+            raise TimeoutError(f"batch {batch_id} still {status} after {timeout:.0f}s")
+        time.sleep(poll_interval)
+
+
+def output_text(body: dict) -> str:
+    """Concatenated output_text of a raw Responses API response body."""
+    parts = []
+    for output in body.get("output") or []:
+        for content in output.get("content") or []:
+            if content.get("type") == "output_text":
+                parts.append(content.get("text", ""))
+    return "".join(parts)
+
+
+def download_results(client, batch) -> dict:
+    """Map custom_id -> (response text or None, Usage or None) for a finished batch."""
+    results = {}
+    for file_id in (batch.output_file_id, batch.error_file_id):
+        if not file_id:
+            continue
+        for line in client.files.content(file_id).text.splitlines():
+            if not line.strip():
+                continue
+            record = json.loads(line)
+            response = record.get("response") or {}
+            body = response.get("body") or {}
+            if response.get("status_code") == 200 and body:
+                results[record["custom_id"]] = (output_text(body), read_usage(body.get("usage")))
+            else:
+                error = record.get("error") or body.get("error")
+                print(f"  ⚠ Batch request {record.get('custom_id')} failed: {error}", file=sys.stderr)
+                results.setdefault(record["custom_id"], (None, None))
+    return results
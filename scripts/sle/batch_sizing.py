@@ -0,0 +1,67 @@
+"""
+SLE AI Companion — Adaptive batch sizing
+
+A fixed --batch-size is either too small for short A-level scenarios (the
+system prompt is re-sent for a handful of items) or too large for long C-level
+model answers (outputs get truncated or fail to parse). BatchSizer adjusts the
+size per (type, level) from what the API actually does, in the spirit of
+AIMD congestion control:
+
+- a full-size request that completes within the latency target grows the
+  size by a quarter (at least +1), up to max_size;
+- a truncated response, a parse error or a timeout halves it, down to min_size;
+- a complete but slow response shrinks it by a quarter.
+
+Rate-limit and server errors say nothing about the batch size and are ignored.
+"""
+import threading
+
+DEFAULT_MIN_SIZE = 2
+DEFAULT_MAX_SIZE = 40
+DEFAULT_TARGET_LATENCY = 120.0
+
+
+class BatchSizer:
+    """Batch size controller for one (type, level)."""
+
+    def __init__(self, initial: int, min_size: int = DEFAULT_MIN_SIZE, max_size: int = DEFAULT_MAX_SIZE,
+                 target_latency: float = DEFAULT_TARGET_LATENCY):
+        self.min_size = min_size
+        self.max_size = max(max_size, min_size)
+        self.size = min(max(initial, min_size), self.max_size)
+        self.target_latency = target_latency
+        self.history = [self.size]
+        self.grown = 0
+        self.shrunk = 0
+        self._lock = threading.Lock()
+
+    def _set(self, size: int):
+        size = min(max(size, self.min_size), self.max_size)
+        if size != self.size:
+            if size > self.size:
+                self.grown += 1
+            else:
+                self.shrunk += 1
+            self.size = size
+            self.history.append(size)
+
+    def record(self, requested: int, complete: bool, latency: float):
+        """Feed back one answered request of `requested` items."""
+        with self._lock:
+            if not complete:
+                self._set(self.size // 2)
+            elif latency > self.target_latency:
+                self._set(self.size - max(1, self.size // 4))
+            elif requested >= self.size:
+                # Only a request at full size proves the current size works.
+                self._set(self.size + max(1, self.size // 4))
+
+    def record_failure(self, error_class: str):
+        """Feed back a failed request."""
+        if error_class in ("parse", "timeout"):
+            with self._lock:
+                self._set(self.size // 2)
+
+    def summary(self) -> str:
+        return (f"{self.history[0]} → {self.size} (range {min(self.history)}-{max(self.history)}, "
+                f"{self.grown} up, {self.shrunk} down)")
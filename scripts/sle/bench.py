@@ -0,0 +1,223 @@
+#!/usr/bin/env python3
+"""
+SLE AI Companion — Generator throughput benchmark
+
+Runs the generators against a local stub of the Responses API (stub_server.py)
+so that pipeline changes can be measured without spending tokens. Every suite
+gets a fresh stub with the same latency / error / truncation settings and
+writes into a temporary directory; nothing under data/sle/seed is touched.
+
+Suites:
+  sequential   generate-dataset.py, one batch at a time
+  concurrent   generate-dataset.py --concurrency N
+  adaptive     generate-dataset.py --adaptive --concurrency N
+  stream       generate-dataset.py --stream --concurrency N
+  batch        generate-dataset.py --mode batch (submit, poll, demultiplex)
+  orchestrate  orchestrate-batches.py job queue with N workers (in-process)
+
+Each suite reports items/s, p50/p99 batch latency and retry overhead (extra
+requests per batch, share of wall time spent outside API calls), computed
+from the per-batch metrics the generators already write. Results are appended
+to .cache/sle-bench/results.jsonl with the current commit, and each run is
+compared with the latest earlier result for the same suite and settings:
+
+  python3 scripts/sle/bench.py
+  python3 scripts/sle/bench.py --suite concurrent adaptive --error-rate 0.1 --truncation-rate 0.1
+"""
+import argparse
+import contextlib
+import importlib.util
+import io
+import json
+import os
+import subprocess
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+from metrics import METRICS_SUFFIX, MetricsLog, load, percentile
+from near_dup import load_index
+from rate_limit import RateLimiter
+from schema_validate import load_validator
+from stub_server import StubServer
+
+SCRIPT_DIR = Path(__file__).resolve().parent
+REPO_DIR = SCRIPT_DIR.parent.parent
+DEFAULT_RESULTS = REPO_DIR / ".cache" / "sle-bench" / "results.jsonl"
+
+SUITES = ["sequential", "concurrent", "adaptive", "stream", "batch", "orchestrate"]
+DATASET_ARGS = {
+    "sequential": [],
+    "concurrent": ["--concurrency", "{concurrency}"],
+    "adaptive": ["--adaptive", "--concurrency", "{concurrency}"],
+    "stream": ["--stream", "--concurrency", "{concurrency}"],
+    "batch": ["--mode", "batch", "--poll-interval", "0.2"],
+}
+# High enough that the limiter never throttles the stub.
+BENCH_RPM = 100_000
+BENCH_TPM = 100_000_000
+
+
+def git_revision() -> tuple:
+    """(short commit, whether scripts/sle has uncommitted changes), or (None, False) outside git."""
+    try:
+        commit = subprocess.run(["git", "rev-parse", "--short", "HEAD"], cwd=REPO_DIR, capture_output=True,
+                                text=True, check=True).stdout.strip()
+        status = subprocess.run(["git", "status", "--porcelain", "--", str(SCRIPT_DIR)], cwd=REPO_DIR,
+                                capture_output=True, text=True, check=True).stdout
+    except (OSError, subprocess.CalledProcessError):
+        return None, False
+    return commit, bool(status.strip())
+
+
+def run_dataset(suite: str, args, base_url: str, out_dir: Path):
+    """Run generate-dataset.py in a subprocess pointed at the stub."""
+    extra = [a.format(concurrency=args.concurrency) for a in DATASET_ARGS[suite]]
+    cmd = [sys.executable, str(SCRIPT_DIR / "generate-dataset.py"), "--type", args.type, "--lang", args.lang,
+           "--level", args.level, "--count", str(args.count), "--batch-size", str(args.batch_size),
+           "--out-dir", str(out_dir), "--rpm", str(BENCH_RPM), "--tpm", str(BENCH_TPM), "--no-cache", *extra]
+    env = dict(os.environ, OPENAI_BASE_URL=base_url, OPENAI_API_KEY="stub")
+    result = subprocess.run(cmd, env=env, capture_output=True, text=True)
+    if result.returncode != 0:
+        print(result.stderr[-2000:], file=sys.stderr)
+        raise RuntimeError(f"generate-dataset.py exited with {result.returncode}")
+
+
+def run_orchestrate(args, base_url: str, out_dir: Path):
+    """Run the orchestrator's job queue in-process with its batch client pointed at the stub."""
+    spec = importlib.util.spec_from_file_location("orchestrate_batches", SCRIPT_DIR / "orchestrate-batches.py")
+    orchestrate = importlib.util.module_from_spec(spec)
+    spec.loader.exec_module(orchestrate)
+    batch = orchestrate.load_batch_module()
+    from openai import OpenAI
+    batch.client = OpenAI(base_url=base_url, api_key="stub", max_retries=0)
+
+    jobs = orchestrate.plan_jobs([args.type], [args.lang], [args.level], args.count, args.batch_size, 1, out_dir)
+    with contextlib.redirect_stdout(io.StringIO()), contextlib.redirect_stderr(io.StringIO()):
+        validators = {args.type: load_validator(args.type)}
+        dedup_indexes = {args.type: load_index(args.type)}
+        orchestrate.run_jobs(batch, jobs, args.concurrency, RateLimiter(rpm=BENCH_RPM, tpm=BENCH_TPM),
+                             validators=validators, dedup_indexes=dedup_indexes,
+                             metrics_log=MetricsLog(out_dir / f"orchestrate{METRICS_SUFFIX}"))
+
+
+def run_suite(suite: str, args) -> dict:
+    """Run one suite against a fresh stub and return its result record."""
+    stub = StubServer(latency=args.latency, per_item_latency=args.per_item_latency, error_rate=args.error_rate,
+                      truncation_rate=args.truncation_rate, seed=args.seed)
+    with stub, tempfile.TemporaryDirectory(prefix="sle-bench-") as tmp:
+        out_dir = Path(tmp)
+        started = time.monotonic()
+        if suite == "orchestrate":
+            run_orchestrate(args, stub.base_url, out_dir)
+        else:
+            run_dataset(suite, args, stub.base_url, out_dir)
+        wall = time.monotonic() - started
+        records = load(sorted(out_dir.glob(f"*{METRICS_SUFFIX}")))
+
+    latencies = [r["latency_s"] for r in records if r["requests"]]
+    requests = sum(r["requests"] for r in records)
+    items = sum(r["items"] for r in records)
+    batch_wall = sum(r["wall_s"] for r in records)
+    return {
+        "suite": suite,
+        "items": items,
+        "requested": args.count,
+        "batches": len(records),
+        "wall_s": round(wall, 3),
+        "items_per_s": round(items / wall, 3) if wall else 0.0,
+        "p50_latency": round(percentile(latencies, 0.5), 3),
+        "p99_latency": round(percentile(latencies, 0.99), 3),
+        "requests": requests,
+        "retries": sum(r["retries"] for r in records),
+        "extra_requests": round(requests / len(records) - 1, 3) if records else 0.0,
+        "wait_share": round(1 - sum(r["latency_s"] for r in records) / batch_wall, 3) if batch_wall else 0.0,
+        "stub": dict(stub.stats),
+    }
+
+
+def settings(args) -> dict:
+    """Parameters that must match for two results to be comparable."""
+    return {name: getattr(args, name) for name in ("type", "lang", "level", "count", "batch_size", "concurrency",
+                                                   "latency", "per_item_latency", "error_rate", "truncation_rate", "seed")}
+
+
+def previous_result(path: Path, suite: str, config: dict):
+    """Latest saved result for the same suite and settings, or None."""
+    if not path.exists():
+        return None
+    match = None
+    with open(path, encoding="utf-8") as f:
+        for line in f:
+            record = json.loads(line)
+            if record["suite"] == suite and record["settings"] == config:
+                match = record
+    return match
+
+
+def print_results(results: list, baselines: dict):
+    print(f"\n  {'Suite':<12} {'Items':>7} {'Wall s':>7} {'It/s':>7} {'p50 s':>6} {'p99 s':>6} "
+          f"{'Req':>5} {'Extra':>6} {'Wait%':>6}  vs baseline")
+    for r in results:
+        base = baselines.get(r["suite"])
+        if base is None:
+            versus = "—"
+        else:
+            change = (r["items_per_s"] / base["items_per_s"] - 1) if base["items_per_s"] else 0.0
+            versus = f"{change:+.0%} it/s, p99 {base['p99_latency']:.2f}s → {r['p99_latency']:.2f}s ({base['commit']}{'+' if base['dirty'] else ''})"
+        print(f"  {r['suite']:<12} {r['items']:>3}/{r['requested']:<3} {r['wall_s']:>7.1f} {r['items_per_s']:>7.2f} "
+              f"{r['p50_latency']:>6.2f} {r['p99_latency']:>6.2f} {r['requests']:>5} {r['extra_requests']:>6.2f} "
+              f"{r['wait_share']:>6.0%}  {versus}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark the SLE generators against a local stub API")
+    parser.add_argument("--suite", nargs="+", default=SUITES, choices=SUITES)
+    parser.add_argument("--type", default="scenarios", choices=["scenarios", "errors", "model_answers"])
+    parser.add_argument("--lang", default="FR", choices=["FR", "EN"])
+    parser.add_argument("--level", default="B", choices=["A", "B", "C"])
+    parser.add_argument("--count", type=int, default=60, help="Items per suite")
+    parser.add_argument("--batch-size", type=int, default=10)
+    parser.add_argument("--concurrency", type=int, default=4, help="Concurrent requests / workers")
+    parser.add_argument("--latency", type=float, default=0.2, help="Stub seconds per response")
+    parser.add_argument("--per-item-latency", type=float, default=0.02, help="Stub extra seconds per item")
+    parser.add_argument("--error-rate", type=float, default=0.05, help="Share of stub requests failing with 429")
+    parser.add_argument("--truncation-rate", type=float, default=0.05, help="Share of stub responses cut off")
+    parser.add_argument("--seed", type=int, default=1, help="Stub random seed")
+    parser.add_argument("--results", type=Path, default=DEFAULT_RESULTS, help="JSONL file results are appended to")
+    parser.add_argument("--no-save", action="store_true", help="Print results without appending them")
+    args = parser.parse_args()
+
+    commit, dirty = git_revision()
+    config = settings(args)
+    print(f"╔══════════════════════════════════════════════════════════════╗")
+    print(f"║  SLE Generator Benchmark — {len(args.suite)} suites @ {str(commit) + ('+' if dirty else ''):<14}       ║")
+    print(f"╚══════════════════════════════════════════════════════════════╝")
+    print(f"  Stub: {args.latency}s + {args.per_item_latency}s/item, {args.error_rate:.0%} errors, "
+          f"{args.truncation_rate:.0%} truncated; {args.count} {args.type} per suite, batch {args.batch_size}")
+
+    baselines = {suite: previous_result(args.results, suite, config) for suite in args.suite}
+    results = []
+    for suite in args.suite:
+        print(f"  Running {suite}...", flush=True)
+        try:
+            result = run_suite(suite, args)
+        except RuntimeError as e:
+            print(f"  ✗ {suite}: {e}", file=sys.stderr)
+            continue
+        result.update(ts=round(time.time(), 3), commit=commit, dirty=dirty, settings=config)
+        results.append(result)
+
+    print_results(results, {s: b for s, b in baselines.items() if b is not None})
+    if results and not args.no_save:
+        args.results.parent.mkdir(parents=True, exist_ok=True)
+        with open(args.results, "a", encoding="utf-8") as f:
+            for result in results:
+                f.write(json.dumps(result) + "\n")
+        print(f"\n  Results appended to {args.results}")
+    sys.exit(0 if len(results) == len(args.suite) else 1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,115 @@
+"""
+SLE AI Companion — Checkpointed JSONL output
+
+Each batch is appended to the output file and fsynced as soon as it is parsed,
+and a small manifest next to the output records which index ranges are done
+and how many bytes of the file they cover. A crashed run can be resumed: the
+output is truncated back to the last recorded offset (dropping any half-written
+tail) and completed ranges are skipped. With append=True a fresh run keeps the
+existing file and writes after it instead of truncating it.
+
+Manifest (`<output>.manifest.json`):
+  {"output": "scenarios_generated_fr_b.jsonl", "offset": 18234, "start_idx": 1,
+   "completed": [[1, 10, 10], [11, 4, 4], [16, 5, 5]]}   # [start_idx, count, items_written]
+
+A batch that came back with IDs missing is recorded as the runs of IDs it did
+write (above, 11-20 without 15), so a resumed run requests only the holes.
+
+`start_idx` is the first index of the latest run, so a resumed run asks for
+the same IDs even when they were allocated automatically.
+"""
+import json
+import os
+from pathlib import Path
+
+
+def manifest_path(out_file: Path) -> Path:
+    out_file = Path(out_file)
+    return out_file.with_name(out_file.name + ".manifest.json")
+
+
+def load_manifest(out_file: Path) -> tuple:
+    """(offset, {start_idx: (count, items_written)}, run start_idx or None) for `out_file`, without opening it."""
+    path = manifest_path(out_file)
+    if not path.exists():
+        return 0, {}, None
+    manifest = json.loads(path.read_text())
+    completed = {start_idx: (count, written) for start_idx, count, written in manifest.get("completed", [])}
+    return manifest.get("offset", 0), completed, manifest.get("start_idx")
+
+
+class CheckpointWriter:
+    """Append-only JSONL writer with a resumable manifest."""
+
+    def __init__(self, out_file: Path, resume: bool = False, append: bool = False, start_idx: int = None):
+        self.out_file = Path(out_file)
+        self.manifest_file = manifest_path(self.out_file)
+        self.completed = {}
+        self.offset = 0
+        self.start_idx = start_idx
+
+        if resume and self.manifest_file.exists():
+            self.offset, self.completed, _ = load_manifest(self.out_file)
+        elif append and self.out_file.exists():
+            # Keep what is there; the manifest only records this run's ranges.
+            self.offset = self.out_file.stat().st_size
+
+        self.out_file.parent.mkdir(parents=True, exist_ok=True)
+        # Open without truncating, then cut back to the last checkpoint (0 for a fresh run).
+        self._fh = open(self.out_file, "a+b")
+        self._fh.truncate(self.offset)
+        self._fh.seek(self.offset)
+        self._save_manifest()
+
+    @property
+    def items_written(self) -> int:
+        return sum(written for _, written in self.completed.values())
+
+    def append(self, start_idx: int, count: int, items: list, missing=()):
+        """Durably append one batch, then mark its range as completed.
+
+        `missing` are the indices of the range without an item (the others have
+        one each); they are left out of the recorded ranges.
+        """
+        data = "".join(json.dumps(item, ensure_ascii=False) + "\n" for item in items).encode("utf-8")
+        self._fh.write(data)
+        self._fh.flush()
+        os.fsync(self._fh.fileno())
+        self.offset += len(data)
+        if not missing:
+            self.completed[start_idx] = (count, len(items))
+        else:
+            missing, run = set(missing), None
+            for i in range(start_idx, start_idx + count):
+                if i in missing:
+                    run = None
+                elif run is None:
+                    run = i
+                    self.completed[run] = (1, 1)
+                else:
+                    n = self.completed[run][0] + 1
+                    self.completed[run] = (n, n)
+        self._save_manifest()
+
+    def _save_manifest(self):
+        manifest = {
+            "output": self.out_file.name,
+            "offset": self.offset,
+            "start_idx": self.start_idx,
+            "completed": [[idx, count, written] for idx, (count, written) in sorted(self.completed.items())],
+        }
+        tmp = self.manifest_file.with_name(self.manifest_file.name + ".tmp")
+        with open(tmp, "w") as f:
+            json.dump(manifest, f)
+            f.flush()
+            os.fsync(f.fileno())
+        os.replace(tmp, self.manifest_file)
+
+    def close(self):
+        self._fh.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
@@ -0,0 +1,149 @@
+#!/usr/bin/env python3
+"""
+SLE AI Companion — Coverage-driven generation planner
+
+The prompts ask for a mix of topic domains, a 60/40 full_simulation /
+quick_drill split and a mix of error categories, but a batch of ten items
+cannot be balanced on its own, so the seed files drift and get hand-trimmed.
+This module measures what is actually there and plans only what is missing:
+
+- load_coverage() counts the items of a type in data/sle/seed per
+  (language, level, facet...), where the facets are topic_domain and
+  duration_tag for scenarios, category for errors and topic_domain for model
+  answers;
+- targets() spreads a per-(language, level) total over the facet cells
+  (domains and categories evenly, durations by prompts.DURATION_SPLIT);
+- deficits() is target minus current count, per facet cell;
+- assign() turns the deficits into per-ID field values, interleaved so each
+  request gets a mix, which build_prompts() spells out in the request.
+
+Report only:
+  python3 scripts/sle/coverage.py --type scenarios --target 60
+"""
+import argparse
+import json
+from collections import Counter
+from pathlib import Path
+
+from metrics import METRICS_SUFFIX
+from near_dup import SEED_DIR
+from prompts import DURATION_SPLIT, ERROR_CATEGORIES, TOPIC_DOMAINS
+
+FACETS = {
+    "scenarios": ("topic_domain", "duration_tag"),
+    "errors": ("category",),
+    "model_answers": ("topic_domain",),
+}
+LEVEL_FIELD = {"scenarios": "target_level", "errors": "level_impact", "model_answers": "target_level"}
+
+
+def facet_weights(item_type: str, level: str) -> dict:
+    """Target share of each facet cell (a tuple of facet values) for one level."""
+    if item_type == "scenarios":
+        return {(domain, duration): share / len(TOPIC_DOMAINS)
+                for domain in TOPIC_DOMAINS for duration, share in DURATION_SPLIT[level].items()}
+    if item_type == "errors":
+        return {(category,): 1 / len(ERROR_CATEGORIES) for category in ERROR_CATEGORIES}
+    if item_type == "model_answers":
+        return {(domain,): 1 / len(TOPIC_DOMAINS) for domain in TOPIC_DOMAINS}
+    raise ValueError(f"Unknown type: {item_type}")
+
+
+def targets(item_type: str, level: str, total: int) -> dict:
+    """Split `total` over the facet cells by largest remainder, so the quotas add up exactly."""
+    weights = facet_weights(item_type, level)
+    exact = {facet: total * weight for facet, weight in weights.items()}
+    quotas = {facet: int(value) for facet, value in exact.items()}
+    by_remainder = sorted(weights, key=lambda facet: exact[facet] - quotas[facet], reverse=True)
+    for facet in by_remainder[:total - sum(quotas.values())]:
+        quotas[facet] += 1
+    return quotas
+
+
+def item_key(item_type: str, item: dict) -> tuple:
+    """(LANG, level, *facet values) of one item."""
+    language = str(item.get("language") or "").upper()
+    level = str(item.get(LEVEL_FIELD[item_type]) or "").upper()
+    return (language, level) + tuple(item.get(field) for field in FACETS[item_type])
+
+
+def coverage_files(item_type: str, dirs=(SEED_DIR,)) -> list:
+    paths = []
+    for root in dict.fromkeys(Path(d).resolve() for d in dirs):
+        paths += [p for p in sorted(root.glob(f"{item_type}_generated*.jsonl")) if not p.name.endswith(METRICS_SUFFIX)]
+    return paths
+
+
+def load_coverage(item_type: str, dirs=(SEED_DIR,)) -> Counter:
+    """Item counts per (LANG, level, *facets) over the generated seed files of `item_type`."""
+    counts = Counter()
+    for path in coverage_files(item_type, dirs):
+        with open(path, encoding="utf-8") as f:
+            for line in f:
+                try:
+                    item = json.loads(line)
+                except json.JSONDecodeError:
+                    continue
+                if isinstance(item, dict):
+                    counts[item_key(item_type, item)] += 1
+    return counts
+
+
+def deficits(item_type: str, lang: str, level: str, total: int, coverage: Counter) -> dict:
+    """Items still missing per facet cell to reach `total` for (lang, level); cells at or above target are left out."""
+    missing = {}
+    for facet, quota in targets(item_type, level, total).items():
+        short = quota - coverage[(lang, level) + facet]
+        if short > 0:
+            missing[facet] = short
+    return missing
+
+
+def assign(item_type: str, missing: dict, start_idx: int) -> dict:
+    """{ID number: {field: value}} covering `missing`, one facet cell per round so batches get a mix."""
+    remaining = dict(sorted(missing.items(), key=lambda kv: -kv[1]))
+    quotas = {}
+    n = start_idx
+    while remaining:
+        for facet in list(remaining):
+            quotas[n] = dict(zip(FACETS[item_type], facet))
+            n += 1
+            remaining[facet] -= 1
+            if not remaining[facet]:
+                del remaining[facet]
+    return quotas
+
+
+def print_report(item_type: str, lang: str, level: str, total: int, coverage: Counter):
+    """Have / target per facet cell for one (type, lang, level)."""
+    quotas = targets(item_type, level, total)
+    have = {facet: coverage[(lang, level) + facet] for facet in quotas}
+    short = sum(max(0, quotas[f] - have[f]) for f in quotas)
+    print(f"\n  {item_type}/{lang}/{level}: {sum(have.values())} items in target cells, "
+          f"target {total}, {short} missing")
+    header = " / ".join(FACETS[item_type])
+    print(f"  {header:<36} {'Have':>5} {'Target':>6}")
+    for facet, quota in quotas.items():
+        mark = "✓" if have[facet] >= quota else "·"
+        print(f"  {mark} {' / '.join(facet):<34} {have[facet]:>5} {quota:>6}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Seed file coverage per topic domain, duration and category")
+    parser.add_argument("--type", default="scenarios", choices=list(FACETS))
+    parser.add_argument("--langs", nargs="+", default=["FR", "EN"], choices=["FR", "EN"])
+    parser.add_argument("--levels", nargs="+", default=["A", "B", "C"], choices=["A", "B", "C"])
+    parser.add_argument("--target", type=int, default=60, help="Items wanted per (language, level)")
+    args = parser.parse_args()
+
+    coverage = load_coverage(args.type)
+    print(f"  {sum(coverage.values())} {args.type} in {len(coverage_files(args.type))} file(s)")
+    for lang in args.langs:
+        for level in args.levels:
+            if args.type == "model_answers" and level == "A":
+                continue
+            print_report(args.type, lang, level, args.target, coverage)
+
+
+if __name__ == "__main__":
+    main()
@@ -11,258 +11,830 @@ Usage:
   python3 scripts/sle/generate-dataset.py --type scenarios --lang FR --level B --count 20
   python3 scripts/sle/generate-dataset.py --type errors --count 50
   python3 scripts/sle/generate-dataset.py --type model_answers --lang FR --level C --count 30
+  python3 scripts/sle/generate-dataset.py --type scenarios --count 200 --concurrency 8
+  python3 scripts/sle/generate-dataset.py --type scenarios --count 200 --concurrency 8 --resume
+  python3 scripts/sle/generate-dataset.py --type scenarios --count 500 --mode batch
+  python3 scripts/sle/generate-dataset.py --type all --count 40 --concurrency 16
+  python3 scripts/sle/generate-dataset.py --type all --count 100 --concurrency 8 --adaptive
+  python3 scripts/sle/generate-dataset.py --type all --count 100 --mode batch --dry-run
+  python3 scripts/sle/generate-dataset.py --type scenarios --lang EN --level C --count 50 --append
+  python3 scripts/sle/generate-dataset.py --type all --target 60 --concurrency 8
+  python3 scripts/sle/generate-dataset.py --type model_answers --lang FR --level B --from-scenarios --count 100 --concurrency 8
+
+Unless --start-idx is given, each (type, lang, level) gets the next free ID
+range across every file under data/sle/seed (see id_index.py). With --target,
+--count is replaced by what coverage.py finds missing per topic domain,
+duration and error category, and each ID is told which values to use. With
+--from-scenarios, model answers are made for the unanswered questions of the
+existing scenarios and indexed by scenario_id (see scenario_answers.py).
 """
-import json
 import os
 import sys
 import uuid
 import argparse
+import asyncio
+import itertools
 import time
+from collections import Counter, deque
 from pathlib import Path
-from openai import OpenAI
 
-client = OpenAI()
+import batch_api
+from batch_sizing import DEFAULT_MAX_SIZE, DEFAULT_MIN_SIZE, DEFAULT_TARGET_LATENCY, BatchSizer
+from checkpoint import CheckpointWriter, load_manifest
+from coverage import assign, deficits, load_coverage
+from id_index import load_id_index
+from item_ids import IdTracker, describe_ids, format_id, id_number
+from json_stream import TruncatedResponse, parse_items, salvage_items
+from metrics import BatchMetrics, MetricsLog, estimate_cost, metrics_path, print_summary
+from prompts import build_prompts, estimate_batch_tokens, prompt_cache_key
+from rate_limit import (DEFAULT_RPM, DEFAULT_TPM, MAX_ATTEMPTS, RateLimiter, classify_error,
+                        estimate_tokens, should_retry)
+from response_cache import ResponseCache, add_cache_args, cache_from_args, cache_key
+from responses_api import call_model, call_model_async
+from scenario_answers import load_answer_index, open_questions
+from near_dup import generated_files, load_index
+from schema_validate import load_validator
+
 MODEL = "gpt-5"
+TEMPERATURE = 0.8
+# Rough output size per generated item, used to reserve tokens-per-minute budget.
+EXPECTED_TOKENS_PER_ITEM = 400
 
 SEED_DIR = Path(__file__).resolve().parent.parent.parent / "data" / "sle" / "seed"
-
-TOPIC_DOMAINS = ["HR", "Finance", "Operations", "Policy", "Service", "IT", "Leadership", "Environment", "Communications", "Diversity"]
-
-SCENARIO_SYSTEM_PROMPT = """You are an expert in Canadian federal public service Second Language Evaluation (SLE) oral exam preparation. You create realistic, pedagogically sound oral practice scenarios.
-
-RULES:
-1. Each scenario must be a valid JSON object matching the exact schema below.
-2. target_level determines complexity:
-   - A: Concrete, routine. Simple SVO syntax. Present tense. Basic workplace topics.
-   - B: Narration, facts. Passé composé vs imparfait. Relative clauses. Conditional simple. Concrete non-routine.
-   - C: Abstraction, nuance. Subjonctif, conditionnel passé. Diplomatic register. Friction (disagreements, ambiguity). Leadership competencies.
-3. B→C transition zone (~40% of B/C items): scenarios that push B-level candidates toward C-level demands.
-4. question_sequence must have 3-5 questions with probing follow-ups.
-5. expected_functions must use SLE-aligned functions: describe, narrate, explain, justify, hypothesize, negotiate, reframe, persuade, concede, compare.
-6. scoring_focus uses exactly these 5 criteria: grammar, vocabulary, fluency, pronunciation, comprehension.
-7. register_constraints for C-level MUST include {"pronoun": "vous", "tone": "diplomatic"}.
-8. Language must match the requested language (FR or EN).
-9. All content must be relevant to Canadian federal public service context.
-10. NO field should be empty or "unknown". If uncertain, provide best candidate and set needs_review: true.
-
-OUTPUT: Return a JSON array of scenario objects. Each object:
-{
-  "scenario_id": "SCN-{LANG}-{NNN}",
-  "language": "fr" or "en",
-  "target_level": "A", "B", or "C",
-  "topic_domain": one of [HR, Finance, Operations, Policy, Service, IT, Leadership, Environment, Communications, Diversity],
-  "duration_tag": "quick_drill" or "full_simulation",
-  "context_prompt": "Detailed context setting the scene...",
-  "examiner_role": "Role description for the AI examiner...",
-  "question_sequence": [
-    {"q": "Main question", "probing": ["Follow-up 1", "Follow-up 2"], "conditions": {"if_hesitant": "Simplified version"}}
-  ],
-  "expected_functions": ["narrate", "justify", ...],
-  "expected_vocabulary": ["term1", "term2", ...],
-  "register_constraints": {"pronoun": "vous/tu", "tone": "formal/semi-formal/diplomatic"},
-  "scoring_focus": ["grammar", "vocabulary", "fluency", "pronunciation", "comprehension"],
-  "tags": {"grammatical": ["conditionnel", ...], "functional": ["gestion_du_changement", ...]},
-  "needs_review": false
-}"""
-
-ERROR_SYSTEM_PROMPT = """You are an expert linguist specializing in common errors made by English-speaking Canadian public servants learning French (and vice versa for EN errors). You create detailed error taxonomy entries for an AI coaching system.
-
-RULES:
-1. Each error must be a valid JSON object.
-2. Categories: anglicism, syntax, conjugation, register, pronunciation, false_friend, agreement, preposition, article, vocabulary
-3. severity_level: 1 (minor) to 5 (critical communication breakdown)
-4. Include realistic examples from federal workplace context.
-5. correction_rule must be actionable and clear.
-6. criterion_affected uses exactly: grammar, vocabulary, fluency, pronunciation, comprehension.
-7. Level A errors: basic conjugation, gender agreement, basic false friends.
-8. Level B errors: passé composé/imparfait confusion, relative pronouns, conditional.
-9. Level C errors: subjunctive triggers, register violations, nuance/concession errors.
-
-OUTPUT: Return a JSON array of error objects:
-{
-  "id": "ERR-{LANG}-{NNN}",
-  "language": "fr" or "en",
-  "category": "anglicism|syntax|conjugation|register|pronunciation|false_friend|agreement|preposition|article|vocabulary",
-  "severity_level": 1-5,
-  "pattern": "The incorrect pattern (e.g., 'Je suis excité')",
-  "correction": "The correct form (e.g., 'Je suis enthousiaste')",
-  "correction_rule": "Explanation of why and how to correct...",
-  "feedback_text": "Coaching feedback in target language...",
-  "level_impact": "A", "B", or "C",
-  "criterion_affected": "grammar|vocabulary|fluency|pronunciation|comprehension",
-  "examples": [{"incorrect": "...", "correct": "...", "context": "..."}],
-  "tags": ["false_friend", "workplace", ...],
-  "needs_review": false
-}"""
-
-MODEL_ANSWER_SYSTEM_PROMPT = """You are an expert SLE oral exam coach. You create model answers that demonstrate the expected quality for each proficiency level. These serve as reference answers for the AI scoring system.
-
-RULES:
-1. Model answers must demonstrate the TARGET LEVEL's expected competencies.
-2. Level B answers: clear narration, appropriate past tenses, concrete explanations, some discourse markers.
-3. Level C answers: nuanced argumentation, subjunctive/conditional, diplomatic register, complex connectors, ability to handle friction.
-4. Include register variants: formal (for C) and semi-formal (for B).
-5. Each answer must reference a realistic scenario from Canadian federal public service.
-6. Scoring criteria alignment: show how the answer would score on grammar, vocabulary, fluency, pronunciation (noted), comprehension.
-
-OUTPUT: Return a JSON array of model answer objects:
-{
-  "id": "MA-{LANG}-{LEVEL}-{NNN}",
-  "scenario_id": "SCN-{LANG}-{NNN}",
-  "language": "fr" or "en",
-  "target_level": "B" or "C",
-  "topic_domain": "HR|Finance|Operations|Policy|Service|IT|Leadership",
-  "question": "The question being answered...",
-  "model_answer_formal": "Full model answer in formal register...",
-  "model_answer_semiformal": "Full model answer in semi-formal register...",
-  "key_structures": ["passé composé", "conditionnel", ...],
-  "key_vocabulary": ["term1", "term2", ...],
-  "discourse_markers_used": ["cependant", "en revanche", ...],
-  "scoring_notes": {
-    "grammar": "Note on grammar quality demonstrated...",
-    "vocabulary": "Note on vocabulary range...",
-    "fluency": "Note on expected fluency...",
-    "pronunciation": "Key pronunciation points...",
-    "comprehension": "How comprehension is demonstrated..."
-  },
-  "needs_review": false
-}"""
-
-
-def generate_batch(item_type: str, lang: str, level: str, count: int, start_idx: int) -> list:
-    """Generate a batch of items via GPT-5."""
-    
-    if item_type == "scenarios":
-        system_prompt = SCENARIO_SYSTEM_PROMPT
-        user_prompt = f"""Generate exactly {count} oral practice scenarios in {lang} for level {level}.
-
-Requirements:
-- Language: {"French" if lang == "FR" else "English"}
-- Target level: {level}
-- Mix of topic domains: {', '.join(TOPIC_DOMAINS)}
-- {"60% full_simulation, 40% quick_drill" if level != "A" else "50% full_simulation, 50% quick_drill"}
-- Scenario IDs: SCN-{lang}-{str(start_idx).zfill(3)} through SCN-{lang}-{str(start_idx + count - 1).zfill(3)}
-{"- B→C transition: include hypothetical elements, mild friction, some formal register expectations" if level == "B" else ""}
-{"- Must include: diplomatic friction, disagreement handling, policy negotiation, leadership competencies" if level == "C" else ""}
-
-Return ONLY a valid JSON array. No markdown, no explanation."""
-
-    elif item_type == "errors":
-        system_prompt = ERROR_SYSTEM_PROMPT
-        level_desc = {
-            "A": "basic errors (conjugation, gender, basic false friends, simple prepositions)",
-            "B": "intermediate errors (PC/imparfait, relative pronouns, conditional, register shifts)",
-            "C": "advanced errors (subjunctive triggers, register violations, nuance, concession structures)"
-        }
-        user_prompt = f"""Generate exactly {count} error taxonomy entries for {lang} learners at level {level}.
-
-Focus on: {level_desc.get(level, level_desc["B"])}
-Error IDs: ERR-{lang}-{str(start_idx).zfill(3)} through ERR-{lang}-{str(start_idx + count - 1).zfill(3)}
-Mix categories: anglicism, syntax, conjugation, register, pronunciation, false_friend, agreement, preposition, article, vocabulary
-
-Return ONLY a valid JSON array. No markdown, no explanation."""
-
-    elif item_type == "model_answers":
-        system_prompt = MODEL_ANSWER_SYSTEM_PROMPT
-        user_prompt = f"""Generate exactly {count} model answers in {lang} for level {level}.
-
-Requirements:
-- Language: {"French" if lang == "FR" else "English"}
-- Target level: {level}
-- Answer IDs: MA-{lang}-{level}-{str(start_idx).zfill(3)} through MA-{lang}-{level}-{str(start_idx + count - 1).zfill(3)}
-- Mix of topic domains
-- Include both formal and semi-formal register variants
-{"- Demonstrate: clear narration, appropriate tenses, concrete explanations" if level == "B" else ""}
-{"- Demonstrate: nuanced argumentation, subjunctive, diplomatic register, complex connectors" if level == "C" else ""}
-
-Return ONLY a valid JSON array. No markdown, no explanation."""
-    else:
-        raise ValueError(f"Unknown type: {item_type}")
-
-    for attempt in range(3):
+BATCH_DIR = Path(__file__).resolve().parent.parent.parent / ".cache" / "sle-batches"
+
+ITEM_TYPES = ["scenarios", "errors", "model_answers"]
+LANGS = ["FR", "EN"]
+LEVELS = ["A", "B", "C"]
+
+# Built on first use, so --help and --dry-run neither import the SDK nor need an API key.
+client = None
+
+
+def get_client():
+    """The shared OpenAI client; retries are handled by our own RateLimiter/backoff, not the SDK."""
+    global client
+    if client is None:
+        from openai import OpenAI
+        client = OpenAI(max_retries=0)
+    return client
+
+
+def report_failure(e: Exception, start_idx: int, attempt: int) -> str:
+    """Log a failed attempt and return its error class."""
+    error_class = classify_error(e)
+    label = "JSON parse error" if error_class == "parse" else "API error"
+    print(f"  ⚠ {label} idx {start_idx} [{error_class}] (attempt {attempt+1}/{MAX_ATTEMPTS}): {e}", file=sys.stderr)
+    return error_class
+
+
+def cached_items(cache: ResponseCache, key: str):
+    """Items from a cached response, or None on a miss."""
+    if cache is None:
+        return None
+    text = cache.get(key)
+    return parse_items(text) if text is not None else None
+
+
+class GenerationContext:
+    """Per-run settings and shared services passed to every batch."""
+
+    def __init__(self, limiter: RateLimiter = None, cache: ResponseCache = None, stream: bool = False,
+                 validate: bool = True, dedup: bool = True, sizing: dict = None):
+        self.limiter = limiter or RateLimiter()
+        self.cache = cache
+        self.stream = stream
+        self.validate = validate
+        self.dedup = dedup
+        self.tokens = Counter()  # usage per (type, lang, level)
+        self.metrics = {}  # MetricsLog per (type, lang, level)
+        self.sizing = sizing  # BatchSizer settings, or None for fixed batch sizes
+        self.sizers = {}
+        self.quotas = {}  # {ID number: field values} per (type, lang, level), with --target
+        self.links = {}  # {ID number: scenario question} per (type, lang, level), with --from-scenarios
+        self.out_dirs = [SEED_DIR]  # directories of existing items for the near-duplicate index
+        self._validators = {}
+        self._dedup_indexes = {}
+
+    def validator(self, item_type: str):
+        """Schema validator for `item_type`, compiled once per run (None if unavailable)."""
+        if item_type not in self._validators:
+            self._validators[item_type] = load_validator(item_type, self.validate)
+        return self._validators[item_type]
+
+    def dedup_index(self, item_type: str):
+        """Near-duplicate index for `item_type`, built once per run from the out_dirs (None if off)."""
+        if item_type not in self._dedup_indexes:
+            self._dedup_indexes[item_type] = load_index(item_type, self.dedup,
+                                                        generated_files(item_type, self.out_dirs))
+        return self._dedup_indexes[item_type]
+
+    def sizer(self, item_type: str, level: str):
+        """Adaptive batch size controller for (type, level), or None with fixed sizes."""
+        if self.sizing is None:
+            return None
+        if (item_type, level) not in self.sizers:
+            self.sizers[(item_type, level)] = BatchSizer(**self.sizing)
+        return self.sizers[(item_type, level)]
+
+    def log_metrics(self, cell: tuple, metrics: BatchMetrics, items: int):
+        log = self.metrics.get(cell)
+        if log is not None:
+            log.write(metrics, items)
+
+
+def record_result(ctx: GenerationContext, key: str, estimated: int, result: tuple, tracker: IdTracker,
+                  requested: list, cell: tuple) -> int:
+    """Book-keep one successful call; returns how many new requested IDs it delivered."""
+    got, text, complete, usage = result
+    tokens = usage.total if usage is not None else estimated
+    ctx.limiter.record_usage(estimated, tokens)
+    ctx.tokens[cell] += tokens
+    if complete and ctx.cache is not None:
+        ctx.cache.put(key, MODEL, text)
+    kept = tracker.add(got)
+    report_progress(tracker, requested, kept, complete)
+    return kept
+
+
+def report_progress(tracker: IdTracker, requested: list, kept: int, complete: bool):
+    """Warn when a response left requested IDs missing."""
+    if not tracker.missing:
+        return
+    reason = "truncated" if not complete else "incomplete"
+    print(f"  ⚠ {reason.capitalize()} response idx {requested[0]}: {kept}/{len(requested)} requested IDs kept "
+          f"({tracker.invalid} schema-invalid, {tracker.duplicates} near-duplicate so far), "
+          f"re-requesting {len(tracker.missing)} missing", file=sys.stderr)
+
+
+class BatchRequests:
+    """The request loop of one batch, shared by generate_batch() and generate_batch_async().
+
+    next_request() picks the IDs to ask for next (serving cached responses
+    itself) and returns the call to make, or None when the batch is done. The
+    caller acquires the rate limiter, calls the model and reports the outcome
+    to on_result() or on_failure(); finish() logs the batch and returns its items.
+    """
+
+    def __init__(self, ctx: GenerationContext, item_type: str, lang: str, level: str, count: int, start_idx: int,
+                 tracker: IdTracker = None, metrics: BatchMetrics = None):
+        self.ctx = ctx
+        self.cell = (item_type, lang, level)
+        self.count = count
+        self.start_idx = start_idx
+        self.links = ctx.links.get(self.cell)
+        self.quotas = ctx.quotas.get(self.cell)
+        self.tracker = tracker or IdTracker(item_type, start_idx, count, ctx.validator(item_type),
+                                            ctx.dedup_index(item_type), self.links)
+        self.metrics = metrics or BatchMetrics(item_type, lang, level, start_idx, count)
+        self.sizer = ctx.sizer(item_type, level)
+        self.attempt = 0
+        self.gave_up = False
+        self.stale = set()
+        self.requested = self.system_prompt = self.key = self.estimated = None
+
+    def next_request(self):
+        """(system prompt, user prompt, estimated tokens) of the next call, or None when done."""
+        item_type, lang, level = self.cell
+        while self.tracker.missing and self.attempt < MAX_ATTEMPTS and not self.gave_up:
+            # With adaptive sizing, re-request at most the current size at once.
+            missing = self.tracker.missing
+            requested = missing[:self.sizer.size] if self.sizer is not None else missing
+            system_prompt, user_prompt = build_prompts(item_type, lang, level, len(requested), requested[0],
+                                                       requested, self.quotas, self.links)
+            key = cache_key(MODEL, system_prompt, user_prompt, TEMPERATURE)
+            cached = cached_items(self.ctx.cache, key) if key not in self.stale else None
+            if cached is not None:
+                self.metrics.cache_hit()
+                if not self.tracker.add(cached):
+                    # Everything in it was rejected (e.g. as a near-duplicate);
+                    # serving it again cannot help, so ask the API instead.
+                    self.stale.add(key)
+                continue
+            self.requested, self.system_prompt, self.key = requested, system_prompt, key
+            self.estimated = estimate_tokens(system_prompt, user_prompt,
+                                             expected_output=len(requested) * EXPECTED_TOKENS_PER_ITEM)
+            return system_prompt, user_prompt, self.estimated
+        return None
+
+    def on_result(self, result: tuple, seconds: float):
+        self.metrics.request(seconds, self.system_prompt, result[3])
+        if self.sizer is not None:
+            self.sizer.record(len(self.requested), result[2], seconds)
+        if not record_result(self.ctx, self.key, self.estimated, result, self.tracker, self.requested, self.cell):
+            self.attempt += 1
+
+    def on_failure(self, e: Exception, seconds: float):
+        """Book-keep a failed call; returns the seconds to wait before retrying, or None to give up."""
+        self.metrics.request(seconds, self.system_prompt, failed=True)
+        error_class = report_failure(e, self.requested[0], self.attempt)
+        if self.sizer is not None:
+            self.sizer.record_failure(error_class)
+        if not should_retry(error_class, self.attempt):
+            self.gave_up = True
+            return None
+        delay = self.ctx.limiter.delay_for(e, self.attempt)
+        self.attempt += 1
+        return delay
+
+    def finish(self) -> list:
+        if self.tracker.missing:
+            print(f"  ✗ Batch idx {self.start_idx}: {len(self.tracker.missing)}/{self.count} IDs still missing "
+                  f"after {self.attempt} failed attempts", file=sys.stderr)
+        items = self.tracker.items()
+        self.ctx.log_metrics(self.cell, self.metrics, len(items))
+        return items
+
+
+def generate_batch(item_type: str, lang: str, level: str, count: int, start_idx: int,
+                   ctx: GenerationContext = None, tracker: IdTracker = None, metrics: BatchMetrics = None) -> list:
+    """Generate a batch of items via GPT-5.
+
+    Returned IDs are checked against start_idx..start_idx+count-1 and each
+    item against its JSON schema: valid items are kept (also from a truncated
+    stream) and a smaller follow-up request is sent for the IDs that are still
+    missing or were rejected. Pass `tracker` and `metrics` to only fill in
+    what an earlier stage (e.g. the Batch API) left missing.
+    """
+    ctx = ctx or GenerationContext()
+    batch = BatchRequests(ctx, item_type, lang, level, count, start_idx, tracker, metrics)
+    while True:
+        request = batch.next_request()
+        if request is None:
+            return batch.finish()
+        system_prompt, user_prompt, estimated = request
+        ctx.limiter.acquire(estimated)
+        started = time.monotonic()
+        try:
+            result = call_model(get_client(), MODEL, TEMPERATURE, system_prompt, user_prompt, ctx.stream,
+                                prompt_cache_key(item_type, lang, level))
+        except Exception as e:
+            delay = batch.on_failure(e, time.monotonic() - started)
+            if delay is not None:
+                time.sleep(delay)
+            continue
+        batch.on_result(result, time.monotonic() - started)
+
+
+async def generate_batch_async(async_client, semaphore: asyncio.Semaphore, ctx: GenerationContext,
+                               item_type: str, lang: str, level: str, count: int, start_idx: int) -> list:
+    """Async variant of generate_batch(); at most `semaphore` calls are in flight."""
+    batch = BatchRequests(ctx, item_type, lang, level, count, start_idx)
+    while True:
+        request = batch.next_request()
+        if request is None:
+            return batch.finish()
+        system_prompt, user_prompt, estimated = request
+        await ctx.limiter.acquire_async(estimated)
         try:
-            response = client.responses.create(
-                model=MODEL,
-                input=[
-                    {"role": "system", "content": system_prompt},
-                    {"role": "user", "content": user_prompt}
-                ],
-                temperature=0.8,
-            )
-            
-            text = response.output_text.strip()
-            # Strip markdown code fences if present
-            if text.startswith("```"):
-                text = text.split("\n", 1)[1]
-                if text.endswith("```"):
-                    text = text.rsplit("```", 1)[0]
-                text = text.strip()
-            
-            items = json.loads(text)
-            if isinstance(items, list):
-                return items
-            elif isinstance(items, dict) and any(isinstance(v, list) for v in items.values()):
-                # Sometimes GPT wraps in an object
-                for v in items.values():
-                    if isinstance(v, list):
-                        return v
-            return [items]
-        except json.JSONDecodeError as e:
-            print(f"  ⚠ JSON parse error (attempt {attempt+1}/3): {e}", file=sys.stderr)
-            if attempt < 2:
-                time.sleep(2)
+            async with semaphore:
+                started = time.monotonic()
+                result = await call_model_async(async_client, MODEL, TEMPERATURE, system_prompt, user_prompt,
+                                                ctx.stream, prompt_cache_key(item_type, lang, level))
         except Exception as e:
-            print(f"  ⚠ API error (attempt {attempt+1}/3): {e}", file=sys.stderr)
-            if attempt < 2:
-                time.sleep(5)
-    
-    print(f"  ✗ Failed after 3 attempts", file=sys.stderr)
-    return []
+            delay = batch.on_failure(e, time.monotonic() - started)
+            if delay is not None:
+                await asyncio.sleep(delay)
+            continue
+        batch.on_result(result, time.monotonic() - started)
+
+
+def todo_indices(completed: dict, start_idx: int, count: int) -> list:
+    """Indices of start_idx..start_idx+count-1 that no range of a manifest's `completed` covers.
+
+    Ranges count whatever batch size wrote them, so --resume may change --batch-size.
+    """
+    covered = {i for s, (n, _) in completed.items() for i in range(s, s + n)}
+    return [i for i in range(start_idx, start_idx + count) if i not in covered]
+
+
+def plan_ranges(indices: list, batch_size: int) -> list:
+    """Split sorted indices into (start_idx, batch_count) ranges of consecutive indices."""
+    batches = []
+    for i in indices:
+        if batches and batches[-1][0] + batches[-1][1] == i and batches[-1][1] < batch_size:
+            batches[-1] = (batches[-1][0], batches[-1][1] + 1)
+        else:
+            batches.append((i, 1))
+    return batches
+
+
+def write_batch(writer: CheckpointWriter, idx: int, batch_count: int, items: list, missing=()):
+    """Checkpoint a finished batch; its `missing` IDs (all of a failed batch) stay pending for --resume."""
+    if items:
+        writer.append(idx, batch_count, items, missing)
+    print(f"  ✓ Batch idx {idx}-{idx+batch_count-1}: got {len(items)} items (total: {writer.items_written})")
+
+
+class Cell:
+    """One (type, lang, level) output file and the batches still to generate for it."""
+
+    def __init__(self, item_type: str, lang: str, level: str, count: int, batch_size: int, start_idx: int,
+                 resume: bool = False, out_dir: Path = SEED_DIR, append: bool = False):
+        self.item_type = item_type
+        self.lang = lang
+        self.level = level
+        self.count = count
+        self.start_idx = start_idx
+        self.out_file = output_file(item_type, lang, level, out_dir)
+        self.writer = CheckpointWriter(self.out_file, resume=resume, append=append, start_idx=start_idx)
+        self.todo = todo_indices(self.writer.completed, start_idx, count)
+        # Fixed-size runs generate these; adaptive runs take ranges from todo instead.
+        self.pending = plan_ranges(self.todo, batch_size)
+        self.in_flight = 0
+        self.failed = 0
+        self.seconds = None
+
+    @property
+    def key(self) -> tuple:
+        return self.item_type, self.lang, self.level
+
+    @property
+    def label(self) -> str:
+        return f"{self.item_type}/{self.lang}/{self.level}"
+
+    def next_range(self, size: int):
+        """Take up to `size` consecutive indices still to generate; (idx, n) or None."""
+        if not self.todo:
+            return None
+        idx, n = self.todo[0], 1
+        while n < min(size, len(self.todo)) and self.todo[n] == idx + n:
+            n += 1
+        del self.todo[:n]
+        return idx, n
+
+    def write(self, idx: int, batch_count: int, items: list):
+        if len(items) < batch_count:
+            self.failed += 1
+        missing = set(range(idx, idx + batch_count)) - {id_number(self.item_type, item) for item in items}
+        write_batch(self.writer, idx, batch_count, items, missing)
+
+
+def output_file(item_type: str, lang: str, level: str, out_dir: Path = SEED_DIR) -> Path:
+    """Seed file for one cell; error taxonomies are per language only."""
+    suffix = f"_{lang.lower()}_{level.lower()}" if item_type != "errors" else f"_{lang.lower()}"
+    return Path(out_dir) / f"{item_type}_generated{suffix}.jsonl"
+
+
+def plan_cells(item_type: str, lang: str, level: str) -> list:
+    """Expand --type/--lang/--level into (type, lang, level) cells.
+
+    `all` covers every type, language and level. Model answers are only
+    defined for B and C, and errors are written to one file per language,
+    so they are generated once per language at the requested level.
+    """
+    if item_type != "all":
+        return [(item_type, lang, level)]
+    cells = []
+    for t in ITEM_TYPES:
+        for l in LANGS:
+            for lv in LEVELS:
+                if t == "model_answers" and lv == "A":
+                    continue
+                if t == "errors" and lv != level:
+                    continue
+                cells.append((t, l, lv))
+    return cells
+
+
+async def generate_concurrent(cells: list, concurrency: int, ctx: GenerationContext, started: float):
+    """Run the batches of all cells concurrently, appending each cell's results in index order.
+
+    Each cell starts at most 2 * concurrency batches ahead of the next one to
+    write, so one slow batch holds back a bounded number of finished results.
+    """
+    from openai import AsyncOpenAI
+
+    async_client = AsyncOpenAI(max_retries=0)
+    semaphore = asyncio.Semaphore(concurrency)
+    window = 2 * concurrency
+
+    async def run_cell(cell: Cell):
+        batches = iter(cell.pending)
+        tasks = deque()
+
+        def start_next():
+            batch = next(batches, None)
+            if batch is not None:
+                idx, n = batch
+                tasks.append((idx, n, asyncio.create_task(
+                    generate_batch_async(async_client, semaphore, ctx, cell.item_type, cell.lang, cell.level,
+                                         n, idx))))
+
+        for _ in range(window):
+            start_next()
+        try:
+            # Awaiting in plan order keeps the output deterministic while each
+            # batch is still written as soon as everything before it is done.
+            while tasks:
+                idx, batch_count, task = tasks.popleft()
+                items = await task
+                start_next()
+                cell.write(idx, batch_count, items)
+        finally:
+            for _, _, task in tasks:
+                task.cancel()
+        cell.seconds = time.monotonic() - started
+
+    try:
+        await asyncio.gather(*(run_cell(cell) for cell in cells))
+    finally:
+        await async_client.close()
+
+
+async def generate_adaptive(cells: list, concurrency: int, ctx: GenerationContext, started: float):
+    """Run all cells with batch sizes chosen per (type, level) by ctx.sizer().
+
+    `concurrency` workers take the next range from the cells in turn, sized by
+    the controller at that moment, and checkpoint each batch as it finishes.
+    """
+    from openai import AsyncOpenAI
+
+    async_client = AsyncOpenAI(max_retries=0)
+    semaphore = asyncio.Semaphore(concurrency)
+    turn = itertools.count()
+
+    def next_batch():
+        open_cells = [cell for cell in cells if cell.todo]
+        if not open_cells:
+            return None
+        cell = open_cells[next(turn) % len(open_cells)]
+        return cell, cell.next_range(ctx.sizer(cell.item_type, cell.level).size)
+
+    async def worker():
+        while True:
+            job = next_batch()
+            if job is None:
+                return
+            cell, (idx, n) = job
+            cell.in_flight += 1
+            try:
+                items = await generate_batch_async(async_client, semaphore, ctx, cell.item_type, cell.lang,
+                                                   cell.level, n, idx)
+            finally:
+                cell.in_flight -= 1
+            cell.write(idx, n, items)
+            if not cell.todo and not cell.in_flight:
+                cell.seconds = time.monotonic() - started
+
+    try:
+        await asyncio.gather(*(worker() for _ in range(concurrency)))
+    finally:
+        await async_client.close()
+
+
+def generate_via_batch_api(cells: list, ctx: GenerationContext, poll_interval: float, started: float,
+                           batch_id: str = None):
+    """Submit the batches of all cells as one Batch API job, then demultiplex results per cell.
+
+    Cached batches are not submitted again. IDs missing or invalid in the
+    batch results are filled in with small synchronous follow-up requests.
+    """
+    trackers = {}
+    batch_metrics = {}
+    requests = []
+    for cell in cells:
+        for idx, n in cell.pending:
+            tracker = IdTracker(cell.item_type, idx, n, ctx.validator(cell.item_type),
+                                ctx.dedup_index(cell.item_type), ctx.links.get(cell.key))
+            trackers[(cell.key, idx)] = tracker
+            batch_metrics[(cell.key, idx)] = BatchMetrics(cell.item_type, cell.lang, cell.level, idx, n)
+            system_prompt, user_prompt = build_prompts(cell.item_type, cell.lang, cell.level, n, idx, None,
+                                                       ctx.quotas.get(cell.key), ctx.links.get(cell.key))
+            cached = cached_items(ctx.cache, cache_key(MODEL, system_prompt, user_prompt, TEMPERATURE))
+            if cached is not None:
+                batch_metrics[(cell.key, idx)].cache_hit()
+                tracker.add(cached)
+            else:
+                custom_id = batch_api.make_custom_id(cell.item_type, cell.lang, cell.level, idx, n)
+                requests.append((custom_id, system_prompt, user_prompt))
+
+    results = {}
+    if requests or batch_id:
+        if batch_id is None:
+            name = cells[0].out_file.stem if len(cells) == 1 else "all_generated"
+            input_path = BATCH_DIR / f"{name}_{time.strftime('%Y%m%d_%H%M%S')}.jsonl"
+            batch_api.write_batch_input(input_path, requests, MODEL, TEMPERATURE)
+            batch_id = batch_api.submit_batch(get_client(), input_path, {"output": name})
+            print(f"  ⇪ Submitted {len(requests)} requests as batch {batch_id} ({input_path})")
+            print(f"    Re-attach later with: --mode batch --batch-id {batch_id}")
+        batch = batch_api.wait_for_batch(get_client(), batch_id, poll_interval)
+        results = batch_api.download_results(get_client(), batch)
+
+    prompts = {custom_id: (system_prompt, user_prompt) for custom_id, system_prompt, user_prompt in requests}
+    unplanned = []
+    for custom_id, (text, usage) in results.items():
+        item_type, lang, level, idx, n = batch_api.parse_custom_id(custom_id)
+        tracker = trackers.get(((item_type, lang, level), idx))
+        if usage is not None:
+            ctx.tokens[(item_type, lang, level)] += usage.total
+        if tracker is None:
+            unplanned.append(custom_id)
+            continue
+        system_prompt = prompts[custom_id][0] if custom_id in prompts else ""
+        batch_metrics[((item_type, lang, level), idx)].request(0.0, system_prompt, usage, failed=text is None)
+        if text is None:
+            continue
+        try:
+            items, complete = salvage_items(text)
+        except TruncatedResponse as e:
+            print(f"  ⚠ JSON parse error in batch result {custom_id}: {e}", file=sys.stderr)
+            continue
+        tracker.add(items)
+        if not complete:
+            print(f"  ⚠ Batch result {custom_id} was cut off: kept {len(items)} complete items", file=sys.stderr)
+        elif ctx.cache is not None and custom_id in prompts:
+            ctx.cache.put(cache_key(MODEL, *prompts[custom_id], TEMPERATURE), MODEL, text)
+    if unplanned:
+        # Re-attaching with --batch-id rebuilds the plan from the command line, so
+        # other --type/--lang/--level/--count/--batch-size/--start-idx values miss them.
+        print(f"  ⚠ {len(unplanned)}/{len(results)} batch results are not in this run's plan and were not written "
+              f"(e.g. {unplanned[0]}): already written, or submitted with other options", file=sys.stderr)
+
+    for cell in cells:
+        for idx, n in cell.pending:
+            tracker, metrics = trackers[(cell.key, idx)], batch_metrics[(cell.key, idx)]
+            if tracker.missing:
+                print(f"  ↻ {cell.label} idx {idx}-{idx+n-1}: following up on {len(tracker.missing)} missing IDs")
+                generate_batch(cell.item_type, cell.lang, cell.level, n, idx, ctx, tracker, metrics)
+            else:
+                ctx.log_metrics(cell.key, metrics, len(tracker.items()))
+            cell.write(idx, n, tracker.items())
+        cell.seconds = time.monotonic() - started
+
+
+def print_cell_table(cells: list, ctx: GenerationContext):
+    """One summary row per cell: items, failed batches, tokens and wall time."""
+    print(f"\n  {'Cell':<28} {'Items':>9} {'Failed':>6} {'Tokens':>10} {'Wall':>8}")
+    print(f"  {'─' * 28} {'─' * 9} {'─' * 6} {'─' * 10} {'─' * 8}")
+    for cell in cells:
+        wall = f"{cell.seconds:.1f}s" if cell.seconds is not None else "—"
+        items = f"{cell.writer.items_written}/{cell.count}"
+        print(f"  {cell.label:<28} {items:>9} {cell.failed:>6} {ctx.tokens[cell.key]:>10,} {wall:>8}")
+
+
+def plan_starts(cell_keys: list, counts: dict, args) -> dict:
+    """First ID number per cell: the resumed run's, --start-idx, or the next free range in the seed files."""
+    index = load_id_index([SEED_DIR, args.out_dir])
+    # Outputs that are about to be rewritten give their IDs back.
+    rewritten = [] if args.append else [output_file(*key, args.out_dir) for key in cell_keys]
+    starts = {}
+    for key in cell_keys:
+        resumed = load_manifest(output_file(*key, args.out_dir))[2] if args.resume else None
+        if resumed is not None or args.start_idx is not None:
+            starts[key] = resumed if resumed is not None else args.start_idx
+            taken = index.reserve(*key, starts[key], counts[key], rewritten)
+            if taken and resumed is None:
+                print(f"  ⚠ {'/'.join(key)}: {len(taken)} of the requested IDs are already used "
+                      f"({', '.join(format_id(*key, n) for n in taken[:3])}{', ...' if len(taken) > 3 else ''})",
+                      file=sys.stderr)
+        else:
+            starts[key] = index.allocate(*key, counts[key], rewritten)
+    print(f"  ID index: {index.summary()}")
+    return starts
+
+
+def plan_targets(cell_keys: list, target: int, dirs: list) -> dict:
+    """--target: items missing per cell and the facet cells they fall in, from the current seed files."""
+    coverage = {t: load_coverage(t, dirs) for t in dict.fromkeys(t for t, _, _ in cell_keys)}
+    return {key: deficits(*key, target, coverage[key[0]]) for key in cell_keys}
+
+
+def print_coverage(cell_keys: list, target: int, dirs: list):
+    """Per-cell coverage against --target after a run."""
+    missing = plan_targets(cell_keys, target, dirs)
+    for key in cell_keys:
+        short = sum(missing[key].values())
+        mark = "✓" if not short else "⚠"
+        print(f"  {mark} Coverage {'/'.join(key)}: {target - short}/{target} of target"
+              + (f", {short} still missing in {len(missing[key])} cells" if short else ""))
+
+
+def print_plan(cell_keys: list, counts: dict, starts: dict, args, quotas: dict = None, links: dict = None):
+    """--dry-run: every batch with its IDs and estimated tokens; no output file or API is touched."""
+    totals = Counter()
+    for item_type, lang, level in cell_keys:
+        out_file = output_file(item_type, lang, level, args.out_dir)
+        completed = load_manifest(out_file)[1] if args.resume else {}
+        print(f"\n  {item_type}/{lang}/{level} → {out_file}{' (append)' if args.append else ''}")
+        key = (item_type, lang, level)
+        # The same plan as Cell's: --resume skips every index already written.
+        todo = todo_indices(completed, starts[key], counts[key])
+        done = counts[key] - len(todo)
+        if done:
+            print(f"    ↻ {done}/{counts[key]} IDs already done")
+        for idx, n in plan_ranges(todo, args.batch_size):
+            ids = describe_ids(item_type, lang, level, range(idx, idx + n))
+            input_tokens, output_tokens = estimate_batch_tokens(item_type, lang, level, n, idx,
+                                                                EXPECTED_TOKENS_PER_ITEM, (quotas or {}).get(key),
+                                                                (links or {}).get(key))
+            print(f"    · {ids}  ~{input_tokens:,} in / {output_tokens:,} out")
+            totals.update(batches=1, items=n, input=input_tokens, output=output_tokens)
+
+    cost = estimate_cost(MODEL, totals["input"], totals["output"], batch_api=args.mode == "batch")
+    print(f"\n  Plan: {totals['batches']} batches, {totals['items']} items, "
+          f"~{totals['input']:,} input + {totals['output']:,} output tokens"
+          + (f" ≈ ${cost:,.2f} ({MODEL}{', Batch API' if args.mode == 'batch' else ''})" if cost is not None else ""))
+    print(f"  Estimates exclude retries and follow-ups"
+          + ("; --adaptive will resize batches from the first one" if args.adaptive else "") + ".")
+    print(f"  Dry run: no requests sent, no outputs written.")
 
 
 def main():
     parser = argparse.ArgumentParser(description="SLE Dataset Generator")
-    parser.add_argument("--type", required=True, choices=["scenarios", "errors", "model_answers", "all"])
-    parser.add_argument("--lang", default="FR", choices=["FR", "EN"])
-    parser.add_argument("--level", default="B", choices=["A", "B", "C"])
-    parser.add_argument("--count", type=int, default=20)
-    parser.add_argument("--batch-size", type=int, default=10)
-    parser.add_argument("--start-idx", type=int, default=1)
+    parser.add_argument("--type", required=True, choices=ITEM_TYPES + ["all"],
+                        help="Item type; 'all' covers every type, language and level")
+    parser.add_argument("--lang", default="FR", choices=LANGS)
+    parser.add_argument("--level", default="B", choices=LEVELS)
+    parser.add_argument("--count", type=int, default=20, help="Items per (type, lang, level)")
+    parser.add_argument("--target", type=int,
+                        help="Top each (type, lang, level) up to this many items, generating only the topic domain / "
+                             "duration / category cells below their share (appends; replaces --count)")
+    parser.add_argument("--from-scenarios", action="store_true",
+                        help="Model answers for the unanswered questions of the existing scenarios, up to --count "
+                             "per (lang, level), linked by scenario_id (appends)")
+    parser.add_argument("--batch-size", type=int, default=10,
+                        help="Items per request (the starting size with --adaptive)")
+    parser.add_argument("--adaptive", action="store_true",
+                        help="Grow/shrink the batch size per (type, level) from truncations, parse errors and latency")
+    parser.add_argument("--min-batch-size", type=int, default=DEFAULT_MIN_SIZE, help="Lower bound for --adaptive")
+    parser.add_argument("--max-batch-size", type=int, default=DEFAULT_MAX_SIZE, help="Upper bound for --adaptive")
+    parser.add_argument("--target-latency", type=float, default=DEFAULT_TARGET_LATENCY,
+                        help="With --adaptive, shrink batches whose request takes longer than this (seconds)")
+    parser.add_argument("--start-idx", type=int,
+                        help="First ID number (default: the next free number across data/sle/seed)")
+    parser.add_argument("--out-dir", type=Path, default=SEED_DIR,
+                        help="Directory for the generated files (default: data/sle/seed)")
+    parser.add_argument("--concurrency", type=int, default=1,
+                        help="Number of batches in flight at once (1 = sequential)")
+    parser.add_argument("--rpm", type=int, default=DEFAULT_RPM, help="Requests-per-minute budget")
+    parser.add_argument("--tpm", type=int, default=DEFAULT_TPM, help="Tokens-per-minute budget")
+    parser.add_argument("--resume", action="store_true",
+                        help="Keep the existing output and skip index ranges already recorded in its manifest")
+    parser.add_argument("--append", action="store_true",
+                        help="Add to the existing output files instead of overwriting them")
+    parser.add_argument("--stream", action="store_true",
+                        help="Stream responses and keep complete items from truncated outputs")
+    parser.add_argument("--no-validate", action="store_true",
+                        help="Skip in-process JSON Schema validation of generated items")
+    parser.add_argument("--no-dedup", action="store_true",
+                        help="Keep near-duplicates of items already in the seed files")
+    parser.add_argument("--mode", default="sync", choices=["sync", "batch"],
+                        help="sync: one API call per batch; batch: submit everything as one Batch API job")
+    parser.add_argument("--batch-id", help="With --mode batch: re-attach to an already submitted batch")
+    parser.add_argument("--poll-interval", type=float, default=30.0, help="Seconds between Batch API status polls")
+    parser.add_argument("--dry-run", action="store_true",
+                        help="Print the batch plan, ID ranges and estimated token cost without calling the API")
+    add_cache_args(parser)
     args = parser.parse_args()
-
+    if args.adaptive and args.mode == "batch":
+        parser.error("--adaptive needs per-request feedback and cannot be combined with --mode batch")
+    if args.target is not None and args.resume:
+        parser.error("--target re-plans from the seed files on every run; re-run it instead of using --resume")
+    if args.from_scenarios:
+        if args.type != "model_answers" or args.level == "A":
+            parser.error("--from-scenarios needs --type model_answers and --level B or C")
+        if args.resume or args.target is not None:
+            parser.error("--from-scenarios picks the unanswered questions on every run; re-run it instead of "
+                         "using --resume or --target")
+
+    cell_keys = plan_cells(args.type, args.lang, args.level)
+    lang = args.lang if args.type != "all" else "*"
+    level = args.level if args.type != "all" else "*"
+    count = args.target if args.target is not None else args.count
     print(f"╔══════════════════════════════════════════════════════════════╗")
     print(f"║  SLE Dataset Generator — {args.type.upper():30s}  ║")
-    print(f"║  Lang: {args.lang}  Level: {args.level}  Count: {args.count:4d}  Batch: {args.batch_size:3d}       ║")
+    print(f"║  Lang: {lang:2s}  Level: {level}  Count: {count:4d}  Batch: {args.batch_size:3d}       ║")
     print(f"╚══════════════════════════════════════════════════════════════╝")
-
-    all_items = []
-    remaining = args.count
-    idx = args.start_idx
-
-    while remaining > 0:
-        batch_count = min(args.batch_size, remaining)
-        print(f"  Generating batch: {batch_count} items (idx {idx}-{idx+batch_count-1})...")
-        
-        items = generate_batch(args.type, args.lang, args.level, batch_count, idx)
-        all_items.extend(items)
-        
-        print(f"  ✓ Got {len(items)} items (total: {len(all_items)})")
-        remaining -= batch_count
-        idx += batch_count
-        
-        if remaining > 0:
-            time.sleep(1)  # Rate limit courtesy
-
-    # Write to JSONL
-    suffix = f"_{args.lang.lower()}_{args.level.lower()}" if args.type != "errors" else f"_{args.lang.lower()}"
-    out_file = SEED_DIR / f"{args.type}_generated{suffix}.jsonl"
-    
-    with open(out_file, "w") as f:
-        for item in all_items:
-            f.write(json.dumps(item, ensure_ascii=False) + "\n")
-    
-    print(f"\n  ✓ Written {len(all_items)} items to {out_file}")
-    print(f"  Quality Gate: {'PASS' if len(all_items) >= args.count * 0.8 else 'WARN'}")
+    counts = {key: args.count for key in cell_keys}
+    if args.target is not None:
+        # Only what is missing is generated, and it is added to what is there.
+        args.append = True
+        missing = plan_targets(cell_keys, args.target, [SEED_DIR, args.out_dir])
+        counts = {key: sum(missing[key].values()) for key in cell_keys}
+        for key in cell_keys:
+            if not counts[key]:
+                print(f"  ✓ {'/'.join(key)}: coverage target of {args.target} already met")
+        cell_keys = [key for key in cell_keys if counts[key]]
+        if not cell_keys:
+            return
+    if args.from_scenarios:
+        # Answers are added to what is there, for questions that have none yet.
+        args.append = True
+        answer_index = load_answer_index(args.out_dir, save=False)
+        questions = {key: list(itertools.islice(open_questions(key[1], key[2], answer_index.answered,
+                                                               [SEED_DIR, args.out_dir]), args.count))
+                     for key in cell_keys}
+        counts = {key: len(questions[key]) for key in cell_keys}
+        print(f"  Answer index: {answer_index.summary()}")
+        for key in cell_keys:
+            if not counts[key]:
+                print(f"  ✓ {'/'.join(key)}: every scenario question already has an answer")
+        cell_keys = [key for key in cell_keys if counts[key]]
+        if not cell_keys:
+            return
+    starts = plan_starts(cell_keys, counts, args)
+    quotas = {}
+    if args.target is not None:
+        quotas = {key: assign(key[0], missing[key], starts[key]) for key in cell_keys}
+        for key in cell_keys:
+            print(f"  · {'/'.join(key)}: {counts[key]} items missing over {len(missing[key])} coverage cells")
+    links = {}
+    if args.from_scenarios:
+        links = {key: dict(zip(itertools.count(starts[key]), questions[key])) for key in cell_keys}
+        for key in cell_keys:
+            scenarios = len({link["scenario_id"] for link in questions[key]})
+            print(f"  · {'/'.join(key)}: answering {counts[key]} questions of {scenarios} existing scenarios")
+    if args.dry_run:
+        print_plan(cell_keys, counts, starts, args, quotas, links)
+        return
+
+    # Write to JSONL, one checkpointed batch at a time
+    args.out_dir.mkdir(parents=True, exist_ok=True)
+    cells = [Cell(t, l, lv, counts[(t, l, lv)], args.batch_size, starts[(t, l, lv)], args.resume, args.out_dir,
+                  args.append) for t, l, lv in cell_keys]
+    for cell in cells:
+        ids = describe_ids(cell.item_type, cell.lang, cell.level, range(cell.start_idx, cell.start_idx + cell.count))
+        if cell.writer.completed:
+            print(f"  ↻ Resuming {cell.label} ({ids}): {len(cell.writer.completed)} ranges already done "
+                  f"({cell.writer.items_written} items)")
+        elif cell.writer.offset:
+            print(f"  ↳ Appending {ids} to {cell.out_file.name} ({cell.writer.offset:,} bytes kept)")
+        else:
+            print(f"  · {cell.label}: {ids}")
+    cache = cache_from_args(args)
+    ctx = GenerationContext(RateLimiter(rpm=args.rpm, tpm=args.tpm), cache, stream=args.stream,
+                            validate=not args.no_validate, dedup=not args.no_dedup)
+    ctx.quotas = quotas
+    ctx.links = links
+    ctx.out_dirs = [SEED_DIR, args.out_dir]
+    if args.adaptive:
+        ctx.sizing = dict(initial=args.batch_size, min_size=args.min_batch_size, max_size=args.max_batch_size,
+                          target_latency=args.target_latency)
+    types = list(dict.fromkeys(cell.item_type for cell in cells))
+    validators = {t: ctx.validator(t) for t in types}
+    # Built after the writers have cut the outputs back, so a re-run is not
+    # compared against the items it is about to replace.
+    dedup_indexes = {t: ctx.dedup_index(t) for t in types}
+    for cell in cells:
+        ctx.metrics[cell.key] = MetricsLog(metrics_path(cell.out_file))
+
+    started = time.monotonic()
+    try:
+        if args.mode == "batch":
+            generate_via_batch_api(cells, ctx, args.poll_interval, started, args.batch_id)
+        elif args.adaptive:
+            print(f"  Generating {sum(len(c.todo) for c in cells)} items across {len(cells)} cells, "
+                  f"adaptive batch size, {args.concurrency} concurrent...")
+            asyncio.run(generate_adaptive(cells, args.concurrency, ctx, started))
+        elif args.concurrency > 1:
+            print(f"  Generating {sum(len(c.pending) for c in cells)} batches across {len(cells)} cells, "
+                  f"{args.concurrency} concurrent...")
+            asyncio.run(generate_concurrent(cells, args.concurrency, ctx, started))
+        else:
+            for cell in cells:
+                for idx, batch_count in cell.pending:
+                    print(f"  Generating {cell.label} batch: {batch_count} items (idx {idx}-{idx+batch_count-1})...")
+                    items = generate_batch(cell.item_type, cell.lang, cell.level, batch_count, idx, ctx)
+                    cell.write(idx, batch_count, items)
+                cell.seconds = time.monotonic() - started
+    finally:
+        for cell in cells:
+            cell.writer.close()
+    wall = time.monotonic() - started
+
+    # Every written item carries a distinct requested ID, so this is per-ID completeness.
+    total = sum(cell.writer.items_written for cell in cells)
+    requested = sum(cell.count for cell in cells)
+    print()
+    for cell in cells:
+        print(f"  ✓ Written {cell.writer.items_written} items to {cell.out_file}")
+    if len(cells) > 1:
+        print_cell_table(cells, ctx)
+        print(f"\n  Total: {total} items, {sum(ctx.tokens.values()):,} tokens in {wall:.1f}s")
+    for (item_type, level), sizer in sorted(ctx.sizers.items()):
+        print(f"  Adaptive batch size ({item_type}/{level}): {sizer.summary()}")
+    records = [r for log in ctx.metrics.values() for r in log.records]
+    if records:
+        print_summary(records)
+        print(f"  Per-batch metrics appended to {metrics_path(cells[0].out_file)}"
+              + (f" (and {len(cells) - 1} more)" if len(cells) > 1 else ""))
+    if cache is not None:
+        print(f"  Cache: {cache.hits} hits, {cache.misses} misses ({cache.cache_dir})")
+    for item_type, validator in validators.items():
+        if validator is not None:
+            print(f"  Schema validation ({item_type}): {validator.summary(wall)}")
+    for item_type, index in dedup_indexes.items():
+        if index is not None:
+            print(f"  Near-duplicates ({item_type}): {index.summary()}")
+    completeness = total / requested if requested else 1.0
+    print(f"  IDs: {total}/{requested} requested IDs present ({completeness:.0%})")
+    if args.target is not None:
+        print_coverage(cell_keys, args.target, [SEED_DIR, args.out_dir])
+    if args.from_scenarios:
+        answer_index = load_answer_index(args.out_dir)
+        print(f"  Answer index: {answer_index.summary()} → {answer_index.path}")
+    print(f"  Quality Gate: {'PASS' if completeness >= 0.8 else 'WARN'}")
 
 
 if __name__ == "__main__":
@@ -0,0 +1,157 @@
+"""
+SLE AI Companion — Cross-file ID allocation index
+
+Generated IDs (SCN-FR-012, ERR-EN-004, MA-FR-C-007) must stay unique across
+every file under data/sle/seed, not just within the file being written.
+IdIndex scans those files once, records which numbers are taken in each ID
+namespace (SCN-FR, ERR-EN, MA-FR-C, ... see item_ids.id_namespace) and hands
+out the next free range, so --start-idx no longer has to be guessed.
+
+Legacy IDs with a level segment (SCN-FR-A-021) take number 21 of SCN-FR, since
+generated scenario and error numbers are per language. Both the `id` and the
+`scenario_id` field of every record are counted, which also reserves the
+numbers of scenarios that are only referenced (e.g. by model answers).
+
+The per-file result is cached in .cache/sle-id-index.json keyed by mtime and
+size, so only files changed since the last run are read again.
+"""
+import json
+import os
+import re
+import sys
+import threading
+from pathlib import Path
+
+from item_ids import id_namespace
+from metrics import METRICS_SUFFIX
+from near_dup import SEED_DIR
+
+CACHE_FILE = SEED_DIR.parent.parent.parent / ".cache" / "sle-id-index.json"
+ID_KEYS = ("id", "scenario_id")
+
+_ANY_ID = re.compile(r"^(SCN|ERR|MA)-([A-Z]{2})(?:-([A-Z]))?-(\d+)$", re.IGNORECASE)
+
+
+def parse_id(value):
+    """(namespace, number) of a generated-style ID, or None."""
+    match = _ANY_ID.match(value.strip()) if isinstance(value, str) else None
+    if not match:
+        return None
+    prefix, lang, level, number = match.groups()
+    namespace = f"MA-{lang}-{level}" if prefix.upper() == "MA" and level else f"{prefix}-{lang}"
+    return namespace.upper(), int(number)
+
+
+def scan_file(path: Path) -> dict:
+    """{namespace: set of numbers} used by the records of one JSONL file."""
+    used = {}
+    with open(path, encoding="utf-8") as f:
+        for line in f:
+            try:
+                record = json.loads(line)
+            except json.JSONDecodeError:
+                continue
+            if not isinstance(record, dict):
+                continue
+            for key in ID_KEYS:
+                parsed = parse_id(record.get(key))
+                if parsed is not None:
+                    used.setdefault(parsed[0], set()).add(parsed[1])
+    return used
+
+
+def _to_ranges(numbers) -> list:
+    ranges = []
+    for n in sorted(numbers):
+        if ranges and n == ranges[-1][1] + 1:
+            ranges[-1][1] = n
+        else:
+            ranges.append([n, n])
+    return ranges
+
+
+def _from_ranges(ranges) -> set:
+    return {n for first, last in ranges for n in range(first, last + 1)}
+
+
+class IdIndex:
+    """Used ID numbers per namespace across a set of directories, plus this run's allocations."""
+
+    def __init__(self, dirs=(SEED_DIR,), cache_file: Path = CACHE_FILE):
+        self.dirs = list(dict.fromkeys(Path(d).resolve() for d in dirs))
+        self.cache_file = Path(cache_file) if cache_file else None
+        self.files = {}
+        self.reserved = {}
+        self.scanned = 0
+        self.reused = 0
+        self._lock = threading.Lock()
+
+    def load(self):
+        """Scan every *.jsonl under the directories, re-reading only files changed since the cache."""
+        cache = {}
+        if self.cache_file is not None and self.cache_file.exists():
+            try:
+                cache = json.loads(self.cache_file.read_text())
+            except (OSError, json.JSONDecodeError):
+                cache = {}
+        entries = {}
+        for root in self.dirs:
+            for path in sorted(root.rglob("*.jsonl")):
+                if path.name.endswith(METRICS_SUFFIX):
+                    continue
+                stat = path.stat()
+                entry = cache.get(str(path))
+                if entry and entry["mtime_ns"] == stat.st_mtime_ns and entry["size"] == stat.st_size:
+                    self.reused += 1
+                else:
+                    used = scan_file(path)
+                    entry = {"mtime_ns": stat.st_mtime_ns, "size": stat.st_size,
+                             "ids": {ns: _to_ranges(numbers) for ns, numbers in used.items()}}
+                    self.scanned += 1
+                entries[str(path)] = entry
+                self.files[path] = {ns: _from_ranges(ranges) for ns, ranges in entry["ids"].items()}
+        if self.cache_file is not None and entries != cache:
+            self._save(entries)
+        return self
+
+    def _save(self, entries: dict):
+        try:
+            self.cache_file.parent.mkdir(parents=True, exist_ok=True)
+            tmp = self.cache_file.with_name(self.cache_file.name + ".tmp")
+            tmp.write_text(json.dumps(entries))
+            os.replace(tmp, self.cache_file)
+        except OSError as e:
+            print(f"  ⚠ Could not write ID index cache {self.cache_file}: {e}", file=sys.stderr)
+
+    def used(self, namespace: str, exclude=()) -> set:
+        """Numbers taken in `namespace`, ignoring the files in `exclude` (e.g. outputs about to be rewritten)."""
+        exclude = {Path(p).resolve() for p in exclude}
+        numbers = set(self.reserved.get(namespace, ()))
+        for path, used in self.files.items():
+            if path not in exclude:
+                numbers |= used.get(namespace, set())
+        return numbers
+
+    def allocate(self, item_type: str, lang: str, level: str, count: int, exclude=()) -> int:
+        """Reserve `count` numbers after the highest one in use and return the first."""
+        namespace = id_namespace(item_type, lang, level)
+        with self._lock:
+            start = max(self.used(namespace, exclude), default=0) + 1
+            self.reserved.setdefault(namespace, set()).update(range(start, start + count))
+        return start
+
+    def reserve(self, item_type: str, lang: str, level: str, start_idx: int, count: int, exclude=()) -> list:
+        """Reserve an explicit range; returns the numbers in it that are already in use."""
+        namespace = id_namespace(item_type, lang, level)
+        wanted = range(start_idx, start_idx + count)
+        with self._lock:
+            taken = sorted(self.used(namespace, exclude).intersection(wanted))
+            self.reserved.setdefault(namespace, set()).update(wanted)
+        return taken
+
+    def summary(self) -> str:
+        return f"{len(self.files)} files ({self.scanned} scanned, {self.reused} cached)"
+
+
+def load_id_index(dirs=(SEED_DIR,), cache_file: Path = CACHE_FILE) -> IdIndex:
+    return IdIndex(dirs, cache_file).load()
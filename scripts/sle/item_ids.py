@@ -0,0 +1,118 @@
+"""
+SLE AI Companion — Item ID bookkeeping for generated batches
+
+Every batch asks the model for a specific set of IDs (SCN-FR-001, ERR-EN-014,
+MA-FR-C-007, ...). IdTracker checks what actually came back against that set:
+items with a requested, not-yet-seen ID are kept; duplicates, out-of-range
+and unrecognisable IDs are rejected. The IDs still missing can then be sent
+in a smaller follow-up request. With a validator, items that fail the JSON
+schema are rejected the same way, so they are re-requested too; likewise with
+a near-duplicate index for items too close to one already in the corpus.
+Model answers linked to existing scenario questions (see scenario_answers.py)
+must name the scenario they were asked for; the question they answer is then
+copied from the scenario rather than trusted from the model.
+"""
+import re
+import sys
+
+from near_dup import item_text
+
+ID_FIELD = {"scenarios": "scenario_id", "errors": "id", "model_answers": "id"}
+ID_PREFIX = {"scenarios": "SCN", "errors": "ERR", "model_answers": "MA"}
+
+# The trailing number is what identifies an item within its batch; the
+# language/level segments are not trusted to be exact (e.g. SCN-FR-B-012).
+_ID_NUMBER = re.compile(r"^(SCN|ERR|MA)-[A-Z]{2}(?:-[A-Z])?-(\d+)$", re.IGNORECASE)
+
+
+def id_namespace(item_type: str, lang: str, level: str) -> str:
+    """The part of an ID before its number; numbers are unique within it."""
+    if item_type == "model_answers":
+        return f"MA-{lang}-{level}"
+    return f"{ID_PREFIX[item_type]}-{lang}"
+
+
+def format_id(item_type: str, lang: str, level: str, n: int) -> str:
+    return f"{id_namespace(item_type, lang, level)}-{str(n).zfill(3)}"
+
+
+def describe_ids(item_type: str, lang: str, level: str, numbers: list) -> str:
+    """Prompt text for the requested IDs: a range when contiguous, else a list."""
+    numbers = sorted(numbers)
+    first, last = numbers[0], numbers[-1]
+    if last - first + 1 == len(numbers):
+        return f"{format_id(item_type, lang, level, first)} through {format_id(item_type, lang, level, last)}"
+    return ", ".join(format_id(item_type, lang, level, n) for n in numbers)
+
+
+def id_number(item_type: str, item) -> int:
+    """Numeric part of an item's ID, or None if it has no recognisable ID."""
+    if not isinstance(item, dict):
+        return None
+    value = item.get(ID_FIELD[item_type])
+    match = _ID_NUMBER.match(value.strip()) if isinstance(value, str) else None
+    if not match or match.group(1).upper() != ID_PREFIX[item_type]:
+        return None
+    return int(match.group(2))
+
+
+class IdTracker:
+    """Track which requested IDs of one batch have been received."""
+
+    def __init__(self, item_type: str, start_idx: int, count: int, validator=None, dedup=None, links: dict = None):
+        self.item_type = item_type
+        self.wanted = set(range(start_idx, start_idx + count))
+        self.validator = validator
+        self.dedup = dedup
+        self.links = links
+        self.found = {}
+        self.rejected = 0
+        self.mislinked = 0
+        self.invalid = 0
+        self.duplicates = 0
+
+    def add(self, items: list) -> int:
+        """Keep valid, non-duplicate items whose ID is requested and new; returns how many were kept."""
+        kept = 0
+        for item in items:
+            n = id_number(self.item_type, item)
+            if n not in self.wanted or n in self.found:
+                self.rejected += 1
+            elif self.links and n in self.links and not self._link(item, self.links[n]):
+                self.mislinked += 1
+            elif self.validator is not None and not self.validator.check(item):
+                self.invalid += 1
+            elif self.dedup is not None and self._near_duplicate(item):
+                self.duplicates += 1
+            else:
+                self.found[n] = item
+                kept += 1
+        return kept
+
+    @staticmethod
+    def _link(item: dict, link: dict) -> bool:
+        """Check an answer names its linked scenario and take the question fields from the scenario."""
+        if str(item.get("scenario_id") or "").strip().upper() != link["scenario_id"].upper():
+            print(f"  ⚠ Link: {item.get('id')} answers {item.get('scenario_id')}, expected {link['scenario_id']}",
+                  file=sys.stderr)
+            return False
+        item.update(scenario_id=link["scenario_id"], question_index=link["question_index"],
+                    question=link["question"], topic_domain=link["topic_domain"])
+        return True
+
+    def _near_duplicate(self, item) -> bool:
+        text = item_text(self.item_type, item)
+        if text is None:
+            return False
+        match = self.dedup.check_and_add(item[ID_FIELD[self.item_type]], text)
+        if match is not None:
+            print(f"  ⚠ Near-duplicate: {item[ID_FIELD[self.item_type]]} ~ {match}", file=sys.stderr)
+        return match is not None
+
+    @property
+    def missing(self) -> list:
+        return sorted(self.wanted - self.found.keys())
+
+    def items(self) -> list:
+        """Received items in ID order."""
+        return [self.found[n] for n in sorted(self.found)]
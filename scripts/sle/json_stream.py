@@ -0,0 +1,193 @@
+"""
+SLE AI Companion — Incremental JSON array parsing for streamed responses
+
+The generators ask the model for a JSON array of items. JsonArrayStream scans
+the text as it arrives and yields each top-level array element as soon as it
+closes, so a response that is cut off mid-way still gives back every complete
+item before the cut. Leading markdown fences and a wrapping object such as
+{"scenarios": [...]} are tolerated, as in parse_items(), which parses a
+complete (non-streamed) response. salvage_items() applies the same recovery
+to a response received whole, such as a Batch API result.
+
+ResponseStreamCollector feeds Responses API stream events (sync or async
+iteration is up to the caller) into a JsonArrayStream.
+"""
+import json
+
+
+def parse_items(text: str) -> list:
+    """Parse a model response into a list of items."""
+    text = text.strip()
+    # Strip markdown code fences if present
+    if text.startswith("```"):
+        text = text.split("\n", 1)[1]
+        if text.endswith("```"):
+            text = text.rsplit("```", 1)[0]
+        text = text.strip()
+    
+    items = json.loads(text)
+    if isinstance(items, list):
+        return items
+    elif isinstance(items, dict) and any(isinstance(v, list) for v in items.values()):
+        # Sometimes GPT wraps in an object
+        for v in items.values():
+            if isinstance(v, list):
+                return v
+    return [items]
+
+
+class TruncatedResponse(ValueError):
+    """A streamed response ended before a single complete item was received."""
+
+
+class JsonArrayStream:
+    """Yield top-level elements of a JSON array from text fed in chunks."""
+
+    def __init__(self):
+        self._text = ""
+        self._pos = 0
+        self._started = False
+        self._wrapper_depth = 0
+        self._plain_object = False
+        self._depth = 0
+        self._in_string = False
+        self._escape = False
+        self._elem_start = None
+        self._emitted = 0
+        self.skipped = 0
+        self.done = False
+
+    def feed(self, chunk: str) -> list:
+        """Consume a chunk of text and return the elements completed by it."""
+        if self.done:
+            return []
+        self._text += chunk
+        out = []
+        text = self._text
+        pos = self._pos
+        while pos < len(text):
+            ch = text[pos]
+            if self._in_string:
+                if self._escape:
+                    self._escape = False
+                elif ch == "\\":
+                    self._escape = True
+                elif ch == '"':
+                    self._in_string = False
+            elif not self._started:
+                if self._plain_object:
+                    pos = len(text)  # not an array; finish() parses the whole text
+                    break
+                if ch == '"':
+                    self._in_string = True
+                elif ch == "{":
+                    # A second level of nesting, or a ',' inside the first
+                    # object, means it is an item rather than a wrapper.
+                    self._plain_object = self._wrapper_depth > 0
+                    self._wrapper_depth += 1
+                elif ch == "," and self._wrapper_depth > 0:
+                    self._plain_object = True
+                elif ch == "[":
+                    self._started = True
+                    self._depth = 1
+            elif ch == '"':
+                if self._depth == 1 and self._elem_start is None:
+                    self._elem_start = pos
+                self._in_string = True
+            elif ch in "{[":
+                if self._depth == 1 and self._elem_start is None:
+                    self._elem_start = pos
+                self._depth += 1
+            elif ch in "}]":
+                self._depth -= 1
+                if self._depth == 0:
+                    if self._elem_start is not None:
+                        self._emit(text[self._elem_start:pos], out)
+                    self.done = True
+                    pos += 1
+                    break
+                if self._depth == 1 and self._elem_start is not None:
+                    self._emit(text[self._elem_start:pos + 1], out)
+            elif ch == ",":
+                if self._depth == 1 and self._elem_start is not None:
+                    self._emit(text[self._elem_start:pos], out)
+            elif self._depth == 1 and self._elem_start is None and not ch.isspace():
+                self._elem_start = pos  # scalar element
+            pos += 1
+
+        # Drop text that can no longer be part of an element.
+        if self._started:
+            keep_from = self._elem_start if self._elem_start is not None else pos
+            self._text = text[keep_from:]
+            if self._elem_start is not None:
+                self._elem_start = 0
+            self._pos = pos - keep_from
+        else:
+            self._pos = pos
+        return out
+
+    def _emit(self, raw: str, out: list):
+        self._elem_start = None
+        try:
+            out.append(json.loads(raw))
+            self._emitted += 1
+        except json.JSONDecodeError:
+            self.skipped += 1
+
+    def finish(self) -> list:
+        """Call once the stream has ended; returns any elements not yet yielded.
+
+        If no array was ever found (e.g. the model returned a single object),
+        the whole text is parsed as a last resort.
+        """
+        if self._started or self._emitted:
+            return []
+        try:
+            items = parse_items(self._text)
+        except json.JSONDecodeError:
+            return []
+        self.done = True
+        return items
+
+
+def salvage_items(text: str) -> tuple:
+    """Parse a complete response, or keep the complete items of a truncated one.
+
+    Returns (items, complete). A response that holds no complete item raises
+    TruncatedResponse.
+    """
+    try:
+        return parse_items(text), True
+    except json.JSONDecodeError:
+        pass
+    stream = JsonArrayStream()
+    items = stream.feed(text) + stream.finish()
+    if not items:
+        raise TruncatedResponse("response ended before the first complete item")
+    return items, False
+
+
+class ResponseStreamCollector:
+    """Accumulate items, raw text, completion status and usage from Responses API events."""
+
+    def __init__(self):
+        self.parser = JsonArrayStream()
+        self.items = []
+        self.parts = []
+        self.completed = False
+        self.usage = None
+
+    def consume(self, event):
+        kind = getattr(event, "type", "")
+        if kind == "response.output_text.delta":
+            self.parts.append(event.delta)
+            self.items.extend(self.parser.feed(event.delta))
+        elif kind in ("response.completed", "response.incomplete", "response.failed"):
+            self.completed = kind == "response.completed"
+            self.usage = getattr(getattr(event, "response", None), "usage", None)
+
+    def finish(self):
+        """Flush the parser; returns (items, text, complete)."""
+        self.items.extend(self.parser.finish())
+        complete = self.completed and self.parser.done
+        return self.items, "".join(self.parts), complete
@@ -0,0 +1,174 @@
+"""
+SLE AI Companion — Per-batch token, latency and retry metrics
+
+Every generated batch appends one line to <output>.metrics.jsonl:
+
+  {"ts": ..., "type": "scenarios", "lang": "FR", "level": "B", "start_idx": 1,
+   "batch_size": 10, "items": 10, "requests": 2, "retries": 1, "errors": 0,
+   "cache_hits": 0, "input_tokens": 2410, "cached_tokens": 1024,
+   "system_tokens": 1630, "output_tokens": 5120, "latency_s": 41.2,
+   "wall_s": 43.0, "items_per_s": 0.23}
+
+Token counts come from the response usage. system_tokens is the estimated
+share of input_tokens spent re-sending the system prompt; latency_s is time
+spent in API calls, wall_s includes rate-limit waits and backoff. Lines
+accumulate across runs, so the summary can compare batch sizes on real data:
+
+  python3 scripts/sle/metrics.py data/sle/seed/*.metrics.jsonl
+"""
+import argparse
+import json
+import sys
+import threading
+import time
+from pathlib import Path
+
+from rate_limit import estimate_tokens
+
+METRICS_SUFFIX = ".metrics.jsonl"
+
+# List prices in USD per million tokens (input, output); the Batch API bills half.
+PRICES_PER_MTOK = {
+    "gpt-5": (1.25, 10.00),
+    "gpt-4.1-mini": (0.40, 1.60),
+}
+
+
+def estimate_cost(model: str, input_tokens: int, output_tokens: int, batch_api: bool = False):
+    """Estimated USD cost of a token count, or None for a model without a known price."""
+    prices = PRICES_PER_MTOK.get(model)
+    if prices is None:
+        return None
+    cost = (input_tokens * prices[0] + output_tokens * prices[1]) / 1e6
+    return cost / 2 if batch_api else cost
+
+
+def metrics_path(output_file: Path) -> Path:
+    """Metrics file that sits next to a generator output."""
+    output_file = Path(output_file)
+    return output_file.with_name(output_file.stem + METRICS_SUFFIX)
+
+
+class BatchMetrics:
+    """Counters for one batch, from its first request to its last follow-up."""
+
+    def __init__(self, item_type: str, lang: str, level: str, start_idx: int, batch_size: int):
+        self.record = {
+            "type": item_type, "lang": lang, "level": level, "start_idx": start_idx, "batch_size": batch_size,
+            "items": 0, "requests": 0, "retries": 0, "errors": 0, "cache_hits": 0,
+            "input_tokens": 0, "cached_tokens": 0, "system_tokens": 0, "output_tokens": 0,
+            "latency_s": 0.0,
+        }
+        self._started = time.monotonic()
+
+    def cache_hit(self):
+        self.record["cache_hits"] += 1
+
+    def request(self, latency: float, system_prompt: str, usage=None, failed: bool = False):
+        """Book one API call; `usage` is a responses_api.Usage or None."""
+        r = self.record
+        if r["requests"]:
+            r["retries"] += 1
+        r["requests"] += 1
+        r["latency_s"] += latency
+        if failed:
+            r["errors"] += 1
+        if usage is not None:
+            r["input_tokens"] += usage.input
+            r["cached_tokens"] += usage.cached
+            r["output_tokens"] += usage.output
+            r["system_tokens"] += min(estimate_tokens(system_prompt), usage.input)
+
+    def finish(self, items: int) -> dict:
+        r = self.record
+        r["items"] = items
+        r["latency_s"] = round(r["latency_s"], 3)
+        r["wall_s"] = round(time.monotonic() - self._started, 3)
+        r["items_per_s"] = round(items / r["wall_s"], 3) if r["wall_s"] else 0.0
+        r["ts"] = round(time.time(), 3)
+        return r
+
+
+class MetricsLog:
+    """Thread-safe appender for metrics lines; also keeps this run's records."""
+
+    def __init__(self, path: Path):
+        self.path = Path(path)
+        self.records = []
+        self._lock = threading.Lock()
+
+    def write(self, metrics: BatchMetrics, items: int):
+        record = metrics.finish(items)
+        with self._lock:
+            self.records.append(record)
+            with open(self.path, "a", encoding="utf-8") as f:
+                f.write(json.dumps(record) + "\n")
+
+
+def load(paths) -> list:
+    records = []
+    for path in paths:
+        with open(path, encoding="utf-8") as f:
+            records.extend(json.loads(line) for line in f if line.strip())
+    return records
+
+
+def percentile(values: list, q: float) -> float:
+    values = sorted(values)
+    return values[min(len(values) - 1, int(q * len(values)))] if values else 0.0
+
+
+def summarize(records: list) -> list:
+    """One row per (type, batch_size) with the numbers needed to pick a batch size."""
+    groups = {}
+    for r in records:
+        groups.setdefault((r["type"], r["batch_size"]), []).append(r)
+    rows = []
+    for (item_type, batch_size), rs in sorted(groups.items()):
+        items = sum(r["items"] for r in rs)
+        input_tokens = sum(r["input_tokens"] for r in rs)
+        output_tokens = sum(r["output_tokens"] for r in rs)
+        wall = sum(r["wall_s"] for r in rs)
+        rows.append({
+            "type": item_type,
+            "batch_size": batch_size,
+            "batches": len(rs),
+            "items": items,
+            "completeness": items / sum(r["batch_size"] for r in rs),
+            "in_per_item": input_tokens / items if items else 0.0,
+            "out_per_item": output_tokens / items if items else 0.0,
+            "system_share": sum(r["system_tokens"] for r in rs) / input_tokens if input_tokens else 0.0,
+            "cached_share": sum(r["cached_tokens"] for r in rs) / input_tokens if input_tokens else 0.0,
+            "retries_per_batch": sum(r["retries"] for r in rs) / len(rs),
+            "p50_latency": percentile([r["latency_s"] for r in rs if r["requests"]], 0.5),
+            "p95_latency": percentile([r["latency_s"] for r in rs if r["requests"]], 0.95),
+            "items_per_s": items / wall if wall else 0.0,
+        })
+    return rows
+
+
+def print_summary(records: list):
+    """Print the per-(type, batch size) report."""
+    print(f"\n  {'Type':<14} {'Batch':>5} {'N':>4} {'Items':>6} {'Done':>5} {'In/it':>6} {'Out/it':>6} "
+          f"{'Sys%':>5} {'Cache%':>6} {'Retry':>5} {'p50 s':>6} {'p95 s':>6} {'It/s':>6}")
+    for row in summarize(records):
+        print(f"  {row['type']:<14} {row['batch_size']:>5} {row['batches']:>4} {row['items']:>6} "
+              f"{row['completeness']:>5.0%} {row['in_per_item']:>6.0f} {row['out_per_item']:>6.0f} "
+              f"{row['system_share']:>5.0%} {row['cached_share']:>6.0%} {row['retries_per_batch']:>5.2f} "
+              f"{row['p50_latency']:>6.1f} {row['p95_latency']:>6.1f} {row['items_per_s']:>6.2f}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Summarize SLE generator metrics")
+    parser.add_argument("files", nargs="+", type=Path, help="*.metrics.jsonl files")
+    args = parser.parse_args()
+    records = load(args.files)
+    if not records:
+        print("No metrics records found", file=sys.stderr)
+        sys.exit(1)
+    print(f"  {len(records)} batches from {len(args.files)} file(s)")
+    print_summary(records)
+
+
+if __name__ == "__main__":
+    main()
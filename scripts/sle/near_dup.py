@@ -0,0 +1,183 @@
+"""
+SLE AI Companion — Near-duplicate index for generated items
+
+At temperature 0.8, independent batches keep producing scenarios with almost
+the same context_prompt and errors with the same pattern/correction pair.
+NearDupIndex keeps a MinHash signature of every accepted item and an LSH band
+table over those signatures, so checking a new item only compares it with the
+few entries that share a band instead of the whole corpus.
+
+The index is built from the existing seed files (data/sle/seed/<type>_generated*.jsonl)
+and grows as items are accepted; IdTracker rejects near-duplicates like
+schema-invalid items, so they are re-requested in the same run.
+
+Signatures are one-permutation MinHash over character 4-grams: each shingle is
+hashed once (crc32) and the hash space is split into NUM_PERM bins, keeping the
+minimum per bin; empty bins borrow from the next non-empty one. That gives a
+NUM_PERM-value signature in a single pass, which keeps a lookup well under a
+millisecond in pure Python. The signature is split into BANDS bands for LSH,
+and candidates are confirmed by the signature-estimated Jaccard similarity.
+"""
+import json
+import re
+import sys
+import threading
+import time
+import unicodedata
+import zlib
+from pathlib import Path
+
+from metrics import METRICS_SUFFIX
+
+SEED_DIR = Path(__file__).resolve().parent.parent.parent / "data" / "sle" / "seed"
+
+# Fields that make two items "the same" for each type.
+TEXT_FIELDS = {
+    "scenarios": ("context_prompt",),
+    "errors": ("pattern", "correction"),
+}
+
+NUM_PERM = 64
+BANDS = 16
+DEFAULT_THRESHOLD = 0.7
+
+_WORD = re.compile(r"\w+")
+SHINGLE = 4
+
+
+def item_text(item_type: str, item) -> str:
+    """The text compared for near-duplicates, or None if the type is not indexed."""
+    fields = TEXT_FIELDS.get(item_type)
+    if not fields or not isinstance(item, dict):
+        return None
+    text = " | ".join(str(item.get(f) or "") for f in fields)
+    return text if text.strip(" |") else None
+
+
+def shingles(text: str) -> set:
+    """crc32 hashes of the character 4-grams of the normalised text."""
+    words = _WORD.findall(unicodedata.normalize("NFKC", text).lower())
+    joined = " ".join(words)
+    return {zlib.crc32(joined[i:i + SHINGLE].encode()) for i in range(max(1, len(joined) - SHINGLE + 1))}
+
+
+def signature(text: str) -> tuple:
+    """One-permutation MinHash signature of `text` (NUM_PERM values)."""
+    bins = [None] * NUM_PERM
+    for h in shingles(text):
+        b, v = h % NUM_PERM, h // NUM_PERM
+        if bins[b] is None or v < bins[b]:
+            bins[b] = v
+    # Densify: an empty bin takes the next non-empty bin's value, tagged with
+    # the distance so that it only matches the same borrowing in another text.
+    sig = list(bins)
+    for i in range(NUM_PERM):
+        if sig[i] is None:
+            d = 1
+            while bins[(i + d) % NUM_PERM] is None:
+                d += 1
+            sig[i] = bins[(i + d) % NUM_PERM] + (d << 32)
+    return tuple(sig)
+
+
+class NearDupIndex:
+    """Incremental MinHash/LSH index of item texts."""
+
+    def __init__(self, threshold: float = DEFAULT_THRESHOLD, bands: int = BANDS):
+        self.threshold = threshold
+        self.rows = NUM_PERM // bands
+        self.bands = bands
+        self._tables = [{} for _ in range(bands)]
+        self._signatures = {}
+        self._lock = threading.Lock()
+        self.lookups = 0
+        self.duplicates = 0
+        self.seconds = 0.0
+
+    def __len__(self) -> int:
+        return len(self._signatures)
+
+    def _band_keys(self, sig: tuple):
+        r = self.rows
+        return (sig[i * r:(i + 1) * r] for i in range(self.bands))
+
+    def _match(self, sig: tuple):
+        """Key of the most similar indexed entry at or above the threshold, or None."""
+        candidates = set()
+        for table, band in zip(self._tables, self._band_keys(sig)):
+            candidates.update(table.get(band, ()))
+        best, best_sim = None, self.threshold
+        for key in candidates:
+            other = self._signatures[key]
+            sim = sum(x == y for x, y in zip(sig, other)) / NUM_PERM
+            if sim >= best_sim:
+                best, best_sim = key, sim
+        return best
+
+    def _insert(self, key: str, sig: tuple):
+        self._signatures[key] = sig
+        for table, band in zip(self._tables, self._band_keys(sig)):
+            table.setdefault(band, []).append(key)
+
+    def add(self, key: str, text: str):
+        """Index `text` under `key` without checking it."""
+        sig = signature(text)
+        with self._lock:
+            self._insert(key, sig)
+
+    def check_and_add(self, key: str, text: str):
+        """Return the key of a near-duplicate of `text`, or index it and return None."""
+        started = time.perf_counter()
+        sig = signature(text)
+        with self._lock:
+            match = self._match(sig)
+            if match is None:
+                self._insert(key, sig)
+            else:
+                self.duplicates += 1
+            self.lookups += 1
+            self.seconds += time.perf_counter() - started
+        return match
+
+    def summary(self) -> str:
+        per_item = self.seconds / self.lookups * 1e6 if self.lookups else 0.0
+        return (f"{len(self)} indexed, {self.lookups} checked, {self.duplicates} near-duplicates, "
+                f"{per_item:.0f} µs/item")
+
+
+def generated_files(item_type: str, dirs=(SEED_DIR,)) -> list:
+    """The generated JSONL files of `item_type` in `dirs`, each directory once."""
+    paths = []
+    for d in dict.fromkeys(Path(d).resolve() for d in dirs):
+        paths += [p for p in sorted(d.glob(f"{item_type}_generated*.jsonl")) if not p.name.endswith(METRICS_SUFFIX)]
+    return paths
+
+
+def build_index(item_type: str, paths=None, threshold: float = DEFAULT_THRESHOLD) -> NearDupIndex:
+    """Index every item of `item_type` in `paths` (default: its seed files)."""
+    index = NearDupIndex(threshold)
+    if paths is None:
+        paths = generated_files(item_type)
+    for path in paths:
+        with open(path, encoding="utf-8") as f:
+            for n, line in enumerate(f, 1):
+                try:
+                    item = json.loads(line)
+                except json.JSONDecodeError:
+                    continue
+                text = item_text(item_type, item)
+                if text is not None:
+                    key = item.get("scenario_id") or item.get("id") or f"{Path(path).name}:{n}"
+                    index.add(f"{key} ({Path(path).name})", text)
+    return index
+
+
+def load_index(item_type: str, enabled: bool = True, paths=None, threshold: float = DEFAULT_THRESHOLD):
+    """NearDupIndex for `item_type` built from the seed files, or None if disabled or not indexed."""
+    if not enabled or item_type not in TEXT_FIELDS:
+        return None
+    started = time.perf_counter()
+    index = build_index(item_type, paths, threshold)
+    print(f"  Near-duplicate index ({item_type}): {len(index)} existing items "
+          f"in {time.perf_counter() - started:.2f}s", file=sys.stderr)
+    return index
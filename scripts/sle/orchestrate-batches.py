@@ -0,0 +1,195 @@
+#!/usr/bin/env python3
+"""
+SLE AI Companion — Parallel Batch Orchestrator
+
+Plans the full (type × lang × level × index range) matrix and runs every batch
+from a shared work queue with a pool of worker threads. Everything happens in
+one process: the OpenAI SDK is imported and the HTTP client is built once, then
+reused by every worker. Each batch is written to the same per-batch JSONL file
+that generate-batch.py would produce.
+
+Usage:
+  python3 scripts/sle/orchestrate-batches.py --count 50 --workers 8
+  python3 scripts/sle/orchestrate-batches.py --types scenarios errors --langs FR --levels B C --count 20
+  python3 scripts/sle/orchestrate-batches.py --count 50 --dry-run
+"""
+import argparse
+import importlib.util
+import queue
+import sys
+import threading
+import time
+from pathlib import Path
+
+from item_ids import describe_ids
+from prompts import estimate_batch_tokens
+from rate_limit import DEFAULT_RPM, DEFAULT_TPM, RateLimiter
+from response_cache import add_cache_args, cache_from_args
+from metrics import METRICS_SUFFIX, MetricsLog, estimate_cost, print_summary
+from near_dup import SEED_DIR, load_index
+from schema_validate import load_validator
+
+SCRIPT_DIR = Path(__file__).resolve().parent
+DEFAULT_OUT_DIR = SCRIPT_DIR.parent.parent / "data" / "sle" / "seed" / "batches"
+
+TYPES = ["scenarios", "errors", "model_answers"]
+LANGS = ["FR", "EN"]
+LEVELS = ["A", "B", "C"]
+
+
+def load_batch_module():
+    """Import generate-batch.py (hyphenated, so not importable by name)."""
+    spec = importlib.util.spec_from_file_location("generate_batch", SCRIPT_DIR / "generate-batch.py")
+    module = importlib.util.module_from_spec(spec)
+    spec.loader.exec_module(module)
+    return module
+
+
+def plan_jobs(types, langs, levels, count, batch_size, start_idx, out_dir):
+    """Expand the matrix into one job per batch."""
+    jobs = []
+    for item_type in types:
+        for lang in langs:
+            for level in levels:
+                # Model answers are only defined for B and C.
+                if item_type == "model_answers" and level == "A":
+                    continue
+                idx = start_idx
+                remaining = count
+                while remaining > 0:
+                    batch_count = min(batch_size, remaining)
+                    output_file = out_dir / f"{item_type}_{lang.lower()}_{level.lower()}_{idx:03d}.jsonl"
+                    jobs.append((item_type, lang, level, batch_count, idx, output_file))
+                    idx += batch_count
+                    remaining -= batch_count
+    return jobs
+
+
+def dedup_sources(item_type, jobs, out_dir):
+    """Seed files plus earlier batch outputs of `item_type`, minus the files this run rewrites."""
+    rewritten = {job[5] for job in jobs}
+    batch_files = [p for p in sorted(out_dir.glob(f"{item_type}_*.jsonl"))
+                   if p not in rewritten and not p.name.endswith(METRICS_SUFFIX)]
+    seed_files = [p for p in sorted(SEED_DIR.glob(f"{item_type}_generated*.jsonl"))
+                  if not p.name.endswith(METRICS_SUFFIX)]
+    return seed_files + batch_files
+
+
+def run_jobs(batch, jobs, workers, limiter, cache=None, stream=False, validators=None, dedup_indexes=None,
+             metrics_log=None):
+    """Drain the job queue with `workers` threads sharing one client and rate budget."""
+    work = queue.Queue()
+    for job in jobs:
+        work.put(job)
+
+    failed = []
+    lock = threading.Lock()
+    # Built here, not in the workers: get_client() is a lazy global without a lock.
+    client = batch.get_client()
+
+    def worker():
+        while True:
+            try:
+                item_type, lang, level, batch_count, idx, output_file = work.get_nowait()
+            except queue.Empty:
+                return
+            try:
+                ok = batch.run_batch(client, item_type, lang, level, batch_count, idx, str(output_file),
+                                     limiter, cache, stream, (validators or {}).get(item_type),
+                                     (dedup_indexes or {}).get(item_type), metrics_log)
+            except Exception as e:
+                print(f"✗ {item_type}/{lang}/{level} idx {idx}: {e}", file=sys.stderr)
+                ok = False
+            if not ok:
+                with lock:
+                    failed.append((item_type, lang, level, idx))
+            work.task_done()
+
+    threads = [threading.Thread(target=worker, daemon=True) for _ in range(min(workers, len(jobs)))]
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+    return failed
+
+
+def print_plan(batch, jobs):
+    """--dry-run: every job with its IDs, output file and estimated tokens."""
+    total_in = total_out = 0
+    for item_type, lang, level, batch_count, idx, output_file in jobs:
+        input_tokens, output_tokens = estimate_batch_tokens(item_type, lang, level, batch_count, idx,
+                                                            batch.EXPECTED_TOKENS_PER_ITEM)
+        total_in += input_tokens
+        total_out += output_tokens
+        ids = describe_ids(item_type, lang, level, range(idx, idx + batch_count))
+        print(f"  · {ids:<40} → {output_file.name}  ~{input_tokens:,} in / {output_tokens:,} out")
+    cost = estimate_cost(batch.MODEL, total_in, total_out)
+    print(f"\n  Plan: {len(jobs)} batches, {sum(job[3] for job in jobs)} items, "
+          f"~{total_in:,} input + {total_out:,} output tokens"
+          + (f" ≈ ${cost:,.2f} ({batch.MODEL})" if cost is not None else ""))
+    print(f"  Dry run: no requests sent, no files written.")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="SLE parallel batch orchestrator")
+    parser.add_argument("--types", nargs="+", default=TYPES, choices=TYPES)
+    parser.add_argument("--langs", nargs="+", default=LANGS, choices=LANGS)
+    parser.add_argument("--levels", nargs="+", default=LEVELS, choices=LEVELS)
+    parser.add_argument("--count", type=int, default=20, help="Items per (type, lang, level) cell")
+    parser.add_argument("--batch-size", type=int, default=10)
+    parser.add_argument("--start-idx", type=int, default=1)
+    parser.add_argument("--workers", type=int, default=8)
+    parser.add_argument("--out-dir", type=Path, default=DEFAULT_OUT_DIR)
+    parser.add_argument("--rpm", type=int, default=DEFAULT_RPM, help="Requests-per-minute budget")
+    parser.add_argument("--tpm", type=int, default=DEFAULT_TPM, help="Tokens-per-minute budget")
+    parser.add_argument("--stream", action="store_true",
+                        help="Stream responses and keep complete items from truncated outputs")
+    parser.add_argument("--no-validate", action="store_true",
+                        help="Skip in-process JSON Schema validation of generated items")
+    parser.add_argument("--no-dedup", action="store_true",
+                        help="Keep near-duplicates of items already in the seed files")
+    parser.add_argument("--dry-run", action="store_true",
+                        help="Print the batch plan, ID ranges and estimated token cost without calling the API")
+    add_cache_args(parser)
+    args = parser.parse_args()
+
+    jobs = plan_jobs(args.types, args.langs, args.levels, args.count, args.batch_size, args.start_idx, args.out_dir)
+
+    print(f"╔══════════════════════════════════════════════════════════════╗")
+    print(f"║  SLE Batch Orchestrator — {len(jobs):4d} batches, {args.workers:3d} workers          ║")
+    print(f"╚══════════════════════════════════════════════════════════════╝")
+
+    started = time.monotonic()
+    batch = load_batch_module()
+    if args.dry_run:
+        print_plan(batch, jobs)
+        return
+    args.out_dir.mkdir(parents=True, exist_ok=True)
+    cache = cache_from_args(args)
+    # One compiled schema per type, shared by all workers.
+    validators = {t: load_validator(t, not args.no_validate) for t in args.types}
+    dedup_indexes = {t: load_index(t, not args.no_dedup, dedup_sources(t, jobs, args.out_dir)) for t in args.types}
+    metrics_log = MetricsLog(args.out_dir / f"orchestrate{METRICS_SUFFIX}")
+    failed = run_jobs(batch, jobs, args.workers, RateLimiter(rpm=args.rpm, tpm=args.tpm), cache,
+                      args.stream, validators, dedup_indexes, metrics_log)
+    elapsed = time.monotonic() - started
+
+    print(f"\n  ✓ {len(jobs) - len(failed)}/{len(jobs)} batches written to {args.out_dir} in {elapsed:.1f}s")
+    if metrics_log.records:
+        print_summary(metrics_log.records)
+        print(f"  Per-batch metrics appended to {metrics_log.path}")
+    if cache is not None:
+        print(f"  Cache: {cache.hits} hits, {cache.misses} misses")
+    for item_type, validator in validators.items():
+        if validator is not None:
+            print(f"  Schema ({item_type}): {validator.summary(elapsed)}")
+    for item_type, index in dedup_indexes.items():
+        if index is not None:
+            print(f"  Near-duplicates ({item_type}): {index.summary()}")
+    for item_type, lang, level, idx in failed:
+        print(f"  ✗ {item_type}/{lang}/{level} idx {idx}", file=sys.stderr)
+    sys.exit(1 if failed else 0)
+
+
+if __name__ == "__main__":
+    main()
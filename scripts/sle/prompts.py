@@ -0,0 +1,255 @@
+"""
+SLE AI Companion — Shared generator prompts
+
+The one copy of the scenario / error / model-answer prompts, loaded by
+generate-dataset.py, generate-batch.py and orchestrate-batches.py.
+
+System prompts are module-level constants, so every request of a type sends
+the exact same bytes. User prompts are compiled once per (type, level) into a
+template whose static part (language, level requirements) comes first and
+whose per-batch part (count, IDs) comes last. The longest possible prefix is
+therefore identical across batches, which is what provider-side prompt caching
+matches on; prompt_cache_key() groups those requests on the provider side.
+"""
+import json
+
+from item_ids import ID_FIELD, describe_ids, format_id
+from rate_limit import estimate_tokens
+
+TOPIC_DOMAINS = ["HR", "Finance", "Operations", "Policy", "Service", "IT", "Leadership", "Environment", "Communications", "Diversity"]
+ERROR_CATEGORIES = ["anglicism", "syntax", "conjugation", "register", "pronunciation", "false_friend", "agreement",
+                    "preposition", "article", "vocabulary"]
+# Share of full_simulation vs quick_drill scenarios per level.
+DURATION_SPLIT = {
+    "A": {"full_simulation": 0.5, "quick_drill": 0.5},
+    "B": {"full_simulation": 0.6, "quick_drill": 0.4},
+    "C": {"full_simulation": 0.6, "quick_drill": 0.4},
+}
+
+SCENARIO_SYSTEM_PROMPT = """You are an expert in Canadian federal public service Second Language Evaluation (SLE) oral exam preparation. You create realistic, pedagogically sound oral practice scenarios.
+
+RULES:
+1. Each scenario must be a valid JSON object matching the exact schema below.
+2. target_level determines complexity:
+   - A: Concrete, routine. Simple SVO syntax. Present tense. Basic workplace topics.
+   - B: Narration, facts. Passé composé vs imparfait. Relative clauses. Conditional simple. Concrete non-routine.
+   - C: Abstraction, nuance. Subjonctif, conditionnel passé. Diplomatic register. Friction (disagreements, ambiguity). Leadership competencies.
+3. B→C transition zone (~40% of B/C items): scenarios that push B-level candidates toward C-level demands.
+4. question_sequence must have 3-5 questions with probing follow-ups.
+5. expected_functions must use SLE-aligned functions: describe, narrate, explain, justify, hypothesize, negotiate, reframe, persuade, concede, compare.
+6. scoring_focus uses exactly these 5 criteria: grammar, vocabulary, fluency, pronunciation, comprehension.
+7. register_constraints for C-level MUST include {"pronoun": "vous", "tone": "diplomatic"}.
+8. Language must match the requested language (FR or EN).
+9. All content must be relevant to Canadian federal public service context.
+10. NO field should be empty or "unknown". If uncertain, provide best candidate and set needs_review: true.
+
+OUTPUT: Return a JSON array of scenario objects. Each object:
+{
+  "scenario_id": "SCN-{LANG}-{NNN}",
+  "language": "fr" or "en",
+  "target_level": "A", "B", or "C",
+  "topic_domain": one of [HR, Finance, Operations, Policy, Service, IT, Leadership, Environment, Communications, Diversity],
+  "duration_tag": "quick_drill" or "full_simulation",
+  "context_prompt": "Detailed context setting the scene...",
+  "examiner_role": "Role description for the AI examiner...",
+  "question_sequence": [
+    {"q": "Main question", "probing": ["Follow-up 1", "Follow-up 2"], "conditions": {"if_hesitant": "Simplified version"}}
+  ],
+  "expected_functions": ["narrate", "justify", ...],
+  "expected_vocabulary": ["term1", "term2", ...],
+  "register_constraints": {"pronoun": "vous/tu", "tone": "formal/semi-formal/diplomatic"},
+  "scoring_focus": ["grammar", "vocabulary", "fluency", "pronunciation", "comprehension"],
+  "tags": {"grammatical": ["conditionnel", ...], "functional": ["gestion_du_changement", ...]},
+  "needs_review": false
+}"""
+
+ERROR_SYSTEM_PROMPT = """You are an expert linguist specializing in common errors made by English-speaking Canadian public servants learning French (and vice versa for EN errors). You create detailed error taxonomy entries for an AI coaching system.
+
+RULES:
+1. Each error must be a valid JSON object.
+2. Categories: anglicism, syntax, conjugation, register, pronunciation, false_friend, agreement, preposition, article, vocabulary
+3. severity_level: 1 (minor) to 5 (critical communication breakdown)
+4. Include realistic examples from federal workplace context.
+5. correction_rule must be actionable and clear.
+6. criterion_affected uses exactly: grammar, vocabulary, fluency, pronunciation, comprehension.
+7. Level A errors: basic conjugation, gender agreement, basic false friends.
+8. Level B errors: passé composé/imparfait confusion, relative pronouns, conditional.
+9. Level C errors: subjunctive triggers, register violations, nuance/concession errors.
+
+OUTPUT: Return a JSON array of error objects:
+{
+  "id": "ERR-{LANG}-{NNN}",
+  "language": "fr" or "en",
+  "category": "anglicism|syntax|conjugation|register|pronunciation|false_friend|agreement|preposition|article|vocabulary",
+  "severity_level": 1-5,
+  "pattern": "The incorrect pattern (e.g., 'Je suis excité')",
+  "correction": "The correct form (e.g., 'Je suis enthousiaste')",
+  "correction_rule": "Explanation of why and how to correct...",
+  "feedback_text": "Coaching feedback in target language...",
+  "level_impact": "A", "B", or "C",
+  "criterion_affected": "grammar|vocabulary|fluency|pronunciation|comprehension",
+  "examples": [{"incorrect": "...", "correct": "...", "context": "..."}],
+  "tags": ["false_friend", "workplace", ...],
+  "needs_review": false
+}"""
+
+MODEL_ANSWER_SYSTEM_PROMPT = """You are an expert SLE oral exam coach. You create model answers that demonstrate the expected quality for each proficiency level. These serve as reference answers for the AI scoring system.
+
+RULES:
+1. Model answers must demonstrate the TARGET LEVEL's expected competencies.
+2. Level B answers: clear narration, appropriate past tenses, concrete explanations, some discourse markers.
+3. Level C answers: nuanced argumentation, subjunctive/conditional, diplomatic register, complex connectors, ability to handle friction.
+4. Include register variants: formal (for C) and semi-formal (for B).
+5. Each answer must reference a realistic scenario from Canadian federal public service.
+6. Scoring criteria alignment: show how the answer would score on grammar, vocabulary, fluency, pronunciation (noted), comprehension.
+
+OUTPUT: Return a JSON array of model answer objects:
+{
+  "id": "MA-{LANG}-{LEVEL}-{NNN}",
+  "scenario_id": "SCN-{LANG}-{NNN}",
+  "language": "fr" or "en",
+  "target_level": "B" or "C",
+  "topic_domain": "HR|Finance|Operations|Policy|Service|IT|Leadership",
+  "question": "The question being answered...",
+  "model_answer_formal": "Full model answer in formal register...",
+  "model_answer_semiformal": "Full model answer in semi-formal register...",
+  "key_structures": ["passé composé", "conditionnel", ...],
+  "key_vocabulary": ["term1", "term2", ...],
+  "discourse_markers_used": ["cependant", "en revanche", ...],
+  "scoring_notes": {
+    "grammar": "Note on grammar quality demonstrated...",
+    "vocabulary": "Note on vocabulary range...",
+    "fluency": "Note on expected fluency...",
+    "pronunciation": "Key pronunciation points...",
+    "comprehension": "How comprehension is demonstrated..."
+  },
+  "needs_review": false
+}"""
+
+SYSTEM_PROMPTS = {
+    "scenarios": SCENARIO_SYSTEM_PROMPT,
+    "errors": ERROR_SYSTEM_PROMPT,
+    "model_answers": MODEL_ANSWER_SYSTEM_PROMPT,
+}
+
+LANGUAGE_NAMES = {"FR": "French", "EN": "English"}
+
+ERROR_LEVEL_FOCUS = {
+    "A": "basic errors (conjugation, gender, basic false friends, simple prepositions)",
+    "B": "intermediate errors (PC/imparfait, relative pronouns, conditional, register shifts)",
+    "C": "advanced errors (subjunctive triggers, register violations, nuance, concession structures)"
+}
+
+_CLOSING = "Return ONLY a valid JSON array. No markdown, no explanation."
+
+
+def _user_template(item_type: str, level: str) -> str:
+    """Static user prompt for (type, level); {lang}, {language}, {count}, {ids} and {quotas} are filled per batch."""
+    if item_type == "scenarios":
+        split = DURATION_SPLIT[level]
+        lines = [
+            f"Oral practice scenarios in {{lang}} for level {level}.",
+            "",
+            "Requirements:",
+            "- Language: {language}",
+            f"- Target level: {level}",
+            f"- Mix of topic domains: {', '.join(TOPIC_DOMAINS)}",
+            f"- {split['full_simulation']:.0%} full_simulation, {split['quick_drill']:.0%} quick_drill",
+        ]
+        if level == "B":
+            lines.append("- B→C transition: include hypothetical elements, mild friction, some formal register expectations")
+        if level == "C":
+            lines.append("- Must include: diplomatic friction, disagreement handling, policy negotiation, leadership competencies")
+        lines += ["", "Generate exactly {count} scenarios.", "Scenario IDs: {ids}{quotas}"]
+    elif item_type == "errors":
+        lines = [
+            f"Error taxonomy entries for {{lang}} learners at level {level}.",
+            "",
+            f"Focus on: {ERROR_LEVEL_FOCUS.get(level, ERROR_LEVEL_FOCUS['B'])}",
+            f"Mix categories: {', '.join(ERROR_CATEGORIES)}",
+            "",
+            "Generate exactly {count} entries.",
+            "Error IDs: {ids}{quotas}",
+        ]
+    elif item_type == "model_answers":
+        lines = [
+            f"Model answers in {{lang}} for level {level}.",
+            "",
+            "Requirements:",
+            "- Language: {language}",
+            f"- Target level: {level}",
+            "- Mix of topic domains",
+            "- Include both formal and semi-formal register variants",
+        ]
+        if level == "B":
+            lines.append("- Demonstrate: clear narration, appropriate tenses, concrete explanations")
+        if level == "C":
+            lines.append("- Demonstrate: nuanced argumentation, subjunctive, diplomatic register, complex connectors")
+        lines += ["", "Generate exactly {count} model answers.", "Answer IDs: {ids}{quotas}"]
+    else:
+        raise ValueError(f"Unknown type: {item_type}")
+    return "\n".join(lines + ["", _CLOSING])
+
+
+USER_TEMPLATES = {(t, level): _user_template(t, level) for t in SYSTEM_PROMPTS for level in ("A", "B", "C")}
+
+
+def describe_quotas(item_type: str, lang: str, level: str, numbers, quotas: dict) -> str:
+    """Per-ID field assignments for the IDs in `numbers` that have one (see coverage.py), or ""."""
+    lines = [f"- {format_id(item_type, lang, level, n)}: "
+             + ", ".join(f"{field}={value}" for field, value in quotas[n].items())
+             for n in sorted(numbers) if n in quotas]
+    if not lines:
+        return ""
+    return "\n\nEach ID must have exactly these field values:\n" + "\n".join(lines)
+
+
+def describe_links(lang: str, level: str, numbers, links: dict) -> str:
+    """The existing scenario question each ID in `numbers` must answer (see scenario_answers.py), or ""."""
+    lines = []
+    for n in sorted(numbers):
+        if n not in links:
+            continue
+        link = links[n]
+        lines += [f"- {format_id('model_answers', lang, level, n)}: scenario_id={link['scenario_id']}, "
+                  f"question_index={link['question_index']}",
+                  f"  Scenario ({link['topic_domain']}, examiner: {link['examiner_role']}): {link['context_prompt']}",
+                  f"  Question: {json.dumps(link['question'], ensure_ascii=False)}"]
+    if not lines:
+        return ""
+    return ("\n\nAnswer these questions from existing scenarios, one per ID. Copy scenario_id, question_index, "
+            "the scenario's topic_domain and the question text exactly:\n" + "\n".join(lines))
+
+
+def build_prompts(item_type: str, lang: str, level: str, count: int, start_idx: int, ids: list = None,
+                  quotas: dict = None, links: dict = None) -> tuple:
+    """Build the (system_prompt, user_prompt) pair for one batch.
+
+    `ids` restricts the request to specific ID numbers (e.g. the ones missing
+    from an earlier response) instead of the range start_idx..start_idx+count-1.
+    `quotas` maps ID numbers to the field values each of them must have; the
+    assignments of the requested IDs are appended after the ID list.
+    `links` does the same for model answers to existing scenario questions.
+    """
+    if item_type not in SYSTEM_PROMPTS:
+        raise ValueError(f"Unknown type: {item_type}")
+    numbers = ids or range(start_idx, start_idx + count)
+    id_text = describe_ids(item_type, lang, level, numbers) if item_type in ID_FIELD else ""
+    quota_text = describe_quotas(item_type, lang, level, numbers, quotas) if quotas else ""
+    if links and item_type == "model_answers":
+        quota_text += describe_links(lang, level, numbers, links)
+    user_prompt = USER_TEMPLATES[(item_type, level)].format(
+        lang=lang, language=LANGUAGE_NAMES.get(lang, lang), count=len(numbers), ids=id_text, quotas=quota_text)
+    return SYSTEM_PROMPTS[item_type], user_prompt
+
+
+def prompt_cache_key(item_type: str, lang: str, level: str) -> str:
+    """Provider-side prompt cache routing key: requests sharing it share a prompt prefix."""
+    return f"sle-{item_type}-{lang}-{level}".lower()
+
+
+def estimate_batch_tokens(item_type: str, lang: str, level: str, count: int, start_idx: int,
+                          output_per_item: int, quotas: dict = None, links: dict = None) -> tuple:
+    """Estimated (input, output) tokens of one batch request, for planning and dry runs."""
+    system_prompt, user_prompt = build_prompts(item_type, lang, level, count, start_idx, None, quotas, links)
+    return estimate_tokens(system_prompt, user_prompt), count * output_per_item
@@ -0,0 +1,163 @@
+"""
+SLE AI Companion — Shared rate limiting and retry backoff
+
+Used by generate-dataset.py, generate-batch.py and orchestrate-batches.py in
+place of fixed time.sleep() calls.
+
+- RateLimiter: token buckets for requests-per-minute and tokens-per-minute.
+  Callers reserve capacity up front and sleep only as long as the budget
+  requires, so an idle API is used at full speed and a busy one is not
+  hammered. Thread-safe, with a blocking and an asyncio entry point.
+- Retry-After / retry-after-ms headers on a failed response pause every
+  caller sharing the limiter, not just the one that got the 429.
+- backoff_delay(): full-jitter exponential backoff, tuned per error class.
+"""
+import asyncio
+import random
+import threading
+import time
+
+DEFAULT_RPM = 500
+DEFAULT_TPM = 200_000
+MAX_ATTEMPTS = 5
+
+# error class -> (base delay, cap) in seconds. None means "do not retry".
+BACKOFF_POLICY = {
+    "rate_limit": (2.0, 60.0),
+    "server": (1.0, 30.0),
+    "timeout": (2.0, 30.0),
+    "parse": (0.5, 4.0),
+    "other": (1.0, 10.0),
+    "fatal": None,
+}
+
+
+def estimate_tokens(*texts: str, expected_output: int = 0) -> int:
+    """Rough token estimate (~4 chars per token) used to reserve TPM budget."""
+    return sum(len(t) for t in texts) // 4 + expected_output
+
+
+def classify_error(exc: Exception) -> str:
+    """Map an exception to one of the BACKOFF_POLICY error classes."""
+    name = type(exc).__name__
+    status = getattr(exc, "status_code", None)
+    if name in ("JSONDecodeError", "TruncatedResponse"):
+        return "parse"
+    if status == 429 or name == "RateLimitError":
+        return "rate_limit"
+    if "Timeout" in name:
+        return "timeout"
+    if status is not None and status >= 500 or name in ("APIConnectionError", "InternalServerError"):
+        return "server"
+    if status in (400, 401, 403, 404, 422):
+        return "fatal"
+    return "other"
+
+
+def retry_after_seconds(exc: Exception):
+    """Return the server-requested delay from Retry-After headers, if any."""
+    response = getattr(exc, "response", None)
+    headers = getattr(response, "headers", None)
+    if not headers:
+        return None
+    value = headers.get("retry-after-ms")
+    if value is not None:
+        try:
+            return float(value) / 1000.0
+        except ValueError:
+            pass
+    value = headers.get("retry-after")
+    if value is not None:
+        try:
+            return float(value)
+        except ValueError:
+            # HTTP-date form is not used by the OpenAI API; ignore it.
+            return None
+    return None
+
+
+def backoff_delay(error_class: str, attempt: int) -> float:
+    """Full-jitter exponential backoff for the given (0-based) attempt."""
+    policy = BACKOFF_POLICY.get(error_class) or BACKOFF_POLICY["other"]
+    base, cap = policy
+    return random.uniform(0, min(cap, base * (2 ** attempt)))
+
+
+def should_retry(error_class: str, attempt: int) -> bool:
+    """Whether a failed attempt (0-based) should be retried."""
+    return BACKOFF_POLICY.get(error_class) is not None and attempt < MAX_ATTEMPTS - 1
+
+
+class _Bucket:
+    """Token bucket that may go into debt; debt is repaid by waiting."""
+
+    def __init__(self, per_minute: float, now: float):
+        self.capacity = float(per_minute)
+        self.rate = per_minute / 60.0
+        self.level = self.capacity
+        self.updated = now
+
+    def reserve(self, amount: float, now: float) -> float:
+        self.level = min(self.capacity, self.level + (now - self.updated) * self.rate)
+        self.updated = now
+        self.level -= amount
+        return max(0.0, -self.level / self.rate)
+
+    def refund(self, amount: float):
+        self.level = min(self.capacity, self.level + amount)
+
+
+class RateLimiter:
+    """Requests-per-minute and tokens-per-minute budget shared by all callers."""
+
+    def __init__(self, rpm: int = DEFAULT_RPM, tpm: int = DEFAULT_TPM, clock=time.monotonic):
+        self.clock = clock
+        now = clock()
+        self._requests = _Bucket(rpm, now)
+        self._tokens = _Bucket(tpm, now)
+        self._paused_until = 0.0
+        self._lock = threading.Lock()
+
+    def _reserve(self, tokens: int) -> float:
+        with self._lock:
+            now = self.clock()
+            wait = max(self._requests.reserve(1, now), self._tokens.reserve(tokens, now))
+            return max(wait, self._paused_until - now)
+
+    def acquire(self, tokens: int = 0):
+        """Block until one request carrying `tokens` tokens fits the budget."""
+        wait = self._reserve(tokens)
+        if wait > 0:
+            time.sleep(wait)
+
+    async def acquire_async(self, tokens: int = 0):
+        """asyncio variant of acquire()."""
+        wait = self._reserve(tokens)
+        if wait > 0:
+            await asyncio.sleep(wait)
+
+    def record_usage(self, estimated: int, actual: int):
+        """Correct the token bucket once the real usage of a request is known."""
+        with self._lock:
+            if actual > estimated:
+                self._tokens.reserve(actual - estimated, self.clock())
+            else:
+                self._tokens.refund(estimated - actual)
+
+    def pause(self, seconds: float):
+        """Hold back every caller for `seconds` (e.g. from a Retry-After header)."""
+        with self._lock:
+            self._paused_until = max(self._paused_until, self.clock() + seconds)
+
+    def delay_for(self, exc: Exception, attempt: int) -> float:
+        """Delay before retrying after `exc`; honours Retry-After for all callers."""
+        error_class = classify_error(exc)
+        server_delay = retry_after_seconds(exc)
+        if server_delay is not None:
+            self.pause(server_delay)
+            return server_delay
+        delay = backoff_delay(error_class, attempt)
+        if error_class == "rate_limit":
+            self.pause(delay)
+        return delay
+
@@ -0,0 +1,106 @@
+"""
+SLE AI Companion — Content-addressed response cache
+
+Shared by generate-dataset.py, generate-batch.py and orchestrate-batches.py.
+A response is stored under sha256(model, system prompt, user prompt,
+temperature), so re-running a batch with identical prompts is served from disk
+instead of being paid for again. Only responses that parsed successfully are
+cached.
+
+The cache is size-bounded: each hit refreshes the entry's mtime, and when the
+total size exceeds `max_bytes` the least recently used entries are evicted.
+
+Layout: <cache_dir>/<first 2 hex chars>/<sha256>.json
+"""
+import hashlib
+import json
+import os
+import threading
+import time
+from pathlib import Path
+
+DEFAULT_CACHE_DIR = Path(__file__).resolve().parent.parent.parent / ".cache" / "sle-responses"
+DEFAULT_MAX_BYTES = 512 * 1024 * 1024
+
+
+def cache_key(model: str, system_prompt: str, user_prompt: str, temperature: float) -> str:
+    """Stable hash of everything that determines the request."""
+    payload = json.dumps([model, system_prompt, user_prompt, temperature], ensure_ascii=False)
+    return hashlib.sha256(payload.encode("utf-8")).hexdigest()
+
+
+class ResponseCache:
+    """On-disk LRU cache of raw response texts."""
+
+    def __init__(self, cache_dir: Path = DEFAULT_CACHE_DIR, max_bytes: int = DEFAULT_MAX_BYTES):
+        self.cache_dir = Path(cache_dir)
+        self.max_bytes = max_bytes
+        self.hits = 0
+        self.misses = 0
+        self._lock = threading.Lock()
+        self.cache_dir.mkdir(parents=True, exist_ok=True)
+        self._size = sum(p.stat().st_size for p in self.cache_dir.glob("*/*.json"))
+
+    def _path(self, key: str) -> Path:
+        return self.cache_dir / key[:2] / f"{key}.json"
+
+    def get(self, key: str):
+        """Return the cached response text for `key`, or None."""
+        path = self._path(key)
+        try:
+            entry = json.loads(path.read_text(encoding="utf-8"))
+            os.utime(path)  # mark as recently used
+        except (OSError, ValueError):
+            with self._lock:
+                self.misses += 1
+            return None
+        with self._lock:
+            self.hits += 1
+        return entry["text"]
+
+    def put(self, key: str, model: str, text: str):
+        """Store a response text and evict old entries if over budget."""
+        path = self._path(key)
+        path.parent.mkdir(exist_ok=True)
+        data = json.dumps({"model": model, "created": time.time(), "text": text}, ensure_ascii=False)
+        tmp = path.with_name(f"{path.name}.{threading.get_ident()}.tmp")
+        tmp.write_text(data, encoding="utf-8")
+        old_size = path.stat().st_size if path.exists() else 0
+        os.replace(tmp, path)
+        with self._lock:
+            self._size += path.stat().st_size - old_size
+            if self._size > self.max_bytes:
+                self._evict()
+
+    def _evict(self):
+        """Drop least recently used entries until under 90% of max_bytes."""
+        entries = []
+        for p in self.cache_dir.glob("*/*.json"):
+            try:
+                st = p.stat()
+            except OSError:
+                continue
+            entries.append((st.st_mtime, st.st_size, p))
+        entries.sort()
+        target = self.max_bytes * 0.9
+        self._size = sum(size for _, size, _ in entries)
+        for _, size, p in entries:
+            if self._size <= target:
+                break
+            try:
+                p.unlink()
+                self._size -= size
+            except OSError:
+                pass
+
+
+def add_cache_args(parser):
+    """Register the shared --cache-dir / --no-cache options on an argparse parser."""
+    parser.add_argument("--cache-dir", type=Path, default=DEFAULT_CACHE_DIR,
+                        help=f"Response cache directory (default: {DEFAULT_CACHE_DIR})")
+    parser.add_argument("--no-cache", action="store_true", help="Always call the API; do not read or write the cache")
+
+
+def cache_from_args(args):
+    """Build the ResponseCache selected by add_cache_args() options, or None."""
+    return None if args.no_cache else ResponseCache(args.cache_dir)
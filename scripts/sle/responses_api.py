@@ -0,0 +1,107 @@
+"""
+SLE AI Companion — Responses API call helpers
+
+One request to client.responses.create(), either as a single response or as
+an event stream parsed incrementally with json_stream.JsonArrayStream. Both
+return the same tuple:
+
+  (items, raw_text, complete, usage)
+
+`usage` is a Usage(input, cached, output, total) token count, or None if the
+response did not report one.
+
+`complete` is False when a streamed response was cut off; `items` then holds
+every element that closed before the cut, so callers can keep them and
+re-request only the rest.
+"""
+import sys
+from collections import namedtuple
+
+from json_stream import ResponseStreamCollector, TruncatedResponse, parse_items
+
+
+def request_args(model: str, temperature: float, system_prompt: str, user_prompt: str, stream: bool,
+                 cache_key: str = None) -> dict:
+    """Keyword arguments for client.responses.create().
+
+    `cache_key` is sent as prompt_cache_key so requests sharing a prompt
+    prefix are routed to the same provider-side prompt cache.
+    """
+    kwargs = dict(
+        model=model,
+        input=[
+            {"role": "system", "content": system_prompt},
+            {"role": "user", "content": user_prompt}
+        ],
+        temperature=temperature,
+    )
+    if cache_key:
+        kwargs["prompt_cache_key"] = cache_key
+    if stream:
+        kwargs["stream"] = True
+    return kwargs
+
+
+Usage = namedtuple("Usage", ["input", "cached", "output", "total"])
+
+
+def read_usage(usage):
+    """Usage from a Responses API usage object (or its dict form in Batch API output), or None."""
+    if usage is None:
+        return None
+
+    def get(obj, name):
+        value = obj.get(name) if isinstance(obj, dict) else getattr(obj, name, None)
+        return value or 0
+
+    input_tokens = get(usage, "input_tokens")
+    output_tokens = get(usage, "output_tokens")
+    details = usage.get("input_tokens_details") if isinstance(usage, dict) else getattr(usage, "input_tokens_details", None)
+    cached = get(details, "cached_tokens") if details is not None else 0
+    return Usage(input_tokens, cached, output_tokens, get(usage, "total_tokens") or input_tokens + output_tokens)
+
+
+def finish_stream(collector: ResponseStreamCollector, error: Exception = None) -> tuple:
+    """Close out a streamed request; items received before a cut-off are kept."""
+    items, text, complete = collector.finish()
+    if error is not None:
+        if not items:
+            raise error
+        print(f"  ⚠ Stream interrupted after {len(items)} items: {error}", file=sys.stderr)
+    if not complete and not items:
+        raise TruncatedResponse("response ended before the first complete item")
+    return items, text, complete, read_usage(collector.usage)
+
+
+def call_model(client, model: str, temperature: float, system_prompt: str, user_prompt: str,
+               stream: bool = False, cache_key: str = None) -> tuple:
+    """One request. Returns (items, raw text, complete, Usage or None)."""
+    kwargs = request_args(model, temperature, system_prompt, user_prompt, stream, cache_key)
+    if not stream:
+        response = client.responses.create(**kwargs)
+        return parse_items(response.output_text), response.output_text, True, read_usage(response.usage)
+
+    collector = ResponseStreamCollector()
+    try:
+        for event in client.responses.create(**kwargs):
+            collector.consume(event)
+    except Exception as e:
+        return finish_stream(collector, e)
+    return finish_stream(collector)
+
+
+async def call_model_async(async_client, model: str, temperature: float, system_prompt: str, user_prompt: str,
+                           stream: bool = False, cache_key: str = None) -> tuple:
+    """Async variant of call_model()."""
+    kwargs = request_args(model, temperature, system_prompt, user_prompt, stream, cache_key)
+    if not stream:
+        response = await async_client.responses.create(**kwargs)
+        return parse_items(response.output_text), response.output_text, True, read_usage(response.usage)
+
+    collector = ResponseStreamCollector()
+    try:
+        async for event in await async_client.responses.create(**kwargs):
+            collector.consume(event)
+    except Exception as e:
+        return finish_stream(collector, e)
+    return finish_stream(collector)
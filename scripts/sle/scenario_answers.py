@@ -0,0 +1,181 @@
+#!/usr/bin/env python3
+"""
+SLE AI Companion — Model answers linked to existing scenarios
+
+MODEL_ANSWER_SYSTEM_PROMPT alone has the model invent a scenario_id and a
+question, so many answers point at scenarios that do not exist. With
+generate-dataset.py --type model_answers --from-scenarios, answers are made
+for the actual question_sequence entries of the generated scenarios instead:
+
+- open_questions() streams the scenario files line by line and yields each
+  question of the requested language and level that has no answer yet;
+- build_prompts(..., links=) puts the scenario context and question text in
+  the request, and IdTracker rejects answers naming another scenario;
+- AnswerIndex maps scenario_id -> question_index -> answer ID, plus the file
+  and byte offset of every answer, so scoring looks an answer up with two dict
+  hits and one seek instead of fuzzy-matching question text.
+
+The index is written next to the answers (model_answers_by_scenario.json) and
+rebuilt when any answer file changed since.
+
+  python3 scripts/sle/scenario_answers.py
+  python3 scripts/sle/scenario_answers.py --lookup SCN-FR-012 --question 2
+"""
+import argparse
+import json
+import os
+import sys
+from pathlib import Path
+
+from coverage import coverage_files
+from near_dup import SEED_DIR
+
+INDEX_NAME = "model_answers_by_scenario.json"
+
+
+def iter_records(paths):
+    """(path, byte offset, record) for every JSON object line of `paths`, read one line at a time."""
+    for path in paths:
+        offset = 0
+        with open(path, "rb") as f:
+            for line in f:
+                start, offset = offset, offset + len(line)
+                try:
+                    record = json.loads(line)
+                except (json.JSONDecodeError, UnicodeDecodeError):
+                    continue
+                if isinstance(record, dict):
+                    yield path, start, record
+
+
+def scenario_links(scenario: dict):
+    """One link per question of a scenario, in question_sequence order."""
+    for i, entry in enumerate(scenario.get("question_sequence") or []):
+        question = entry.get("q") if isinstance(entry, dict) else None
+        if not question:
+            continue
+        yield {"scenario_id": scenario["scenario_id"], "question_index": i, "question": question,
+               "topic_domain": scenario.get("topic_domain"), "context_prompt": scenario.get("context_prompt", ""),
+               "examiner_role": scenario.get("examiner_role", "")}
+
+
+def open_questions(lang: str, level: str, answered, dirs=(SEED_DIR,)):
+    """Stream the links of (lang, level) scenario questions that are not in `answered` yet."""
+    for _, _, scenario in iter_records(coverage_files("scenarios", dirs)):
+        if (str(scenario.get("language") or "").upper() != lang
+                or str(scenario.get("target_level") or "").upper() != level
+                or not scenario.get("scenario_id")):
+            continue
+        for link in scenario_links(scenario):
+            if not answered(link["scenario_id"], link["question_index"]):
+                yield link
+
+
+class AnswerIndex:
+    """scenario_id -> question_index -> answer ID, and answer ID -> (file, byte offset)."""
+
+    def __init__(self, path: Path):
+        self.path = Path(path)
+        self.files = {}  # relative path -> [mtime_ns, size]
+        self.by_scenario = {}
+        self.answers = {}
+        self.unlinked = 0
+
+    def _rel(self, path: Path) -> str:
+        return os.path.relpath(Path(path).resolve(), self.path.parent.resolve())
+
+    def build(self, dirs=(SEED_DIR,)):
+        """Index every linked answer in the model_answers_generated*.jsonl files of `dirs`."""
+        paths = coverage_files("model_answers", dirs)
+        self.files = {self._rel(p): [p.stat().st_mtime_ns, p.stat().st_size] for p in paths}
+        self.by_scenario, self.answers, self.unlinked = {}, {}, 0
+        for path, offset, answer in iter_records(paths):
+            if not isinstance(answer.get("question_index"), int) or not answer.get("id"):
+                self.unlinked += 1
+                continue
+            self.by_scenario.setdefault(answer["scenario_id"], {})[str(answer["question_index"])] = answer["id"]
+            self.answers[answer["id"]] = [self._rel(path), offset]
+        return self
+
+    def stale(self, dirs=(SEED_DIR,)) -> bool:
+        """True if the answer files in `dirs` are not the ones (or not as large / as recent as) last indexed."""
+        current = {self._rel(p): [p.stat().st_mtime_ns, p.stat().st_size] for p in coverage_files("model_answers", dirs)}
+        return current != self.files
+
+    def save(self):
+        tmp = self.path.with_name(self.path.name + ".tmp")
+        tmp.write_text(json.dumps({"files": self.files, "by_scenario": self.by_scenario, "answers": self.answers,
+                                   "unlinked": self.unlinked}, ensure_ascii=False))
+        os.replace(tmp, self.path)
+
+    def load(self) -> bool:
+        try:
+            data = json.loads(self.path.read_text())
+        except (OSError, json.JSONDecodeError):
+            return False
+        self.files, self.by_scenario = data["files"], data["by_scenario"]
+        self.answers, self.unlinked = data["answers"], data.get("unlinked", 0)
+        return True
+
+    def answered(self, scenario_id: str, question_index: int) -> bool:
+        return str(question_index) in self.by_scenario.get(scenario_id, {})
+
+    def answer_ids(self, scenario_id: str) -> dict:
+        """{question_index: answer ID} for one scenario."""
+        return {int(i): answer_id for i, answer_id in self.by_scenario.get(scenario_id, {}).items()}
+
+    def get(self, scenario_id: str, question_index: int):
+        """The answer record for one scenario question, or None."""
+        answer_id = self.by_scenario.get(scenario_id, {}).get(str(question_index))
+        if answer_id is None:
+            return None
+        rel, offset = self.answers[answer_id]
+        with open(self.path.parent / rel, "rb") as f:
+            f.seek(offset)
+            return json.loads(f.readline())
+
+    def summary(self) -> str:
+        return (f"{len(self.answers)} answers to {len(self.by_scenario)} scenarios in {len(self.files)} files"
+                + (f", {self.unlinked} unlinked" if self.unlinked else ""))
+
+
+def load_answer_index(out_dir: Path = SEED_DIR, dirs=None, rebuild: bool = False, save: bool = True) -> AnswerIndex:
+    """The join index in `out_dir` over the answers in data/sle/seed and `out_dir` (or `dirs`),
+    rebuilt (and saved, unless `save` is off) if missing or if an answer file changed."""
+    dirs = dirs or [SEED_DIR, out_dir]
+    index = AnswerIndex(Path(out_dir) / INDEX_NAME)
+    if rebuild or not index.load() or index.stale(dirs):
+        index.build(dirs)
+        if not save:
+            return index
+        try:
+            index.save()
+        except OSError as e:
+            print(f"  ⚠ Could not write answer index {index.path}: {e}", file=sys.stderr)
+    return index
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Join index from scenario questions to model answers")
+    parser.add_argument("--out-dir", type=Path, default=SEED_DIR, help="Directory of the answers and the index")
+    parser.add_argument("--rebuild", action="store_true", help="Rebuild the index even if it is up to date")
+    parser.add_argument("--lookup", metavar="SCENARIO_ID", help="Print the answers linked to one scenario")
+    parser.add_argument("--question", type=int, help="With --lookup: only this question_index")
+    args = parser.parse_args()
+
+    index = load_answer_index(args.out_dir, rebuild=args.rebuild)
+    print(f"  Answer index: {index.summary()} ({index.path})")
+    if args.lookup:
+        numbers = [args.question] if args.question is not None else sorted(index.answer_ids(args.lookup))
+        if not numbers:
+            print(f"  ✗ No linked answers for {args.lookup}")
+        for i in numbers:
+            answer = index.get(args.lookup, i)
+            if answer is None:
+                print(f"  ✗ {args.lookup} question {i}: no answer")
+            else:
+                print(f"  ✓ {args.lookup} question {i} → {answer['id']}: {answer['question']}")
+
+
+if __name__ == "__main__":
+    main()
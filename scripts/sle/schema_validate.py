@@ -0,0 +1,71 @@
+"""
+SLE AI Companion — In-process JSON Schema validation for generated items
+
+Each generated item is checked against data/sle/schema/<type>_generated.schema.json
+as soon as it arrives, so an invalid item is treated like a missing ID and
+re-requested in the same run instead of surfacing later in validate.ts or
+import-jsonl.ts. The schema is compiled once per run.
+
+Requires the `jsonschema` package; without it validation is skipped with a
+warning.
+"""
+import json
+import sys
+import threading
+import time
+from pathlib import Path
+
+SCHEMA_DIR = Path(__file__).resolve().parent.parent.parent / "data" / "sle" / "schema"
+
+
+class ItemValidator:
+    """Compiled schema for one item type, with timing counters."""
+
+    def __init__(self, item_type: str, schema_dir: Path = SCHEMA_DIR):
+        from jsonschema import Draft7Validator
+
+        schema = json.loads((schema_dir / f"{item_type}_generated.schema.json").read_text(encoding="utf-8"))
+        Draft7Validator.check_schema(schema)
+        self.item_type = item_type
+        self._validator = Draft7Validator(schema)
+        self._lock = threading.Lock()
+        self.checked = 0
+        self.failed = 0
+        self.seconds = 0.0
+
+    def check(self, item) -> bool:
+        """True if `item` is valid; logs the first schema error otherwise."""
+        started = time.perf_counter()
+        error = next(self._validator.iter_errors(item), None)
+        elapsed = time.perf_counter() - started
+        with self._lock:
+            self.checked += 1
+            self.seconds += elapsed
+            if error is not None:
+                self.failed += 1
+        if error is not None:
+            path = "/".join(str(p) for p in error.absolute_path) or "root"
+            item_id = item.get("id") or item.get("scenario_id") if isinstance(item, dict) else None
+            print(f"  ⚠ Schema: {item_id or 'item'} {path}: {error.message[:120]}", file=sys.stderr)
+        return error is None
+
+    def summary(self, wall_seconds: float = None) -> str:
+        per_item = self.seconds / self.checked * 1e6 if self.checked else 0.0
+        text = f"{self.checked} items checked, {self.failed} rejected, {per_item:.0f} µs/item"
+        if wall_seconds:
+            text += f" ({self.seconds / wall_seconds:.2%} of wall time)"
+        return text
+
+
+def load_validator(item_type: str, enabled: bool = True):
+    """ItemValidator for `item_type`, or None if disabled or unavailable."""
+    if not enabled:
+        return None
+    try:
+        return ItemValidator(item_type)
+    except ImportError:
+        print("  ⚠ jsonschema is not installed; skipping in-process validation (pip install jsonschema)",
+              file=sys.stderr)
+    except FileNotFoundError:
+        print(f"  ⚠ No schema for {item_type} in {SCHEMA_DIR}; skipping in-process validation", file=sys.stderr)
+    return None
@@ -0,0 +1,293 @@
+#!/usr/bin/env python3
+"""
+SLE AI Companion — Compact columnar build of the seed corpus
+
+validate.ts, import-jsonl.ts and seed.ts each re-parse the ~20 JSONL files in
+data/sle/seed line by line, even when they only want the FR level-B scenarios.
+build_corpus() compiles them once into a single file that is read with mmap:
+
+- a string dictionary holding every distinct value of the columns below, so
+  "FR", "B" or "policy_governance" is stored once however many rows use it;
+- one uint32 code column per field (collection, id, language, the level
+  fields, topic_domain, category, ...), so filtering compares integers and
+  never touches the record bodies; language and level codes are upper-cased;
+- the records themselves, as their original JSON lines, with a uint64 offset
+  table for random access: SeedCorpus.record(i) parses one row only.
+
+Layout (little-endian, sections 8-byte aligned):
+
+  header   MAGIC, version, rows, columns, strings, then the byte offsets of
+           the manifest, string offsets, string data, columns, record offsets
+           and record data sections
+  manifest JSON: the column names and, per source file, its name, mtime_ns,
+           size and row range (used for the staleness check)
+  strings  uint32[strings + 1] offsets into the UTF-8 string data
+  columns  uint32[rows] per column, MISSING where the field is absent or not
+           a string
+  records  uint64[rows + 1] offsets into the record data
+
+The artifact goes to .cache/sle-seed-corpus.bin and is rebuilt when a seed
+file was added, removed or changed since.
+
+  python3 scripts/sle/seed_corpus.py
+  python3 scripts/sle/seed_corpus.py --where collection=scenarios_generated language=FR target_level=B
+"""
+import argparse
+import json
+import mmap
+import os
+import struct
+import sys
+from array import array
+from pathlib import Path
+
+from metrics import METRICS_SUFFIX
+from near_dup import SEED_DIR
+
+CORPUS_FILE = SEED_DIR.parent.parent.parent / ".cache" / "sle-seed-corpus.bin"
+
+MAGIC = b"SLECORP\0"
+VERSION = 1
+HEADER = struct.Struct("<8sIIII6Q")
+MISSING = 0xFFFFFFFF
+
+# Dictionary-encoded columns. "collection" is the file stem, "id" falls back
+# to scenario_id; the rest are the record fields of the same name.
+COLUMNS = ("collection", "id", "language", "target_level", "level_target", "level", "level_impact",
+           "level_relevance", "topic_domain", "category", "duration_tag", "phase")
+ID_KEYS = ("id", "scenario_id")
+# Stored upper-cased, as coverage.item_key() compares them ("fr" and "FR" both occur).
+UPPER_COLUMNS = {"language", "target_level", "level_target", "level", "level_impact", "level_relevance"}
+
+
+def seed_files(seed_dir: Path = SEED_DIR) -> list:
+    return [p for p in sorted(Path(seed_dir).glob("*.jsonl")) if not p.name.endswith(METRICS_SUFFIX)]
+
+
+def _source_stats(paths) -> list:
+    return [[p.name, p.stat().st_mtime_ns, p.stat().st_size] for p in paths]
+
+
+def _column_value(column: str, collection: str, record: dict):
+    if column == "collection":
+        return collection
+    if column == "id":
+        return next((record[k] for k in ID_KEYS if isinstance(record.get(k), str)), None)
+    value = record.get(column)
+    if not isinstance(value, str):
+        return None
+    return value.upper() if column in UPPER_COLUMNS else value
+
+
+def _pad(out: bytearray):
+    out.extend(b"\0" * (-len(out) % 8))
+
+
+def build_corpus(out: Path = CORPUS_FILE, seed_dir: Path = SEED_DIR) -> dict:
+    """Compile the JSONL files of `seed_dir` into `out`; returns the manifest."""
+    paths = seed_files(seed_dir)
+    strings, codes = [], {}
+    columns = {name: array("I") for name in COLUMNS}
+    bodies, offsets = bytearray(), array("Q", [0])
+    sources = []
+    for (name, mtime_ns, size), path in zip(_source_stats(paths), paths):
+        collection, first = path.stem, len(offsets) - 1
+        with open(path, "rb") as f:
+            for lineno, line in enumerate(f, 1):
+                line = line.strip()
+                if not line:
+                    continue
+                try:
+                    record = json.loads(line)
+                except (json.JSONDecodeError, UnicodeDecodeError) as e:
+                    print(f"  ⚠ {name}:{lineno}: skipped, not JSON ({e})", file=sys.stderr)
+                    continue
+                if not isinstance(record, dict):
+                    continue
+                for column in COLUMNS:
+                    value = _column_value(column, collection, record)
+                    if value is None:
+                        columns[column].append(MISSING)
+                        continue
+                    code = codes.get(value)
+                    if code is None:
+                        code = codes[value] = len(strings)
+                        strings.append(value)
+                    columns[column].append(code)
+                bodies += line
+                offsets.append(len(bodies))
+        sources.append({"name": name, "mtime_ns": mtime_ns, "size": size, "rows": [first, len(offsets) - 1]})
+
+    manifest = {"columns": list(COLUMNS), "sources": sources}
+    encoded = [s.encode("utf-8") for s in strings]
+    string_offsets = array("I", [0])
+    for s in encoded:
+        string_offsets.append(string_offsets[-1] + len(s))
+    arrays = [string_offsets, offsets, *columns.values()]
+    if sys.byteorder == "big":
+        for a in arrays:
+            a.byteswap()
+
+    data = bytearray(HEADER.size)
+    sections = []
+    for chunk in (json.dumps(manifest).encode("utf-8"), string_offsets.tobytes(), b"".join(encoded),
+                  b"".join(columns[c].tobytes() for c in COLUMNS), offsets.tobytes(), bytes(bodies)):
+        _pad(data)
+        sections.append(len(data))
+        data += chunk
+    HEADER.pack_into(data, 0, MAGIC, VERSION, len(offsets) - 1, len(COLUMNS), len(strings), *sections)
+
+    out = Path(out)
+    out.parent.mkdir(parents=True, exist_ok=True)
+    tmp = out.with_name(out.name + ".tmp")
+    tmp.write_bytes(data)
+    os.replace(tmp, out)
+    return manifest
+
+
+class SeedCorpus:
+    """Read-only, memory-mapped view of a corpus built by build_corpus()."""
+
+    def __init__(self, path: Path = CORPUS_FILE):
+        self.path = Path(path)
+        with open(self.path, "rb") as f:
+            self._mm = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+        magic, version, self.rows, ncols, nstrings, *sections = HEADER.unpack_from(self._mm, 0)
+        if magic != MAGIC or version != VERSION:
+            self.close()
+            raise ValueError(f"{self.path} is not a version {VERSION} SLE corpus")
+        manifest_at, string_offsets_at, strings_at, columns_at, offsets_at, bodies_at = sections
+        self.manifest = json.loads(self._mm[manifest_at:string_offsets_at].rstrip(b"\0"))
+        self._string_offsets = self._array("I", string_offsets_at, nstrings + 1)
+        self._strings_at = strings_at
+        self._columns = {name: self._array("I", columns_at + i * 4 * self.rows, self.rows)
+                         for i, name in enumerate(self.manifest["columns"])}
+        self._offsets = self._array("Q", offsets_at, self.rows + 1)
+        self._bodies_at = bodies_at
+        self._codes = None
+
+    def _array(self, typecode: str, start: int, count: int):
+        """A zero-copy view of a section, or a byte-swapped copy on big-endian hosts."""
+        size = array(typecode).itemsize
+        view = memoryview(self._mm)[start:start + count * size]
+        if sys.byteorder == "little":
+            return view.cast(typecode)
+        swapped = array(typecode, view.tobytes())
+        swapped.byteswap()
+        return swapped
+
+    def close(self):
+        self._columns = self._offsets = self._string_offsets = None
+        try:
+            self._mm.close()
+        except BufferError:
+            pass  # a caller still holds a column view; the map goes with it
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+    def __len__(self):
+        return self.rows
+
+    def string(self, code: int):
+        if code == MISSING:
+            return None
+        start = self._strings_at + self._string_offsets[code]
+        end = self._strings_at + self._string_offsets[code + 1]
+        return self._mm[start:end].decode("utf-8")
+
+    def code(self, value: str):
+        """Dictionary code of a string, or None if no row has it."""
+        if self._codes is None:
+            self._codes = {self.string(i): i for i in range(len(self._string_offsets) - 1)}
+        return self._codes.get(value)
+
+    def column(self, name: str):
+        """The uint32 codes of one column; decode them with string()."""
+        return self._columns[name]
+
+    def value(self, i: int, name: str):
+        return self.string(self._columns[name][i])
+
+    def rows_where(self, **where) -> list:
+        """Row numbers whose columns equal the given values (a string, or a collection of them).
+
+        Values of the UPPER_COLUMNS match case-insensitively, as they are stored upper-cased.
+        """
+        rows = range(self.rows)
+        for name, wanted in where.items():
+            column = self._columns[name]
+            values = [wanted] if isinstance(wanted, str) else wanted
+            if name in UPPER_COLUMNS:
+                values = [v.upper() for v in values]
+            codes = {c for c in map(self.code, values) if c is not None}
+            rows = [i for i in rows if column[i] in codes]
+        return list(rows)
+
+    def raw(self, i: int) -> bytes:
+        return self._mm[self._bodies_at + self._offsets[i]:self._bodies_at + self._offsets[i + 1]]
+
+    def record(self, i: int) -> dict:
+        return json.loads(self.raw(i))
+
+    def records(self, **where):
+        for i in self.rows_where(**where):
+            yield self.record(i)
+
+    def stale(self, seed_dir: Path = SEED_DIR) -> bool:
+        """True if the seed files are not the ones (or not as large / as recent as) compiled."""
+        built = [[s["name"], s["mtime_ns"], s["size"]] for s in self.manifest["sources"]]
+        return self.manifest["columns"] != list(COLUMNS) or built != _source_stats(seed_files(seed_dir))
+
+    def summary(self) -> str:
+        return (f"{self.rows} records from {len(self.manifest['sources'])} files, "
+                f"{len(self._string_offsets) - 1} dictionary strings, {self.path.stat().st_size:,} bytes")
+
+
+def load_corpus(path: Path = CORPUS_FILE, seed_dir: Path = SEED_DIR, rebuild: bool = False) -> SeedCorpus:
+    """The corpus at `path`, (re)built first if missing, unreadable or older than the seed files."""
+    corpus = None
+    if not rebuild:
+        try:
+            corpus = SeedCorpus(path)
+        except (OSError, ValueError, struct.error):
+            corpus = None
+        if corpus is not None and corpus.stale(seed_dir):
+            corpus.close()
+            corpus = None
+    if corpus is None:
+        build_corpus(path, seed_dir)
+        corpus = SeedCorpus(path)
+    return corpus
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Compile data/sle/seed into a memory-mapped columnar corpus")
+    parser.add_argument("--seed-dir", type=Path, default=SEED_DIR, help="Directory of the seed JSONL files")
+    parser.add_argument("--out", type=Path, default=CORPUS_FILE, help="Corpus file to write / read")
+    parser.add_argument("--rebuild", action="store_true", help="Rebuild even if the corpus is up to date")
+    parser.add_argument("--where", nargs="+", metavar="COLUMN=VALUE",
+                        help=f"Print the IDs of matching rows; columns: {', '.join(COLUMNS)}")
+    args = parser.parse_args()
+
+    where = {}
+    for clause in args.where or ():
+        name, sep, value = clause.partition("=")
+        if not sep or name not in COLUMNS:
+            parser.error(f"--where expects COLUMN=VALUE with COLUMN one of {', '.join(COLUMNS)}: {clause}")
+        where.setdefault(name, []).append(value)
+
+    with load_corpus(args.out, args.seed_dir, rebuild=args.rebuild) as corpus:
+        print(f"  Seed corpus: {corpus.summary()} ({corpus.path})")
+        if where:
+            rows = corpus.rows_where(**where)
+            for i in rows:
+                print(f"  {corpus.value(i, 'collection')}: {corpus.value(i, 'id') or f'row {i}'}")
+            print(f"  {len(rows)} matching rows")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,364 @@
+#!/usr/bin/env python3
+"""
+SLE AI Companion — Local stub of the Responses API
+
+A fake POST /v1/responses endpoint for benchmarking the generators without
+spending tokens. It reads the requested IDs from the user prompt and answers
+with schema-valid items sampled from data/sle/seed/<type>_generated.jsonl,
+renumbered to those IDs, with their near-duplicate text fields replaced by
+random words so they are not rejected against the corpus. Items take the
+language of their ID and the level named in the prompt, and per-ID field
+values from a coverage quota (see coverage.py) are applied as asked.
+
+Latency, error rate and truncation rate are configurable:
+
+- each response takes latency + per_item_latency * items seconds;
+- error_rate of the requests fail with a 429 carrying retry-after-ms;
+- truncation_rate of the responses are cut off mid-array (status
+  "incomplete", or a response.incomplete event when streaming).
+
+Both plain JSON and SSE streaming responses are supported. The Batch API
+endpoints used by generate-dataset.py --mode batch are faked too: an uploaded
+batch-input file (POST /v1/files) submitted with POST /v1/batches is answered
+in the background, one request after another with the same latency and
+faults (a failed request goes to the error file), and GET /v1/batches/<id>
+and /v1/files/<id>/content serve its status and results.
+
+Point a generator at it with OPENAI_BASE_URL=http://127.0.0.1:<port>/v1 (any
+OPENAI_API_KEY).
+
+Usage: python3 stub_server.py [--port 8765] [--latency 0.2] [--error-rate 0.05] [--truncation-rate 0.05]
+"""
+import argparse
+import contextlib
+import io
+import itertools
+import json
+import random
+import re
+import threading
+import time
+from email.parser import BytesParser
+from email.policy import HTTP
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+from item_ids import ID_FIELD, ID_PREFIX
+from near_dup import SEED_DIR, TEXT_FIELDS
+from rate_limit import estimate_tokens
+from schema_validate import load_validator
+
+_IDS = re.compile(r"\b((?:SCN|ERR|MA)-[A-Z]{2}(?:-[A-Z])?-)(\d+)\b")
+_WORD = re.compile(r"[^\W\d_]{4,}")
+_LEVEL = re.compile(r"\blevel ([ABC])\b")
+_ASSIGNMENT = re.compile(r"^- ((?:SCN|ERR|MA)-[A-Z]{2}(?:-[A-Z])?-\d+): (.+)$", re.MULTILINE)
+TYPE_BY_PREFIX = {prefix: item_type for item_type, prefix in ID_PREFIX.items()}
+
+
+def requested_ids(user_prompt: str) -> list:
+    """IDs asked for on the prompt's "... IDs:" line, ranges expanded."""
+    line = next((l for l in user_prompt.splitlines() if "IDs:" in l), "")
+    found = _IDS.findall(line)
+    if " through " in line and len(found) == 2:
+        prefix, first = found[0]
+        width = len(first)
+        return [f"{prefix}{str(n).zfill(width)}" for n in range(int(first), int(found[1][1]) + 1)]
+    return [prefix + n for prefix, n in found]
+
+
+def requested_fields(user_prompt: str) -> dict:
+    """Per-ID field values asked for by a coverage quota ("- SCN-FR-041: topic_domain=HR, ...")."""
+    return {item_id: dict(pair.split("=", 1) for pair in values.split(", "))
+            for item_id, values in _ASSIGNMENT.findall(user_prompt)}
+
+
+class StubServer:
+    """Threaded fake Responses API; use as a context manager or start()/stop()."""
+
+    def __init__(self, port: int = 0, latency: float = 0.2, per_item_latency: float = 0.0,
+                 error_rate: float = 0.0, truncation_rate: float = 0.0, seed: int = None):
+        self.latency = latency
+        self.per_item_latency = per_item_latency
+        self.error_rate = error_rate
+        self.truncation_rate = truncation_rate
+        self.stats = {"requests": 0, "errors": 0, "truncated": 0, "items": 0}
+        self._rng = random.Random(seed)
+        self._lock = threading.Lock()
+        self._samples = {}
+        self._vocab = []
+        self._cache_keys = set()
+        self._files = {}  # file id -> (filename, purpose, content)
+        self._batches = {}  # batch id -> Batch object
+        self._ids = itertools.count(1)
+        self._load_samples()
+        self._httpd = ThreadingHTTPServer(("127.0.0.1", port), self._handler())
+        self._httpd.daemon_threads = True
+        self._thread = None
+
+    @property
+    def base_url(self) -> str:
+        return f"http://127.0.0.1:{self._httpd.server_address[1]}/v1"
+
+    def _load_samples(self):
+        words = set()
+        for item_type in ID_FIELD:
+            path = SEED_DIR / f"{item_type}_generated.jsonl"
+            with open(path, encoding="utf-8") as f:
+                items = [json.loads(line) for line in f if line.strip()]
+            # Only valid samples, so that retries come from the injected faults alone.
+            validator = load_validator(item_type)
+            if validator is not None:
+                with contextlib.redirect_stderr(io.StringIO()):
+                    items = [item for item in items if validator.check(item)]
+            self._samples[item_type] = items
+            for item in items:
+                for field in TEXT_FIELDS.get(item_type, ()):
+                    words.update(w.lower() for w in _WORD.findall(str(item.get(field) or "")))
+        self._vocab = sorted(words)
+
+    def _roll(self, rate: float) -> bool:
+        with self._lock:
+            return self._rng.random() < rate
+
+    def make_items(self, ids: list, fields: dict = None, level: str = None) -> list:
+        """One sampled item per requested ID, in its language and `level`, with any assigned field values."""
+        items = []
+        with self._lock:
+            for item_id in ids:
+                item_type = TYPE_BY_PREFIX[item_id.split("-", 1)[0]]
+                item = dict(self._rng.choice(self._samples[item_type]))
+                item[ID_FIELD[item_type]] = item_id
+                item["language"] = item_id.split("-")[1].lower()
+                for field in ("target_level", "level_impact"):
+                    if level and field in item:
+                        item[field] = level
+                item.update((fields or {}).get(item_id, {}))
+                for field in TEXT_FIELDS.get(item_type, ()):
+                    item[field] = " ".join(self._rng.choices(self._vocab, k=12))
+                items.append(item)
+        return items
+
+    def respond(self, body: dict) -> tuple:
+        """(response object, text actually sent) for one request body."""
+        messages = body.get("input") or []
+        system = next((m["content"] for m in messages if m.get("role") == "system"), "")
+        user = messages[-1]["content"] if messages else ""
+        level = _LEVEL.search(user)
+        items = self.make_items(requested_ids(user), requested_fields(user), level.group(1) if level else None)
+        text = json.dumps(items, ensure_ascii=False)
+        truncated = bool(items) and self._roll(self.truncation_rate)
+        if truncated:
+            with self._lock:
+                text = text[:self._rng.randint(1, len(text) - 1)]
+        time.sleep(self.latency + self.per_item_latency * len(items))
+
+        input_tokens = estimate_tokens(system, user)
+        cache_key = body.get("prompt_cache_key")
+        with self._lock:
+            # A repeated prompt_cache_key hits the provider cache for the system prefix.
+            cached = estimate_tokens(system) if cache_key in self._cache_keys else 0
+            if cache_key:
+                self._cache_keys.add(cache_key)
+            self.stats["requests"] += 1
+            self.stats["truncated"] += truncated
+            self.stats["items"] += len(items)
+        output_tokens = estimate_tokens(text)
+        response = {
+            "id": f"resp_stub_{self.stats['requests']}", "object": "response", "created_at": int(time.time()),
+            "model": body.get("model", "stub"), "status": "incomplete" if truncated else "completed",
+            "output": [{"type": "message", "id": "msg_stub", "role": "assistant", "status": "completed",
+                        "content": [{"type": "output_text", "text": text, "annotations": []}]}],
+            "parallel_tool_calls": False, "tool_choice": "auto", "tools": [],
+            "usage": {"input_tokens": input_tokens, "input_tokens_details": {"cached_tokens": cached},
+                      "output_tokens": output_tokens, "output_tokens_details": {"reasoning_tokens": 0},
+                      "total_tokens": input_tokens + output_tokens},
+        }
+        return response, text
+
+    def add_file(self, filename: str, purpose: str, content: bytes) -> dict:
+        """Store an uploaded file; returns its File object."""
+        with self._lock:
+            file_id = f"file-stub{next(self._ids)}"
+            self._files[file_id] = (filename, purpose, content)
+        return self.file_object(file_id)
+
+    def file_object(self, file_id: str) -> dict:
+        filename, purpose, content = self._files[file_id]
+        return {"id": file_id, "object": "file", "bytes": len(content), "created_at": int(time.time()),
+                "filename": filename, "purpose": purpose, "status": "processed"}
+
+    def create_batch(self, body: dict) -> dict:
+        """Start answering the requests of an uploaded input file; returns the Batch object."""
+        requests = [json.loads(line) for line in self._files[body["input_file_id"]][2].splitlines() if line.strip()]
+        with self._lock:
+            batch_id = f"batch_stub{next(self._ids)}"
+            batch = self._batches[batch_id] = {
+                "id": batch_id, "object": "batch", "endpoint": body.get("endpoint"), "errors": None,
+                "input_file_id": body["input_file_id"], "completion_window": body.get("completion_window"),
+                "status": "in_progress", "output_file_id": None, "error_file_id": None,
+                "created_at": int(time.time()), "metadata": body.get("metadata"),
+                "request_counts": {"total": len(requests), "completed": 0, "failed": 0},
+            }
+        threading.Thread(target=self._run_batch, args=(batch, requests), daemon=True).start()
+        return dict(batch)
+
+    def _run_batch(self, batch: dict, requests: list):
+        output, errors = [], []
+        for n, request in enumerate(requests, 1):
+            record = {"id": f"batch_req_{n}", "custom_id": request["custom_id"], "error": None}
+            if self._roll(self.error_rate):
+                time.sleep(self.latency)
+                with self._lock:
+                    self.stats["requests"] += 1
+                    self.stats["errors"] += 1
+                record["response"] = {"status_code": 429, "request_id": f"req_{n}", "body": {
+                    "error": {"message": "Rate limit reached (stub)", "type": "rate_limit"}}}
+                errors.append(record)
+            else:
+                response, _ = self.respond(request["body"])
+                record["response"] = {"status_code": 200, "request_id": f"req_{n}", "body": response}
+                output.append(record)
+            with self._lock:
+                batch["request_counts"] = {"total": len(requests), "completed": len(output), "failed": len(errors)}
+
+        def save(records):
+            if not records:
+                return None
+            content = "".join(json.dumps(r, ensure_ascii=False) + "\n" for r in records).encode("utf-8")
+            return self.add_file(f"{batch['id']}_output.jsonl", "batch_output", content)["id"]
+
+        output_file_id, error_file_id = save(output), save(errors)
+        with self._lock:
+            batch.update(status="completed", output_file_id=output_file_id, error_file_id=error_file_id,
+                         completed_at=int(time.time()))
+
+    def _handler(self):
+        server = self
+
+        class Handler(BaseHTTPRequestHandler):
+            protocol_version = "HTTP/1.1"
+
+            def log_message(self, *args):
+                pass
+
+            def send_json(self, obj, status=200, headers=None):
+                out = json.dumps(obj).encode()
+                self.send_response(status)
+                self.send_header("Content-Type", "application/json")
+                self.send_header("Content-Length", str(len(out)))
+                for name, value in (headers or {}).items():
+                    self.send_header(name, value)
+                self.end_headers()
+                self.wfile.write(out)
+
+            def send_event(self, event: dict):
+                self.wfile.write(f"event: {event['type']}\ndata: {json.dumps(event)}\n\n".encode())
+
+            def not_found(self):
+                return self.send_json({"error": {"message": f"unknown path {self.path}"}}, 404)
+
+            def do_GET(self):
+                parts = self.path.rstrip("/").split("/")
+                with server._lock:
+                    if parts[-2:-1] == ["batches"] and parts[-1] in server._batches:
+                        return self.send_json(dict(server._batches[parts[-1]]))
+                    if parts[-2:-1] == ["files"] and parts[-1] in server._files:
+                        return self.send_json(server.file_object(parts[-1]))
+                    if parts[-3:-2] == ["files"] and parts[-1] == "content" and parts[-2] in server._files:
+                        content = server._files[parts[-2]][2]
+                    else:
+                        return self.not_found()
+                self.send_response(200)
+                self.send_header("Content-Type", "application/octet-stream")
+                self.send_header("Content-Length", str(len(content)))
+                self.end_headers()
+                self.wfile.write(content)
+
+            def upload_file(self, raw: bytes):
+                """POST /files: a multipart form with `purpose` and `file` fields."""
+                form = BytesParser(policy=HTTP).parsebytes(
+                    f"Content-Type: {self.headers['Content-Type']}\r\n\r\n".encode() + raw)
+                fields = {part.get_param("name", header="content-disposition"): part for part in form.iter_parts()}
+                if "file" not in fields:
+                    return self.send_json({"error": {"message": "missing file"}}, 400)
+                purpose = fields["purpose"].get_content().strip() if "purpose" in fields else "batch"
+                return self.send_json(server.add_file(fields["file"].get_filename() or "upload.jsonl", purpose,
+                                                      fields["file"].get_payload(decode=True)))
+
+            def do_POST(self):
+                raw = self.rfile.read(int(self.headers.get("Content-Length", 0)))
+                path = self.path.rstrip("/")
+                if path.endswith("/files"):
+                    return self.upload_file(raw)
+                body = json.loads(raw or b"{}")
+                if path.endswith("/batches"):
+                    if body.get("input_file_id") not in server._files:
+                        return self.send_json({"error": {"message": "unknown input_file_id"}}, 400)
+                    return self.send_json(server.create_batch(body))
+                if not path.endswith("/responses"):
+                    return self.not_found()
+                if server._roll(server.error_rate):
+                    with server._lock:
+                        server.stats["requests"] += 1
+                        server.stats["errors"] += 1
+                    return self.send_json({"error": {"message": "Rate limit reached (stub)", "type": "rate_limit"}},
+                                          429, {"retry-after-ms": "100"})
+                response, text = server.respond(body)
+                if not body.get("stream"):
+                    return self.send_json(response)
+
+                self.send_response(200)
+                self.send_header("Content-Type", "text/event-stream")
+                self.send_header("Connection", "close")
+                self.end_headers()
+                seq = 0
+                for i in range(0, len(text), 64):
+                    self.send_event({"type": "response.output_text.delta", "delta": text[i:i + 64],
+                                     "item_id": "msg_stub", "output_index": 0, "content_index": 0,
+                                     "sequence_number": seq})
+                    seq += 1
+                kind = "response.completed" if response["status"] == "completed" else "response.incomplete"
+                self.send_event({"type": kind, "response": response, "sequence_number": seq})
+                self.wfile.flush()
+                self.close_connection = True
+
+        return Handler
+
+    def serve_forever(self):
+        self._httpd.serve_forever()
+
+    def start(self):
+        self._thread = threading.Thread(target=self._httpd.serve_forever, daemon=True)
+        self._thread.start()
+        return self
+
+    def stop(self):
+        self._httpd.shutdown()
+        self._httpd.server_close()
+
+    def __enter__(self):
+        return self.start()
+
+    def __exit__(self, *exc):
+        self.stop()
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Local stub of the OpenAI Responses API")
+    parser.add_argument("--port", type=int, default=8765)
+    parser.add_argument("--latency", type=float, default=0.2, help="Seconds per response")
+    parser.add_argument("--per-item-latency", type=float, default=0.0, help="Extra seconds per generated item")
+    parser.add_argument("--error-rate", type=float, default=0.0, help="Share of requests answered with a 429")
+    parser.add_argument("--truncation-rate", type=float, default=0.0, help="Share of responses cut off mid-array")
+    parser.add_argument("--seed", type=int, help="Random seed, for reproducible runs")
+    args = parser.parse_args()
+    server = StubServer(args.port, args.latency, args.per_item_latency, args.error_rate, args.truncation_rate,
+                        args.seed)
+    print(f"  Stub Responses API on {server.base_url} (Ctrl-C to stop)")
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,62 @@
+"""
+SLE AI Companion — Tests for the generate-dataset.py batch plan
+
+  python3 -m pytest scripts/sle/test_generate_dataset.py
+"""
+import argparse
+import importlib.util
+from pathlib import Path
+
+from checkpoint import CheckpointWriter
+from item_ids import ID_FIELD
+
+_spec = importlib.util.spec_from_file_location("generate_dataset", Path(__file__).with_name("generate-dataset.py"))
+gd = importlib.util.module_from_spec(_spec)
+_spec.loader.exec_module(gd)
+
+CELL = ("scenarios", "FR", "B")
+
+
+def items(numbers):
+    return [{ID_FIELD[CELL[0]]: gd.format_id(*CELL, i)} for i in numbers]
+
+
+def write_ranges(out_dir, start_idx, ranges):
+    """A manifest as left by an interrupted run: each (idx, n) range written in full."""
+    with CheckpointWriter(gd.output_file(*CELL, out_dir), start_idx=start_idx) as writer:
+        for idx, n in ranges:
+            writer.append(idx, n, items(range(idx, idx + n)))
+
+
+def test_resume_with_changed_batch_size(tmp_path, capsys):
+    write_ranges(tmp_path, 41, [(41, 5), (46, 5), (51, 5), (56, 5), (61, 5)])
+
+    args = argparse.Namespace(out_dir=tmp_path, resume=True, append=False, batch_size=8, mode="sync",
+                              adaptive=False)
+    gd.print_plan([CELL], {CELL: 40}, {CELL: 41}, args)
+    plan = capsys.readouterr().out
+    assert "25/40 IDs already done" in plan
+    assert "Plan: 2 batches, 15 items" in plan
+
+    cell = gd.Cell(*CELL, 40, 8, 41, resume=True, out_dir=tmp_path)
+    try:
+        assert cell.pending == [(66, 8), (74, 7)]
+        assert cell.todo == list(range(66, 81))
+    finally:
+        cell.writer.close()
+
+
+def test_resume_requests_the_ids_a_partial_batch_missed(tmp_path):
+    cell = gd.Cell(*CELL, 20, 10, 1, out_dir=tmp_path)
+    cell.write(1, 10, items([1, 2, 5, 6, 7, 8, 9]))
+    cell.write(11, 10, items(range(11, 21)))
+    cell.writer.close()
+
+    cell = gd.Cell(*CELL, 20, 10, 1, resume=True, out_dir=tmp_path)
+    try:
+        assert cell.pending == [(3, 2), (10, 1)]
+        assert cell.writer.items_written == 17
+        cell.write(3, 2, items([3, 4]))
+        assert gd.todo_indices(cell.writer.completed, 1, 20) == [10]
+    finally:
+        cell.writer.close()
@@ -0,0 +1,32 @@
+"""
+SLE AI Companion — Tests for the columnar seed corpus
+
+  python3 -m pytest scripts/sle/test_seed_corpus.py
+"""
+import json
+
+from seed_corpus import SeedCorpus, build_corpus
+
+
+def write_jsonl(path, records):
+    path.write_text("".join(json.dumps(r) + "\n" for r in records), encoding="utf-8")
+
+
+def test_rows_where_matches_upper_columns_in_any_case(tmp_path):
+    seed = tmp_path / "seed"
+    seed.mkdir()
+    write_jsonl(seed / "scenarios.jsonl", [
+        {"id": "S-1", "language": "fr", "target_level": "b", "topic_domain": "hr"},
+        {"id": "S-2", "language": "FR", "target_level": "C", "topic_domain": "HR"},
+        {"id": "S-3", "language": "EN", "target_level": "B", "topic_domain": "hr"},
+    ])
+    out = tmp_path / "corpus.bin"
+    build_corpus(out, seed)
+
+    with SeedCorpus(out) as corpus:
+        assert corpus.rows_where(language="fr") == [0, 1]
+        assert corpus.rows_where(language="FR") == [0, 1]
+        assert corpus.rows_where(language=["fr", "en"], target_level="b") == [0, 2]
+        # Other columns keep their case
+        assert corpus.rows_where(topic_domain="hr") == [0, 2]
+        assert corpus.rows_where(language="de") == []
@@ -15,16 +15,29 @@ Options:
     --force         Force la synchronisation même en cas de modifications locales
     --branch NAME   Spécifie la branche à synchroniser (défaut: main)
     --backup        Crée une sauvegarde avant la synchronisation
+    --jobs, -j N    Nombre de threads de copie pour la sauvegarde
+    --list-backups  Liste les sauvegardes
+    --restore NOM   Restaure une sauvegarde ("latest" pour la plus récente);
+                    exige --force sans --restore-to
+    --restore-to D  Restaure dans le dossier D plutôt que dans le projet
+    --prune N       Garde les N sauvegardes les plus récentes
+
+Sauvegardes:
+    Chaque contenu de fichier est stocké une seule fois dans
+    .sync-backups/objects/ (nommé par son SHA-256) et chaque sauvegarde est un
+    manifeste dans .sync-backups/snapshots/. Une sauvegarde ne copie donc que
+    ce qui a changé depuis la précédente (voir scripts/sync_backup.py).
 """
 
 import os
 import sys
 import subprocess
-import shutil
 import argparse
-from datetime import datetime
 from pathlib import Path
 
+from sync_backup import SnapshotStore
+from sync_copy import DEFAULT_WORKERS, format_bytes
+
 # Configuration
 GITHUB_REPO = "RusingAcademy/rusingacademy-ecosystem"
 DEFAULT_BRANCH = "main"
@@ -46,6 +59,9 @@ EXCLUDE_PATTERNS = [
     "WORKFLOW-MANUS-GITHUB-RAILWAY.md",
 ]
 
+# Noms jamais copiés dans une sauvegarde, à n'importe quelle profondeur
+BACKUP_IGNORE = {"node_modules", ".git"}
+
 # Fichiers à préserver (ne jamais écraser)
 PRESERVE_FILES = [
     "todo.md",
@@ -144,27 +160,81 @@ def get_remote_commit(branch):
     return stdout[:8] if success else None
 
 
-def create_backup():
-    """Crée une sauvegarde du projet avant synchronisation"""
-    timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
-    backup_path = BACKUP_DIR / f"backup_{timestamp}"
-    
-    BACKUP_DIR.mkdir(exist_ok=True)
-    
+def iter_backup_files(src):
+    """Paires (fichier, chemin relatif au projet) sous src, sans node_modules ni .git"""
+    for root, dirs, files in os.walk(src):
+        dirs[:] = [d for d in dirs if d not in BACKUP_IGNORE]
+        for name in files:
+            if name not in BACKUP_IGNORE:
+                path = Path(root) / name
+                yield path, path.relative_to(PROJECT_ROOT).as_posix()
+
+
+def create_backup(workers=DEFAULT_WORKERS):
+    """Crée une sauvegarde du projet avant synchronisation.
+
+    Seuls les contenus absents du magasin .sync-backups/objects sont copiés;
+    la sauvegarde elle-même est un manifeste. Retourne (nom, SnapshotStats).
+    """
     # Copier les fichiers importants
     files_to_backup = ["client/", "server/", "shared/", "drizzle/", "package.json"]
     
-    for file_pattern in files_to_backup:
-        src = PROJECT_ROOT / file_pattern
-        if src.exists():
-            dst = backup_path / file_pattern
+    def files():
+        for file_pattern in files_to_backup:
+            src = PROJECT_ROOT / file_pattern
             if src.is_dir():
-                shutil.copytree(src, dst, ignore=shutil.ignore_patterns('node_modules', '.git'))
-            else:
-                dst.parent.mkdir(parents=True, exist_ok=True)
-                shutil.copy2(src, dst)
+                yield from iter_backup_files(src)
+            elif src.exists():
+                yield src, src.relative_to(PROJECT_ROOT).as_posix()
     
-    return backup_path
+    return SnapshotStore(BACKUP_DIR, workers).snapshot(files())
+
+
+def list_backups():
+    """Affiche les sauvegardes disponibles"""
+    store = SnapshotStore(BACKUP_DIR)
+    names = store.list_snapshots()
+    if not names:
+        print_info(f"Aucune sauvegarde dans {store.snapshots}")
+        return True
+    for name in names:
+        files = store.load_manifest(name)["files"]
+        size = sum(entry["size"] for entry in files.values())
+        print(f"  • {name}  {len(files)} fichiers, {format_bytes(size)}")
+    return True
+
+
+def restore_backup(args):
+    """Restaure une sauvegarde dans le projet (ou --restore-to)"""
+    store = SnapshotStore(BACKUP_DIR, args.jobs)
+    name = store.resolve(args.restore)
+    if name is None:
+        print_error(f"Sauvegarde introuvable ou ambiguë: {args.restore}")
+        return False
+    dest = args.restore_to or PROJECT_ROOT
+    if dest == PROJECT_ROOT and not args.force and not args.dry_run:
+        print_error("Utilisez --force pour restaurer dans le projet (ou --restore-to DOSSIER)")
+        return False
+    restored, stats = store.restore(name, dest, dry_run=args.dry_run)
+    verb = "à restaurer" if args.dry_run else "restaurés"
+    for rel in restored[:20]:
+        print(f"  • {rel}")
+    if len(restored) > 20:
+        print(f"  ... et {len(restored) - 20} autres fichiers")
+    print_success(f"{name}: {len(restored)} fichiers {verb} ({format_bytes(stats.stored_bytes)}), "
+                  f"{stats.reused} déjà à jour, dans {dest}")
+    return True
+
+
+def prune_backups(args):
+    """Garde les N sauvegardes les plus récentes et supprime les contenus orphelins"""
+    store = SnapshotStore(BACKUP_DIR)
+    deleted, objects, freed = store.prune(args.prune, dry_run=args.dry_run)
+    prefix = "[DRY-RUN] " if args.dry_run else ""
+    for name in deleted:
+        print(f"  • {name}")
+    print_success(f"{prefix}{len(deleted)} sauvegardes et {objects} objets supprimés ({format_bytes(freed)} libérés)")
+    return True
 
 
 def fetch_github_changes(branch):
@@ -276,8 +346,9 @@ def sync_from_github(args):
     # Créer une sauvegarde si demandé
     if args.backup:
         print_info("Création d'une sauvegarde...")
-        backup_path = create_backup()
-        print_success(f"Sauvegarde créée: {backup_path}")
+        backup_name, stats = create_backup(args.jobs)
+        print_success(f"Sauvegarde créée: {backup_name}")
+        print_info(f"Contenu: {stats.summary()}")
     
     # Fusionner les modifications
     print_info("Fusion des modifications...")
@@ -333,11 +404,46 @@ def main():
         action="store_true",
         help="Crée une sauvegarde avant la synchronisation"
     )
+    parser.add_argument(
+        "-j", "--jobs",
+        type=int,
+        default=DEFAULT_WORKERS,
+        help=f"Nombre de threads de copie pour la sauvegarde (défaut: {DEFAULT_WORKERS})"
+    )
+    parser.add_argument(
+        "--list-backups",
+        action="store_true",
+        help="Liste les sauvegardes"
+    )
+    parser.add_argument(
+        "--restore",
+        metavar="NOM",
+        help="Restaure une sauvegarde (\"latest\" pour la plus récente)"
+    )
+    parser.add_argument(
+        "--restore-to",
+        type=Path,
+        metavar="DOSSIER",
+        help="Dossier de destination de --restore (défaut: le projet, avec --force)"
+    )
+    parser.add_argument(
+        "--prune",
+        type=int,
+        metavar="N",
+        help="Garde les N sauvegardes les plus récentes et supprime les contenus orphelins"
+    )
     
     args = parser.parse_args()
     
     try:
-        success = sync_from_github(args)
+        if args.list_backups:
+            success = list_backups()
+        elif args.restore:
+            success = restore_backup(args)
+        elif args.prune is not None:
+            success = prune_backups(args)
+        else:
+            success = sync_from_github(args)
         sys.exit(0 if success else 1)
     except KeyboardInterrupt:
         print_warning("\nSynchronisation annulée par l'utilisateur")
@@ -6,20 +6,30 @@ MANUS → GITHUB SYNCHRONIZATION SCRIPT
 This script synchronizes changes from the Manus project to GitHub.
 
 Usage:
-    python3 scripts/sync-to-github.py [--message "commit message"] [--dry-run]
+    python3 scripts/sync-to-github.py [--message "commit message"] [--dry-run] [--full] [--gitignore]
+                                      [--fresh] [--mirror-dir DIR] [--remote URL] [-j N]
 
 Options:
     --message, -m    Custom commit message (default: auto-generated)
     --dry-run        Show what would be done without making changes
     --force          Skip confirmation prompt
+    --full           Wipe the clone and re-copy every file (pre-incremental behaviour)
+    --gitignore      Also exclude what the project's .gitignore ignores
+    --fresh          Delete the local mirror and clone it again
+    --mirror-dir     Where the persistent mirror lives (default: MIRROR_DIR)
+    --jobs, -j       Number of copy threads (default: DEFAULT_WORKERS)
+    --remote         Push to this git URL or path instead of GITHUB_REPO (e.g. a
+                     local bare repository in tests); gh is not needed then
 
 Prerequisites:
-    - GitHub CLI (gh) must be installed and authenticated
+    - GitHub CLI (gh) must be installed and authenticated (unless --remote)
     - Git must be configured with user.name and user.email
 
 Workflow:
-    1. Creates a temporary clone of the GitHub repository
-    2. Copies all source files from Manus project (excluding node_modules, etc.)
+    1. Updates the persistent mirror of the GitHub repository with a shallow
+       fetch and resets it to the remote branch (cloning it on first use)
+    2. Copies new and changed source files from the Manus project (excluding
+       node_modules, etc.) and deletes files that no longer exist there
     3. Commits and pushes changes to GitHub
     4. Railway automatically deploys from GitHub
 
@@ -28,20 +38,29 @@ Date: January 25, 2026
 """
 
 import os
+import re
 import sys
+import stat
 import shutil
+import shlex
+import hashlib
 import subprocess
 import argparse
 from datetime import datetime
 from pathlib import Path
+from urllib.parse import unquote, urlparse
+
+from sync_copy import DEFAULT_WORKERS, CopyEngine
 
 # Configuration
 GITHUB_REPO = "RusingAcademy/rusingacademy-ecosystem"
 MANUS_PROJECT_DIR = Path("/home/ubuntu/ecosystemhub-preview")
-TEMP_DIR = Path("/home/ubuntu/github-sync-temp")
+MIRROR_DIR = Path("/home/ubuntu/github-sync-mirror")
 BRANCH = "main"
 
-# Files and directories to exclude from sync
+# Files and directories to exclude from sync. Glob patterns: without a '/'
+# they match a file or directory name anywhere, with one they match the
+# path relative to the project root. Excluded directories are not entered.
 EXCLUDE_PATTERNS = [
     'node_modules',
     '.git',
@@ -102,43 +121,315 @@ def run_command(cmd, cwd=None, capture_output=False):
             print(e.stderr)
         raise
 
-def should_exclude(path, base_path):
-    """Check if a path should be excluded from sync."""
-    rel_path = str(path.relative_to(base_path))
-    
-    for pattern in EXCLUDE_PATTERNS:
-        if pattern.startswith('*'):
-            # Wildcard pattern (e.g., *.log)
-            if rel_path.endswith(pattern[1:]):
-                return True
-        elif pattern in rel_path.split(os.sep):
-            # Directory or file name match
-            return True
-        elif rel_path == pattern:
-            # Exact match
+def _glob_to_regex(glob):
+    """Translate a path glob to a regex: * and ? stop at '/', ** crosses it."""
+    parts, i = [], 0
+    while i < len(glob):
+        if glob.startswith('**/', i):
+            parts.append('(?:.*/)?')
+            i += 3
+        elif glob.startswith('**', i):
+            parts.append('.*')
+            i += 2
+        elif glob[i] == '*':
+            parts.append('[^/]*')
+            i += 1
+        elif glob[i] == '?':
+            parts.append('[^/]')
+            i += 1
+        elif glob[i] == '[' and ']' in glob[i + 2:]:
+            end = glob.index(']', i + 2)
+            body = glob[i + 1:end]
+            if body.startswith('!'):
+                body = '^' + body[1:]
+            parts.append('[' + body.replace('\\', '\\\\') + ']')
+            i = end + 1
+        else:
+            parts.append(re.escape(glob[i]))
+            i += 1
+    return ''.join(parts)
+
+def _compile_rule(pattern, gitignore=False):
+    """(regex, negate, dir_only) for one pattern, or None for blanks and comments.
+
+    Patterns without an inner '/' match a name at any depth; others are
+    anchored at the project root. With gitignore=True, '!' negates and a
+    trailing '/' matches directories only, as in .gitignore.
+    """
+    pattern = pattern.rstrip('\n')
+    if gitignore:
+        pattern = pattern.rstrip(' ')
+        if not pattern or pattern.startswith('#'):
+            return None
+    negate = gitignore and pattern.startswith('!')
+    if negate:
+        pattern = pattern[1:]
+    elif gitignore and pattern.startswith('\\'):
+        pattern = pattern[1:]
+    dir_only = pattern.endswith('/')
+    pattern = pattern.strip('/') if dir_only else pattern
+    if not pattern:
+        return None
+    anchored = '/' in pattern
+    regex = _glob_to_regex(pattern.lstrip('/'))
+    if not anchored:
+        regex = '(?:.*/)?' + regex
+    return regex, negate, dir_only
+
+class ExcludeMatcher:
+    """EXCLUDE_PATTERNS (plus optional .gitignore lines) compiled once.
+
+    Paths are relative and '/'-separated. Without negations every rule is
+    folded into one regex per kind (any path / directories only); with
+    negations the rules are tried last to first, as git does.
+    """
+
+    def __init__(self, patterns=(), gitignore_lines=()):
+        self.rules = [r for r in (_compile_rule(p) for p in patterns) if r]
+        self.rules += [r for r in (_compile_rule(l, gitignore=True) for l in gitignore_lines) if r]
+        self.ordered = any(negate for _, negate, _ in self.rules)
+        if self.ordered:
+            self.compiled = [(re.compile(regex), negate, dir_only) for regex, negate, dir_only in self.rules]
+        else:
+            self.any_path = self._union(regex for regex, _, dir_only in self.rules if not dir_only)
+            self.dir_path = self._union(regex for regex, _, dir_only in self.rules if dir_only)
+
+    @staticmethod
+    def _union(regexes):
+        regexes = list(regexes)
+        return re.compile('|'.join(f'(?:{r})' for r in regexes)) if regexes else None
+
+    @classmethod
+    def for_project(cls, src, use_gitignore=False):
+        lines = ()
+        gitignore = Path(src) / '.gitignore'
+        if use_gitignore and gitignore.is_file():
+            lines = gitignore.read_text(encoding='utf-8', errors='replace').splitlines()
+        return cls(EXCLUDE_PATTERNS, lines)
+
+    def excluded(self, rel_path, is_dir=False):
+        if self.ordered:
+            for regex, negate, dir_only in reversed(self.compiled):
+                if (is_dir or not dir_only) and regex.fullmatch(rel_path):
+                    return not negate
+            return False
+        return bool((self.any_path and self.any_path.fullmatch(rel_path))
+                    or (is_dir and self.dir_path and self.dir_path.fullmatch(rel_path)))
+
+    def walk(self, src):
+        """Yield the relative paths of the non-excluded files under src,
+        without descending into excluded directories."""
+        src = Path(src)
+        stack = ['']
+        while stack:
+            prefix = stack.pop()
+            try:
+                entries = list(os.scandir(src / prefix if prefix else src))
+            except OSError:
+                continue
+            for entry in entries:
+                rel_path = prefix + entry.name
+                if entry.is_dir(follow_symlinks=False):
+                    if not self.excluded(rel_path, is_dir=True):
+                        stack.append(rel_path + '/')
+                elif entry.is_file() and not self.excluded(rel_path):
+                    yield Path(rel_path)
+
+EXCLUDES = ExcludeMatcher(EXCLUDE_PATTERNS)
+
+def copy_project_files(src, dst, matcher=EXCLUDES, workers=DEFAULT_WORKERS):
+    """Copy project files excluding specified patterns; returns a CopyReport."""
+    pairs = ((src / rel_path, dst / rel_path) for rel_path in matcher.walk(src))
+    return CopyEngine(workers).run(pairs)
+
+def file_digest(path, chunk_size=1 << 20):
+    """SHA-256 of a file's content."""
+    digest = hashlib.sha256()
+    with open(path, 'rb') as f:
+        for chunk in iter(lambda: f.read(chunk_size), b''):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+def files_match(src_path, dst_path):
+    """True if dst_path already holds src_path's content and executable bit.
+
+    Same size and mtime is taken as unchanged. When only the mtime differs
+    (e.g. a fresh clone), the contents are hashed, and on a match the source
+    mtime is copied over so the next run takes the fast path.
+    """
+    try:
+        dst_stat = dst_path.stat()
+    except (FileNotFoundError, NotADirectoryError):
+        return False  # missing, or a parent is a file that copy_file() will replace
+    if not stat.S_ISREG(dst_stat.st_mode):
+        return False
+    src_stat = src_path.stat()
+    if src_stat.st_size != dst_stat.st_size or (src_stat.st_mode ^ dst_stat.st_mode) & 0o111:
+        return False
+    if src_stat.st_mtime_ns == dst_stat.st_mtime_ns:
+        return True
+    if file_digest(src_path) != file_digest(dst_path):
+        return False
+    shutil.copystat(src_path, dst_path)
+    return True
+
+def sync_project_files(src, dst, matcher=EXCLUDES, workers=DEFAULT_WORKERS):
+    """Make dst (apart from .git) mirror the synced files of src.
+
+    Compares and copies new and changed files on `workers` threads, then
+    deletes only files that are no longer synced. Returns (copied, deleted,
+    report) where copied and deleted are lists of relative paths and report
+    is the CopyReport of the copy pass.
+    """
+    wanted = set()
+
+    def pairs():
+        for rel_path in matcher.walk(src):
+            wanted.add(rel_path)
+            yield src / rel_path, dst / rel_path
+
+    report = CopyEngine(workers, unchanged=files_match).run(pairs())
+    copied = [path.relative_to(dst) for path in report.copied]
+
+    deleted = []
+    for root, dirs, files in os.walk(dst):
+        root = Path(root)
+        if root == dst and '.git' in dirs:
+            dirs.remove('.git')
+        for name in files:
+            rel_path = (root / name).relative_to(dst)
+            if rel_path not in wanted:
+                (root / name).unlink()
+                deleted.append(rel_path)
+    for parent in sorted({p.parent for p in deleted}, key=lambda p: len(p.parts), reverse=True):
+        # Drop directories emptied by the deletions, innermost first
+        while parent.parts and (dst / parent).is_dir() and not any((dst / parent).iterdir()):
+            (dst / parent).rmdir()
+            parent = parent.parent
+
+    return copied, deleted, report
+
+def stage_paths(repo, paths):
+    """git add -A only the given relative paths (additions, changes and deletions).
+
+    Paths the clone's .gitignore ignores are dropped first, as a plain
+    `git add -A` would skip them; naming them explicitly is an error.
+    """
+    if not paths:
+        return
+    pathspec = '\0'.join(p.as_posix() for p in paths)
+    ignored = subprocess.run(['git', 'check-ignore', '--stdin', '-z'],
+                             cwd=repo, input=pathspec, capture_output=True, text=True).stdout
+    if ignored:
+        skip = set(ignored.split('\0'))
+        pathspec = '\0'.join(p for p in pathspec.split('\0') if p not in skip)
+        if not pathspec:
+            return
+    subprocess.run(['git', 'add', '-A', '--pathspec-from-file=-', '--pathspec-file-nul'],
+                   cwd=repo, input=pathspec, text=True, check=True)
+
+def remote_url(remote=None):
+    """What the mirror tracks: --remote if given, else the GITHUB_REPO slug."""
+    return remote or GITHUB_REPO
+
+def git_output(args, cwd):
+    """stdout of a git command, or None if it fails."""
+    result = subprocess.run(['git', *args], cwd=cwd, capture_output=True, text=True)
+    return result.stdout.strip() if result.returncode == 0 else None
+
+_URL = re.compile(r'[a-z][a-z0-9+.-]*://(?:[^@/]*@)?([^/:]+)(?::\d+)?/(.+)', re.IGNORECASE)
+_SCP = re.compile(r'(?:[^@/]+@)?([^/:]+):(?!//)(.+)')  # git@github.com:owner/name
+
+def local_path(value):
+    """The resolved directory a remote refers to, or None for a host URL or owner/name slug."""
+    value = value.strip()
+    if value.startswith('file://'):
+        return Path(unquote(urlparse(value).path)).resolve()
+    if _URL.fullmatch(value) or _SCP.fullmatch(value):
+        return None
+    path = Path(value).expanduser()
+    if value.startswith(('/', '.', '~')) or path.exists():
+        return path.resolve()
+    return None
+
+def host_path(value):
+    """(host, repository path) of a host URL in lower case without .git, or None."""
+    value = value.strip().rstrip('/')
+    match = _URL.fullmatch(value) or _SCP.fullmatch(value)
+    if not match:
+        return None
+    path = match.group(2).lower()
+    return match.group(1).lower(), path[:-4] if path.endswith('.git') else path
+
+def same_remote(origin, url):
+    """True if the origin URL points at url (a URL, a path or an owner/name slug).
+
+    Paths are compared once resolved, URLs by host and repository path
+    whatever their scheme, and a slug only against the whole repository path.
+    """
+    origin_path, url_path = local_path(origin), local_path(url)
+    if origin_path is not None or url_path is not None:
+        return origin_path == url_path
+    origin_repo = host_path(origin)
+    if origin_repo is None:
+        return False
+    url_repo = host_path(url)
+    if url_repo is None:
+        slug = url.strip().strip('/').lower()
+        return origin_repo[1] == (slug[:-4] if slug.endswith('.git') else slug)
+    return origin_repo == url_repo
+
+def mirror_is_usable(mirror, url):
+    """True if mirror is a git checkout whose origin is url."""
+    origin = git_output(['remote', 'get-url', 'origin'], mirror) if (mirror / '.git').is_dir() else None
+    return origin is not None and same_remote(origin, url)
+
+def clone_mirror(mirror, url, branch, use_gh):
+    """Shallow, single-branch clone of the remote into mirror."""
+    if mirror.exists():
+        shutil.rmtree(mirror)
+    mirror.parent.mkdir(parents=True, exist_ok=True)
+    clone_args = f"--branch {shlex.quote(branch)} --single-branch --depth 1"
+    if use_gh:
+        run_command(f"gh repo clone {GITHUB_REPO} {shlex.quote(str(mirror))} -- {clone_args}")
+    else:
+        if local_path(url) is not None:
+            url = local_path(url).as_uri()  # --depth is ignored for plain local paths
+        run_command(f"git clone -q {clone_args} {shlex.quote(url)} {shlex.quote(str(mirror))}")
+
+def update_mirror(mirror, url, branch, use_gh=True, fresh=False):
+    """Bring the persistent mirror to the tip of the remote branch.
+
+    An existing mirror gets a depth-1 fetch of the branch, then a hard
+    reset and clean, so leftovers of an aborted run are dropped. A missing
+    or foreign mirror, or one whose fetch fails, is cloned again.
+    Returns True if the mirror was reused.
+    """
+    if not fresh and mirror_is_usable(mirror, url):
+        refspec = f"+refs/heads/{branch}:refs/remotes/origin/{branch}"
+        try:
+            run_command(f"git fetch --depth 1 --no-tags origin {shlex.quote(refspec)}", cwd=mirror)
+            run_command(f"git checkout -q -B {shlex.quote(branch)} origin/{shlex.quote(branch)}", cwd=mirror)
+            run_command("git reset -q --hard", cwd=mirror)
+            # Not -x: gitignored files copied by the last sync stay, so they are not re-copied
+            run_command("git clean -q -fd", cwd=mirror)
             return True
-    
+        except subprocess.CalledProcessError:
+            log_warning("Could not update the mirror, cloning it again")
+    clone_mirror(mirror, url, branch, use_gh)
     return False
 
-def copy_project_files(src, dst):
-    """Copy project files excluding specified patterns."""
-    copied_files = 0
-    
-    for item in src.rglob('*'):
-        if item.is_file() and not should_exclude(item, src):
-            rel_path = item.relative_to(src)
-            dst_path = dst / rel_path
-            dst_path.parent.mkdir(parents=True, exist_ok=True)
-            shutil.copy2(item, dst_path)
-            copied_files += 1
-    
-    return copied_files
-
 def main():
     parser = argparse.ArgumentParser(description='Sync Manus project to GitHub')
     parser.add_argument('-m', '--message', help='Commit message')
     parser.add_argument('--dry-run', action='store_true', help='Show what would be done')
     parser.add_argument('--force', action='store_true', help='Skip confirmation')
+    parser.add_argument('--full', action='store_true', help='Wipe the clone and re-copy every file')
+    parser.add_argument('--gitignore', action='store_true', help="Also exclude what the project's .gitignore ignores")
+    parser.add_argument('--fresh', action='store_true', help='Delete the local mirror and clone it again')
+    parser.add_argument('--mirror-dir', type=Path, default=MIRROR_DIR, help='Persistent mirror directory')
+    parser.add_argument('--remote', help='Git URL or path to sync to instead of GITHUB_REPO')
+    parser.add_argument('-j', '--jobs', type=int, default=DEFAULT_WORKERS, help='Number of copy threads')
     args = parser.parse_args()
 
     # Generate commit message
@@ -155,22 +446,28 @@ def main():
         log_warning("DRY RUN MODE - No changes will be made")
         print()
 
+    mirror = args.mirror_dir
+    url = remote_url(args.remote)
+
     # Step 1: Verify prerequisites
     log_info("Verifying prerequisites...")
-    try:
-        run_command("gh auth status", capture_output=True)
-        log_success("GitHub CLI authenticated")
-    except:
-        log_error("GitHub CLI not authenticated. Run 'gh auth login' first.")
-        sys.exit(1)
-
-    # Step 2: Clean up temp directory
-    log_info("Cleaning up temporary directory...")
-    if TEMP_DIR.exists():
-        shutil.rmtree(TEMP_DIR)
+    if args.remote:
+        log_info(f"Syncing to {url}")
+    else:
+        try:
+            run_command("gh auth status", capture_output=True)
+            log_success("GitHub CLI authenticated")
+        except:
+            log_error("GitHub CLI not authenticated. Run 'gh auth login' first.")
+            sys.exit(1)
+
+    matcher = ExcludeMatcher.for_project(MANUS_PROJECT_DIR, use_gitignore=args.gitignore)
 
     if args.dry_run:
-        log_info(f"Would clone {GITHUB_REPO} to {TEMP_DIR}")
+        if not args.fresh and mirror_is_usable(mirror, url):
+            log_info(f"Would fetch {BRANCH} into the mirror at {mirror}")
+        else:
+            log_info(f"Would clone {url} to {mirror}")
         log_info(f"Would copy files from {MANUS_PROJECT_DIR}")
         log_info(f"Would commit with message: {commit_message}")
         log_info(f"Would push to {BRANCH} branch")
@@ -178,32 +475,45 @@ def main():
         log_success("Dry run complete!")
         return
 
-    # Step 3: Clone repository
-    log_info(f"Cloning GitHub repository: {GITHUB_REPO}")
-    run_command(f"gh repo clone {GITHUB_REPO} {TEMP_DIR} -- --branch {BRANCH} --single-branch")
-
-    # Step 4: Remove old files (except .git)
-    log_info("Preparing sync directory...")
-    for item in TEMP_DIR.iterdir():
-        if item.name != '.git':
-            if item.is_dir():
-                shutil.rmtree(item)
-            else:
-                item.unlink()
-
-    # Step 5: Copy files from Manus project
-    log_info("Copying files from Manus project...")
-    copied = copy_project_files(MANUS_PROJECT_DIR, TEMP_DIR)
-    log_info(f"Copied {copied} files")
-
-    # Step 6: Check for changes
-    log_info("Checking for changes...")
-    run_command("git add -A", cwd=TEMP_DIR)
+    # Steps 2-3: Update (or create) the persistent mirror
+    log_info(f"Updating mirror of {url}...")
+    if update_mirror(mirror, url, BRANCH, use_gh=not args.remote, fresh=args.fresh):
+        log_success(f"Mirror at {mirror} is at origin/{BRANCH}")
+    else:
+        log_success(f"Cloned {url} to {mirror}")
+
+    if args.full:
+        # Step 4: Remove old files (except .git)
+        log_info("Preparing sync directory...")
+        for item in mirror.iterdir():
+            if item.name != '.git':
+                if item.is_dir():
+                    shutil.rmtree(item)
+                else:
+                    item.unlink()
+
+        # Step 5: Copy files from Manus project
+        log_info("Copying files from Manus project...")
+        report = copy_project_files(MANUS_PROJECT_DIR, mirror, matcher, args.jobs)
+        log_info(f"Copy: {report.summary()}")
+
+        # Step 6: Check for changes
+        log_info("Checking for changes...")
+        run_command("git add -A", cwd=mirror)
+    else:
+        # Steps 4-5: Copy only new and changed files, delete removed ones
+        log_info("Syncing changed files from Manus project...")
+        copied, deleted, report = sync_project_files(MANUS_PROJECT_DIR, mirror, matcher, args.jobs)
+        log_info(f"Copy: {report.summary()}")
+        log_info(f"Deleted {len(deleted)} files")
+
+        # Step 6: Check for changes
+        log_info("Checking for changes...")
+        stage_paths(mirror, copied + deleted)
     
     try:
-        run_command("git diff --cached --quiet", cwd=TEMP_DIR)
+        run_command("git diff --cached --quiet", cwd=mirror)
         log_warning("No changes detected. Nothing to sync.")
-        shutil.rmtree(TEMP_DIR)
         return
     except subprocess.CalledProcessError:
         pass  # Changes exist, continue
@@ -212,7 +522,7 @@ def main():
     print()
     log_info("Changes to be committed:")
     print("-" * 40)
-    diff_stat = run_command("git diff --cached --stat", cwd=TEMP_DIR, capture_output=True)
+    diff_stat = run_command("git diff --cached --stat", cwd=mirror, capture_output=True)
     print(diff_stat)
     print("-" * 40)
     print()
@@ -222,26 +532,25 @@ def main():
         response = input(f"{Colors.YELLOW}Proceed with sync? [y/N]: {Colors.NC}")
         if response.lower() != 'y':
             log_warning("Sync cancelled by user")
-            shutil.rmtree(TEMP_DIR)
             return
 
     # Step 9: Commit changes
     log_info("Committing changes...")
-    run_command(f'git commit -m "{commit_message}"', cwd=TEMP_DIR)
+    run_command(f'git commit -m "{commit_message}"', cwd=mirror)
 
     # Step 10: Push to GitHub
     log_info("Pushing to GitHub...")
-    run_command(f"git push origin {BRANCH}", cwd=TEMP_DIR)
+    run_command(f"git push origin {BRANCH}", cwd=mirror)
 
     # Step 11: Get new commit SHA
-    new_commit = run_command("git rev-parse HEAD", cwd=TEMP_DIR, capture_output=True).strip()
+    new_commit = run_command("git rev-parse HEAD", cwd=mirror, capture_output=True).strip()
 
     print()
     print("=" * 50)
     print("  SYNCHRONIZATION COMPLETE")
     print("=" * 50)
     print()
-    print(f"  Repository: {GITHUB_REPO}")
+    print(f"  Repository: {args.remote or GITHUB_REPO}")
     print(f"  Branch: {BRANCH}")
     print(f"  Commit: {new_commit}")
     print(f"  Message: {commit_message}")
@@ -251,10 +560,6 @@ def main():
     print()
     print("=" * 50)
 
-    # Step 12: Cleanup
-    log_info("Cleaning up temporary directory...")
-    shutil.rmtree(TEMP_DIR)
-
     log_success("Done!")
 
 if __name__ == "__main__":
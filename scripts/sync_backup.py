@@ -0,0 +1,219 @@
+"""
+CONTENT-ADDRESSED BACKUP STORE
+==============================
+
+Used by sync-from-github.py --backup. A full copy of client/, server/,
+shared/ and drizzle/ on every sync is slow and grows the backup directory
+by the whole project each time, although only a handful of files change
+between syncs. SnapshotStore keeps each distinct file content once:
+
+    .sync-backups/
+        objects/ab/cdef...       file contents, named by their SHA-256
+        snapshots/backup_<ts>.json
+                                 one manifest per backup: for every file its
+                                 relative path, hash, size, mtime and mode
+
+A new snapshot only stats files whose size and mtime match the previous
+manifest (their hash is reused), hashes the others, and copies a file into
+objects/ only if that content is not stored yet. Backup time and disk usage
+therefore follow what changed since the last backup.
+
+restore() writes a snapshot's files back (skipping files that already hold
+the right content); prune() keeps the newest snapshots and deletes the
+objects no remaining snapshot refers to. Legacy full-copy backup_<ts>/
+directories are left untouched.
+"""
+
+import hashlib
+import json
+import os
+import re
+import time
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime
+from pathlib import Path
+
+from sync_copy import DEFAULT_WORKERS, copy_file, format_bytes
+
+MANIFEST_VERSION = 1
+
+_SNAPSHOT_NAME = re.compile(r'(backup_\d{8}_\d{6})(?:_(\d+))?')
+
+def snapshot_order(name):
+    """Sort key of a snapshot name: its timestamp, then its collision number
+    (backup_<ts>, backup_<ts>_2, ..., backup_<ts>_10), numerically."""
+    match = _SNAPSHOT_NAME.fullmatch(name)
+    if not match:
+        return name, 0
+    return match.group(1), int(match.group(2) or 1)
+
+def file_sha256(path, chunk_size=1 << 20):
+    digest = hashlib.sha256()
+    with open(path, 'rb') as f:
+        for chunk in iter(lambda: f.read(chunk_size), b''):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+class SnapshotStats:
+    """Counters of one snapshot() or restore() run."""
+
+    def __init__(self):
+        self.files = 0
+        self.reused = 0      # hash taken from the previous manifest (stat only)
+        self.stored = 0      # new contents written to objects/
+        self.stored_bytes = 0
+        self.total_bytes = 0
+        self.elapsed = 0.0
+
+    def summary(self):
+        return (f"{self.files} files ({format_bytes(self.total_bytes)}), {self.reused} unchanged, "
+                f"{self.stored} new objects ({format_bytes(self.stored_bytes)}) in {self.elapsed:.2f}s")
+
+class SnapshotStore:
+    """Deduplicated snapshots of a set of project paths under `root`."""
+
+    def __init__(self, root, workers=DEFAULT_WORKERS):
+        self.root = Path(root)
+        self.objects = self.root / 'objects'
+        self.snapshots = self.root / 'snapshots'
+        self.workers = max(1, workers)
+
+    def object_path(self, sha):
+        return self.objects / sha[:2] / sha[2:]
+
+    def list_snapshots(self):
+        """Snapshot names, oldest first."""
+        if not self.snapshots.is_dir():
+            return []
+        return sorted((p.stem for p in self.snapshots.glob('backup_*.json')), key=snapshot_order)
+
+    def resolve(self, name):
+        """Snapshot name for `name` ('latest', a full name or a unique prefix/suffix), or None."""
+        names = self.list_snapshots()
+        if name == 'latest':
+            return names[-1] if names else None
+        if name in names:
+            return name
+        matches = [n for n in names if name in n]
+        return matches[0] if len(matches) == 1 else None
+
+    def load_manifest(self, name):
+        return json.loads((self.snapshots / f"{name}.json").read_text())
+
+    def _store_one(self, path, rel, previous):
+        """(rel, entry, how) for one file, `how` being 'reused' (previous hash, stat only),
+        'present' (content already stored) or 'stored' (content copied now)."""
+        st = path.stat()
+        entry = previous.get(rel)
+        if entry and entry['size'] == st.st_size and entry['mtime_ns'] == st.st_mtime_ns:
+            return rel, dict(entry, mode=st.st_mode & 0o7777), 'reused'
+        sha = file_sha256(path)
+        entry = {'sha256': sha, 'size': st.st_size, 'mtime_ns': st.st_mtime_ns, 'mode': st.st_mode & 0o7777}
+        target = self.object_path(sha)
+        if target.exists():
+            return rel, entry, 'present'
+        tmp = target.with_name(f"{target.name}.{os.getpid()}.{id(entry)}.tmp")
+        copy_file(path, tmp)
+        os.replace(tmp, target)
+        return rel, entry, 'stored'
+
+    def snapshot(self, files, name=None):
+        """Record (path, relative name) pairs as a new snapshot; returns (name, SnapshotStats)."""
+        stats = SnapshotStats()
+        start = time.perf_counter()
+        names = self.list_snapshots()
+        previous = self.load_manifest(names[-1])['files'] if names else {}
+
+        entries = {}
+        with ThreadPoolExecutor(max_workers=self.workers) as pool:
+            for rel, entry, how in pool.map(lambda f: self._store_one(f[0], f[1], previous), files):
+                entries[rel] = entry
+                stats.files += 1
+                stats.total_bytes += entry['size']
+                if how == 'reused':
+                    stats.reused += 1
+                elif how == 'stored':
+                    stats.stored += 1
+                    stats.stored_bytes += entry['size']
+
+        name = name or f"backup_{datetime.now().strftime('%Y%m%d_%H%M%S')}"
+        base, n = name, 1
+        while (self.snapshots / f"{name}.json").exists():
+            n += 1
+            name = f"{base}_{n}"
+        self.snapshots.mkdir(parents=True, exist_ok=True)
+        manifest = {'version': MANIFEST_VERSION, 'created': datetime.now().isoformat(timespec='seconds'),
+                    'files': dict(sorted(entries.items()))}
+        tmp = self.snapshots / f"{name}.json.tmp"
+        tmp.write_text(json.dumps(manifest, indent=1))
+        os.replace(tmp, self.snapshots / f"{name}.json")
+        stats.elapsed = time.perf_counter() - start
+        return name, stats
+
+    def _restore_one(self, dest, rel, entry, dry_run=False):
+        """Write one file back; returns the bytes (to be) written, or None if it already matched."""
+        target = dest / rel
+        try:
+            st = target.stat()
+            if st.st_size == entry['size'] and (st.st_mtime_ns == entry['mtime_ns']
+                                                or file_sha256(target) == entry['sha256']):
+                return None
+        except FileNotFoundError:
+            pass
+        if dry_run:
+            return entry['size']
+        size = copy_file(self.object_path(entry['sha256']), target)
+        os.chmod(target, entry['mode'])
+        os.utime(target, ns=(entry['mtime_ns'], entry['mtime_ns']))
+        return size
+
+    def restore(self, name, dest, dry_run=False):
+        """Write snapshot `name` under dest; files not in the snapshot are left alone.
+
+        Returns (relative paths restored, or to restore with dry_run, SnapshotStats)
+        where `reused` counts files that already matched.
+        """
+        stats = SnapshotStats()
+        start = time.perf_counter()
+        files = self.load_manifest(name)['files']
+        missing = [rel for rel, e in files.items() if not self.object_path(e['sha256']).exists()]
+        if missing:
+            raise FileNotFoundError(f"{len(missing)} objects missing from {self.objects} (e.g. {missing[0]})")
+        restored = []
+        with ThreadPoolExecutor(max_workers=self.workers) as pool:
+            results = pool.map(lambda item: (item[0], self._restore_one(Path(dest), *item, dry_run)), files.items())
+            for rel, written in results:
+                stats.files += 1
+                stats.total_bytes += files[rel]['size']
+                if written is None:
+                    stats.reused += 1
+                else:
+                    restored.append(rel)
+                    stats.stored_bytes += written
+        stats.elapsed = time.perf_counter() - start
+        return restored, stats
+
+    def prune(self, keep, dry_run=False):
+        """Delete all but the `keep` newest snapshots and the objects only they used.
+
+        Returns (deleted snapshot names, deleted object count, freed bytes).
+        """
+        names = self.list_snapshots()
+        doomed = names[:-keep] if keep > 0 else names
+        referenced = set()
+        for name in names[len(doomed):]:
+            referenced.update(e['sha256'] for e in self.load_manifest(name)['files'].values())
+        deleted_objects, freed = 0, 0
+        for path in (self.objects.glob('*/*') if self.objects.is_dir() else ()):
+            if path.parent.name + path.name not in referenced and not path.name.endswith('.tmp'):
+                deleted_objects += 1
+                freed += path.stat().st_size
+                if not dry_run:
+                    path.unlink()
+        if not dry_run:
+            for name in doomed:
+                (self.snapshots / f"{name}.json").unlink()
+            for directory in (self.objects.iterdir() if self.objects.is_dir() else ()):
+                if directory.is_dir() and not any(directory.iterdir()):
+                    directory.rmdir()
+        return doomed, deleted_objects, freed
@@ -0,0 +1,110 @@
+"""
+Tests for the incremental copy in sync-to-github.py.
+
+    python3 -m pytest scripts/test_sync_to_github.py
+"""
+
+import importlib.util
+import subprocess
+from pathlib import Path
+
+import pytest
+
+_spec = importlib.util.spec_from_file_location('sync_to_github', Path(__file__).with_name('sync-to-github.py'))
+sync = importlib.util.module_from_spec(_spec)
+_spec.loader.exec_module(sync)
+
+
+def git(repo, *args):
+    return subprocess.run(['git', *args], cwd=repo, check=True, capture_output=True, text=True).stdout
+
+
+@pytest.fixture
+def mirror(tmp_path):
+    """An empty git checkout standing in for the mirror."""
+    repo = tmp_path / 'mirror'
+    repo.mkdir()
+    git(repo, 'init', '-q')
+    git(repo, 'config', 'user.email', 'sync@example.com')
+    git(repo, 'config', 'user.name', 'sync')
+    return repo
+
+
+def commit_all(repo):
+    git(repo, 'add', '-A')
+    git(repo, 'commit', '-q', '-m', 'state')
+
+
+def tracked(repo):
+    return sorted(git(repo, 'ls-files').split())
+
+
+def sync_and_stage(src, dst):
+    copied, deleted, _ = sync.sync_project_files(src, dst, sync.ExcludeMatcher(sync.EXCLUDE_PATTERNS), workers=4)
+    sync.stage_paths(dst, copied + deleted)
+    return copied, deleted
+
+
+def test_file_replaced_by_directory(tmp_path, mirror):
+    (mirror / 'foo').write_text('old file')
+    commit_all(mirror)
+    project = tmp_path / 'project'
+    (project / 'foo').mkdir(parents=True)
+    (project / 'foo' / 'bar.txt').write_text('new')
+
+    copied, _ = sync_and_stage(project, mirror)
+
+    assert copied == [Path('foo/bar.txt')]
+    assert (mirror / 'foo' / 'bar.txt').read_text() == 'new'
+    assert sorted(git(mirror, 'diff', '--cached', '--name-only').split()) == ['foo', 'foo/bar.txt']
+
+
+def test_directory_replaced_by_file(tmp_path, mirror):
+    (mirror / 'foo').mkdir()
+    (mirror / 'foo' / 'bar.txt').write_text('old')
+    commit_all(mirror)
+    project = tmp_path / 'project'
+    project.mkdir()
+    (project / 'foo').write_text('now a file')
+
+    sync_and_stage(project, mirror)
+
+    assert (mirror / 'foo').read_text() == 'now a file'
+    git(mirror, 'commit', '-q', '-m', 'sync')
+    assert tracked(mirror) == ['foo']
+
+
+def test_unchanged_files_are_not_copied(tmp_path, mirror):
+    project = tmp_path / 'project'
+    (project / 'node_modules' / 'x').mkdir(parents=True)
+    (project / 'node_modules' / 'x' / 'index.js').write_text('ignored')
+    (project / 'a.txt').write_text('a')
+    sync_and_stage(project, mirror)
+    git(mirror, 'commit', '-q', '-m', 'first')
+
+    copied, deleted = sync_and_stage(project, mirror)
+
+    assert (copied, deleted) == ([], [])
+    assert tracked(mirror) == ['a.txt']
+
+
+def test_same_remote_resolves_local_paths(tmp_path, monkeypatch):
+    remote = tmp_path / 'remote.git'
+    remote.mkdir()
+    monkeypatch.chdir(tmp_path)
+    monkeypatch.setenv('HOME', str(tmp_path))
+
+    for url in ('remote.git', './remote.git', '~/remote.git', remote.as_uri(), f'{remote}/'):
+        assert sync.same_remote(str(remote), url), url
+        assert sync.same_remote(remote.as_uri(), url), url
+    assert not sync.same_remote(str(remote), str(tmp_path / 'other.git'))
+
+
+def test_same_remote_matches_slugs_against_the_whole_path():
+    origin = 'https://github.com/RusingAcademy/rusingacademy-ecosystem.git'
+    assert sync.same_remote(origin, 'RusingAcademy/rusingacademy-ecosystem')
+    assert sync.same_remote(origin, 'git@github.com:rusingacademy/rusingacademy-ecosystem.git')
+    assert not sync.same_remote(origin, 'rusingacademy-ecosystem')
+    assert not sync.same_remote(origin, 'someone/rusingacademy-ecosystem')
+    assert not sync.same_remote('https://github.com/anyone/bar', 'bar')
+    assert not sync.same_remote(origin, 'https://gitlab.com/RusingAcademy/rusingacademy-ecosystem')